@@ -0,0 +1,342 @@
+"""
+DrawMate Arc Fitter
+-------------------
+G-code pass that replaces runs of short G1 segments with G2/G3 arcs. Traced
+curves arrive as dense polylines, and every segment is a line over the
+115200-baud link and a block in GRBL's 127-byte receive buffer; one arc
+carries a whole run of them.
+
+Arcs are fitted greedily along each run of pen-down G1 moves: a circle
+through the first, middle and last point of a candidate run is accepted
+while every point and every segment midpoint stays within tolerance of it
+and the run turns one way by less than a full circle. A candidate run
+doubles in length while it fits, then a binary search finds where it stops
+fitting, so a long arc costs O(n log n) rather than O(n²) point checks.
+
+GRBL draws an arc as chords within $12 arc tolerance of the true circle, so
+the fit only gets what is left of the tolerance after $12 (from_settings).
+Arcs are written in the default incremental IJ center mode (G91.1) and in
+the XY plane (G17), with the same precision as the input coordinates.
+
+Usage (standalone):
+    python ArcFitter.py gcode/cat.gcode -o gcode/cat-arcs.gcode --tolerance 0.05
+
+Usage (imported):
+    fitter = ArcFitter.from_settings(GrblSettings.from_export(FIRMWARE_SETTINGS_PATH), 0.05)
+    for line in fitter.fit_lines(lines, on_report=print):
+        ...
+
+Author: DrawMate Project
+"""
+
+import argparse
+import math
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Iterator
+
+import numpy as np
+
+from GrblSettings import GrblSettings
+
+MIN_ARC_SEGMENTS = 3            # Fewer segments don't pay for the I and J words
+MAX_ARC_SWEEP = 2 * math.pi - 0.1  # Keep well clear of GRBL's full-circle case
+
+WORD_PATTERN = re.compile(r"([A-Z])\s*([-+]?(?:\d+\.?\d*|\.\d+))")
+COMMENT_PATTERN = re.compile(r"\(.*?\)|;.*")
+
+MOTION_G_CODES = {0, 1, 2, 3, 38.2, 38.3, 38.4, 38.5, 80}
+# Non-modal commands whose axis words aren't a move in the current motion mode
+AXIS_G_CODES = {10, 28, 28.1, 30, 30.1, 92, 92.1}
+
+
+@dataclass(frozen=True)
+class ArcFitReport:
+    """G-code lines and bytes (newlines included) before and after arc fitting."""
+
+    lines_before: int
+    lines_after: int
+    bytes_before: int
+    bytes_after: int
+    arcs: int
+    segments_replaced: int
+
+    @property
+    def line_reduction(self) -> float:
+        return 1.0 - self.lines_after / self.lines_before if self.lines_before else 0.0
+
+    @property
+    def byte_reduction(self) -> float:
+        return 1.0 - self.bytes_after / self.bytes_before if self.bytes_before else 0.0
+
+    def __str__(self) -> str:
+        return (f"⌒ {self.arcs} arcs replaced {self.segments_replaced} G1 segments: "
+                f"lines {self.lines_before} → {self.lines_after} (-{self.line_reduction:.0%}), "
+                f"bytes {self.bytes_before} → {self.bytes_after} (-{self.byte_reduction:.0%})")
+
+
+class ArcFitter:
+    """Replaces runs of G1 segments with G2/G3 arcs within a tolerance."""
+
+    def __init__(self,
+                 tolerance: float = 0.048,
+                 min_radius: float = 0.1,
+                 max_radius: float = 1000.0,
+                 decimals: int = 4):
+        """
+        Args:
+            tolerance: Largest distance (mm) between an arc and the points and
+                segments it replaces
+            min_radius: Smallest arc radius (mm) worth fitting
+            max_radius: Largest arc radius (mm); flatter runs stay straight lines
+            decimals: Digits after the decimal point of written coordinates
+        """
+        self.tolerance = tolerance
+        self.min_radius = min_radius
+        self.max_radius = max_radius
+        self.decimals = decimals
+
+    @classmethod
+    def from_settings(cls, settings: GrblSettings, tolerance: float = 0.05, **kwargs) -> "ArcFitter":
+        """
+        Fitter whose arcs, once GRBL splits them into chords, stay within tolerance.
+
+        Raises:
+            ValueError: If tolerance is not larger than the $12 arc tolerance
+        """
+        if tolerance <= settings.arc_tolerance_in_mm:
+            raise ValueError(f"Arc fitting tolerance {tolerance} mm must exceed "
+                             f"$12 = {settings.arc_tolerance_in_mm} mm.")
+        return cls(tolerance - settings.arc_tolerance_in_mm, **kwargs)
+
+    # -------------------------------
+    # Fitting
+    # -------------------------------
+    def _fit_circle(self, points: np.ndarray):
+        """
+        Circle through the first, middle and last of points if the whole run follows it.
+
+        Returns:
+            (center, clockwise) or None
+        """
+        origin = points[0]
+        b, c = points[len(points) // 2] - origin, points[-1] - origin
+        d = 2.0 * (b[0] * c[1] - b[1] * c[0])
+        if abs(d) < 1e-12:
+            return None
+        b2, c2 = b @ b, c @ c
+        center = origin + np.array([c[1] * b2 - b[1] * c2, b[0] * c2 - c[0] * b2]) / d
+        radius = math.hypot(*(origin - center))
+        if not self.min_radius <= radius <= self.max_radius:
+            return None
+
+        relative = points - center
+        if np.any(np.abs(np.hypot(relative[:, 0], relative[:, 1]) - radius) > self.tolerance):
+            return None
+        midpoints = 0.5 * (relative[1:] + relative[:-1])
+        if np.any(np.abs(np.hypot(midpoints[:, 0], midpoints[:, 1]) - radius) > self.tolerance):
+            return None
+
+        # Every segment must turn the same way around the center, less than a full circle in total
+        cross = relative[:-1, 0] * relative[1:, 1] - relative[:-1, 1] * relative[1:, 0]
+        dot = np.einsum("ij,ij->i", relative[:-1], relative[1:])
+        steps = np.arctan2(cross, dot)
+        if not (np.all(steps > 0) or np.all(steps < 0)) or abs(steps.sum()) > MAX_ARC_SWEEP:
+            return None
+        return center, bool(steps[0] < 0)
+
+    def fit_points(self, points: np.ndarray) -> list:
+        """
+        Split a polyline into straight segments and arcs.
+
+        Args:
+            points: (n, 2) polyline starting at the current position
+
+        Returns:
+            List of (end_index, None) for a straight segment to points[end_index],
+            or (end_index, (center, clockwise)) for an arc from the previous end
+        """
+        moves = []
+        start, last = 0, len(points) - 1
+        while start < last:
+            # Longest run of segments from start that fits (0: none), and the longest worth trying
+            fitted_segments, arc = 0, None
+            most_segments = last - start
+
+            # Double the run while it fits...
+            segments = MIN_ARC_SEGMENTS
+            while segments <= most_segments:
+                fitted = self._fit_circle(points[start:start + segments + 1])
+                if fitted is None:
+                    most_segments = segments - 1
+                    break
+                fitted_segments, arc = segments, fitted
+                if segments == most_segments:
+                    break
+                segments = min(2 * segments, most_segments)
+
+            # ...then binary search between the last run that fit and the first that didn't
+            low = fitted_segments + 1
+            while fitted_segments and low <= most_segments:
+                segments = (low + most_segments) // 2
+                fitted = self._fit_circle(points[start:start + segments + 1])
+                if fitted is None:
+                    most_segments = segments - 1
+                else:
+                    fitted_segments, arc, low = segments, fitted, segments + 1
+
+            end = start + fitted_segments if fitted_segments else start + 1
+            moves.append((end, arc))
+            start = end
+        return moves
+
+    # -------------------------------
+    # G-code Pass
+    # -------------------------------
+    @staticmethod
+    def _words(line: str) -> tuple:
+        """(every G code, {letter: value} of the other words) of a line."""
+        g_codes, words = [], {}
+        for letter, value in WORD_PATTERN.findall(line.upper()):
+            if letter == "G":
+                g_codes.append(float(value))
+            else:
+                words[letter] = float(value)
+        return g_codes, words
+
+    @classmethod
+    def _with_motion(cls, line: str, motion: int, emitted_motion: int) -> tuple:
+        """
+        The line, prefixed with its motion mode when the emitted program is in another one.
+
+        A kept modal move (e.g. 'X47.01Y40.77') that follows an emitted arc
+        would otherwise run as an arc without I and J.
+
+        Returns:
+            (line, motion mode of the emitted program after it)
+        """
+        g_codes, words = cls._words(COMMENT_PATTERN.sub("", line))
+        stated = [g for g in g_codes if g in MOTION_G_CODES]
+        if stated:
+            return line, stated[-1]
+        if motion == emitted_motion or not set(words) & set("XYZ") or set(g_codes) & AXIS_G_CODES:
+            return line, emitted_motion
+        return f"G{motion}{' ' if ' ' in line else ''}{line}", motion
+
+    def _arc_line(self, start: np.ndarray, end: np.ndarray, center: np.ndarray, clockwise: bool) -> str:
+        def number(value: float) -> str:
+            # Adding 0.0 turns a rounded -0.0 into 0.0
+            return f"{round(float(value), self.decimals) + 0.0:.{self.decimals}f}"
+
+        offset = center - start
+        return (f"G{2 if clockwise else 3} X{number(end[0])} Y{number(end[1])} "
+                f"I{number(offset[0])} J{number(offset[1])}")
+
+    def _fit_run(self, start: tuple, run: list) -> list:
+        """Fitted (line, arc) pairs for a run of (line, x, y) G1 moves; arc is False for kept lines."""
+        points = np.array([start] + [(x, y) for _, x, y in run])
+        lines, previous = [], 0
+        for end, arc in self.fit_points(points):
+            if arc is None:
+                lines.append((run[end - 1][0], False))
+            else:
+                lines.append((self._arc_line(points[previous], points[end], *arc), True))
+            previous = end
+        return lines
+
+    def fit_lines(self, lines: Iterable[str], on_report=None) -> Iterator[str]:
+        """
+        Yield G-code lines with runs of XY G1 moves replaced by arcs.
+
+        Other lines pass through unchanged, and fitting pauses while the
+        program is in relative (G91) or inch (G20) mode. Runs are held back
+        until they end, so a streamed program is delayed by one path at most.
+
+        Args:
+            lines: G-code lines without newlines
+            on_report: Called with an ArcFitReport once every line is out
+        """
+        counts = {"lines_before": 0, "lines_after": 0, "bytes_before": 0, "bytes_after": 0,
+                  "arcs": 0, "segments_replaced": 0}
+        position = [0.0, 0.0]
+        motion, absolute, millimeters = 0, True, True
+        # Motion mode GRBL is in after the lines emitted so far (arcs change it)
+        state = {"emitted_motion": 0}
+        run, run_start = [], (0.0, 0.0)
+
+        def emit(line: str, line_motion: int) -> str:
+            line, state["emitted_motion"] = self._with_motion(line, line_motion, state["emitted_motion"])
+            counts["lines_after"] += 1
+            counts["bytes_after"] += len(line) + 1
+            return line
+
+        def flush() -> Iterator[str]:
+            fitted = self._fit_run(run_start, run)
+            arcs = sum(arc for _, arc in fitted)
+            counts["arcs"] += arcs
+            counts["segments_replaced"] += len(run) - (len(fitted) - arcs)
+            run.clear()
+            for fitted_line, arc in fitted:
+                yield emit(fitted_line, 1)
+
+        for line in lines:
+            counts["lines_before"] += 1
+            counts["bytes_before"] += len(line) + 1
+
+            code = COMMENT_PATTERN.sub("", line)
+            g_codes, words = self._words(code)
+            for g in g_codes:
+                if g in (0, 1, 2, 3):
+                    motion = int(g)
+                elif g in (90, 91):
+                    absolute = g == 90
+                elif g in (20, 21):
+                    millimeters = g == 21
+
+            fittable = (absolute and millimeters and motion == 1 and code == line
+                        and set(g_codes) <= {1} and set(words) <= {"X", "Y"} and words)
+            if fittable:
+                if not run:
+                    run_start = tuple(position)
+                position = [words.get("X", position[0]), words.get("Y", position[1])]
+                run.append((line, *position))
+                continue
+
+            if run:
+                yield from flush()
+            if absolute and not code.lstrip().startswith("$"):
+                position = [words.get("X", position[0]), words.get("Y", position[1])]
+            yield emit(line, motion)
+
+        if run:
+            yield from flush()
+        if on_report is not None:
+            on_report(ArcFitReport(**counts))
+
+
+# -------------------------------
+# Standalone CLI Interface
+# -------------------------------
+if __name__ == "__main__":
+    from config.config import FIRMWARE_SETTINGS_PATH
+
+    parser = argparse.ArgumentParser(description="Replace runs of G1 segments with G2/G3 arcs.")
+    parser.add_argument("gcode_path", type=Path, help="G-code file to fit")
+    parser.add_argument("-o", "--output", type=Path, default=None,
+                        help="Output file (default: <name>-arcs.gcode next to the input)")
+    parser.add_argument("--tolerance", type=float, default=0.05,
+                        help="Largest deviation in mm, $12 included (default: 0.05)")
+    parser.add_argument("--settings", type=Path, default=FIRMWARE_SETTINGS_PATH,
+                        help="Firmware settings export to read $12 from")
+    args = parser.parse_args()
+
+    if not args.gcode_path.exists():
+        raise FileNotFoundError(f"G-code file {args.gcode_path} does not exist.")
+    output_path = args.output or args.gcode_path.with_name(f"{args.gcode_path.stem}-arcs.gcode")
+
+    fitter = ArcFitter.from_settings(GrblSettings.from_export(args.settings), args.tolerance)
+    with open(args.gcode_path, "r") as source, open(output_path, "w") as target:
+        for fitted_line in fitter.fit_lines((line.rstrip("\n") for line in source), on_report=print):
+            target.write(fitted_line + "\n")
+    print(f"✅ Arc-fitted G-code saved: {output_path}")
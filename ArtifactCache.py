@@ -0,0 +1,231 @@
+"""
+DrawMate Artifact Cache
+-----------------------
+Content-addressed store for conversion results. An entry is keyed on the
+SHA-256 of the input image bytes plus every parameter that changes the output
+(threshold, simplify tolerance, canvas size, gwrite profile, ...), so two
+different images with the same file name never collide, and replotting an
+image with unchanged settings skips the conversion entirely.
+
+Layout on disk:
+    cache/
+        entries/<key>/drawing.gcode
+        entries/<key>/drawing.svg      (optional)
+        entries/<key>/metadata.json    (mtime = last use, for LRU eviction)
+        staging/                       (entries being written)
+        .lock
+
+Entries are written into a staging directory and renamed into place, which
+is atomic, so readers never see half-written files. Eviction holds an
+exclusive flock, making the cache safe to share between processes (e.g. the
+batch converter's process pool).
+
+get()/put() deal in conversion results. get_entry()/put_entry() store any
+set of files, e.g. LineArtGenerator's cached Gemini responses.
+
+Usage:
+    cache = ArtifactCache(CACHE_DIR)
+    key = ArtifactCache.key(image_bytes, {"threshold": 0.5, ...})
+    artifact = cache.get(key)
+    if artifact is None:
+        staging = cache.new_staging_directory()
+        ...write staging / ArtifactCache.GCODE_NAME...
+        artifact = cache.put(key, staging, {"path_count": 42})
+
+Author: DrawMate Project
+"""
+
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+
+@dataclass(frozen=True)
+class CachedArtifact:
+    """One cache entry."""
+
+    key: str
+    gcode_path: Path
+    svg_path: Optional[Path]
+    metadata: dict
+
+
+class ArtifactCache:
+    """Size-bounded, least-recently-used, content-addressed artifact store."""
+
+    GCODE_NAME = "drawing.gcode"
+    SVG_NAME = "drawing.svg"
+    METADATA_NAME = "metadata.json"
+
+    def __init__(self, directory: Path, max_size_in_bytes: int = 512 * 1024 ** 2):
+        self.directory = Path(directory)
+        self.max_size_in_bytes = max_size_in_bytes
+
+        self._entries = self.directory / "entries"
+        self._staging = self.directory / "staging"
+        self._lock_path = self.directory / ".lock"
+        self._entries.mkdir(parents=True, exist_ok=True)
+        self._staging.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def key(input_bytes: bytes, parameters: dict) -> str:
+        """SHA-256 over the input bytes and the JSON-encoded conversion parameters."""
+        digest = hashlib.sha256(input_bytes)
+        digest.update(json.dumps(parameters, sort_keys=True, default=str).encode())
+        return digest.hexdigest()
+
+    # -------------------------------
+    # Internal Helpers
+    # -------------------------------
+    def _locked(self):
+        """Exclusive inter-process lock, released when the returned file is closed."""
+        lock_file = open(self._lock_path, "a")
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        return lock_file
+
+    @staticmethod
+    def _entry_size(entry: Path) -> int:
+        return sum(f.stat().st_size for f in entry.iterdir())
+
+    def _remove(self, entry: Path):
+        # Rename first so readers see the entry vanish at once, then delete
+        doomed = Path(tempfile.mkdtemp(dir=self._staging, prefix="evict-"))
+        try:
+            entry.rename(doomed / entry.name)
+        except FileNotFoundError:
+            pass
+        shutil.rmtree(doomed, ignore_errors=True)
+
+    # -------------------------------
+    # Public Methods
+    # -------------------------------
+    def get_entry(self, key: str) -> Optional[tuple]:
+        """Return (entry directory, metadata) for key (marking it recently used), or None on a miss."""
+        entry = self._entries / key
+        metadata_path = entry / self.METADATA_NAME
+        try:
+            with open(metadata_path) as metadata_file:
+                metadata = json.load(metadata_file)
+            os.utime(metadata_path)
+        except FileNotFoundError:
+            return None
+        return entry, metadata
+
+    def get(self, key: str) -> Optional[CachedArtifact]:
+        """Return the conversion result for key (marking it recently used), or None on a miss."""
+        found = self.get_entry(key)
+        if found is None:
+            return None
+
+        entry, metadata = found
+        svg_path = entry / self.SVG_NAME
+        return CachedArtifact(
+            key=key,
+            gcode_path=entry / self.GCODE_NAME,
+            svg_path=svg_path if svg_path.exists() else None,
+            metadata=metadata,
+        )
+
+    def new_staging_directory(self) -> Path:
+        """Empty directory on the cache's filesystem to write a new entry's files into."""
+        return Path(tempfile.mkdtemp(dir=self._staging, prefix="entry-"))
+
+    def put_entry(self, key: str, staging_directory: Path, metadata: dict, required_name: str) -> Path:
+        """
+        Publish a staged entry under key and evict old entries beyond the size limit.
+
+        If another process published the same key first, its entry is kept and
+        the staged files are discarded.
+
+        Args:
+            key: Entry key (see key())
+            staging_directory: Directory from new_staging_directory() holding the files
+            metadata: JSON-serializable metadata to store with the entry
+            required_name: File that must be in the staging directory
+
+        Returns:
+            The published entry directory
+
+        Raises:
+            FileNotFoundError: If the staging directory has no required_name file
+        """
+        staging_directory = Path(staging_directory)
+        if not (staging_directory / required_name).exists():
+            raise FileNotFoundError(f"No {required_name} in {staging_directory}.")
+
+        with open(staging_directory / self.METADATA_NAME, "w") as metadata_file:
+            json.dump(metadata, metadata_file, indent=2)
+
+        try:
+            staging_directory.rename(self._entries / key)
+        except OSError:
+            # Lost the race: the entry already exists
+            shutil.rmtree(staging_directory, ignore_errors=True)
+
+        self.evict(keep=key)
+        if self.get_entry(key) is None:
+            raise FileNotFoundError(f"Cache entry {key} vanished while being stored.")
+        return self._entries / key
+
+    def put(self, key: str, staging_directory: Path, metadata: dict) -> CachedArtifact:
+        """
+        Publish a staged conversion result (see put_entry()).
+
+        Raises:
+            FileNotFoundError: If the staging directory has no G-code file
+        """
+        self.put_entry(key, staging_directory, metadata, self.GCODE_NAME)
+        artifact = self.get(key)
+        if artifact is None:
+            raise FileNotFoundError(f"Cache entry {key} vanished while being stored.")
+        return artifact
+
+    def evict(self, keep: Optional[str] = None) -> int:
+        """
+        Remove least recently used entries until the cache fits max_size_in_bytes.
+
+        Args:
+            keep: Key that must survive (the entry just stored)
+
+        Returns:
+            Number of entries removed
+        """
+        with self._locked():
+            entries = []
+            for entry in self._entries.iterdir():
+                try:
+                    last_used = (entry / self.METADATA_NAME).stat().st_mtime
+                    entries.append((last_used, self._entry_size(entry), entry))
+                except FileNotFoundError:
+                    continue
+
+            total = sum(size for _, size, _ in entries)
+            removed = 0
+            for _, size, entry in sorted(entries, key=lambda item: item[0]):
+                if total <= self.max_size_in_bytes:
+                    break
+                if entry.name == keep:
+                    continue
+                self._remove(entry)
+                total -= size
+                removed += 1
+            return removed
+
+    @property
+    def size_in_bytes(self) -> int:
+        total = 0
+        for entry in self._entries.iterdir():
+            try:
+                total += self._entry_size(entry)
+            except FileNotFoundError:
+                continue
+        return total
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self._entries.iterdir())
@@ -0,0 +1,418 @@
+"""
+DrawMate Async G-code Streamer
+------------------------------
+asyncio front end for DrawMateStreamer. Streams G-code with the
+character-counting protocol while a periodic '?' poll reports machine state,
+so a UI or the voice front end can watch and control a long plot without
+blocking the process.
+
+Usage (standalone):
+    python AsyncDrawMateStreamer.py /dev/ttyACM0 gcode/cat.gcode
+
+Usage (imported):
+    from DrawMateStreamer import DrawMateStreamer
+    from AsyncDrawMateStreamer import AsyncDrawMateStreamer
+
+    async with AsyncDrawMateStreamer(DrawMateStreamer("/dev/ttyACM0")) as streamer:
+        job = asyncio.create_task(streamer.stream_gcode("gcode/cat.gcode"))
+        async for status in streamer.updates():
+            print(status.state, status.machine_position, status.eta)
+            if job.done():
+                break
+
+    # From any other task on the same loop:
+    streamer.feed_hold()         # '!'
+    streamer.resume()            # '~'
+    await streamer.soft_reset()  # CTRL-X, aborts the job but keeps the port open
+
+Author: DrawMate Project
+"""
+
+import argparse
+import asyncio
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Callable, Optional
+
+import serial
+
+from DrawMateStreamer import (
+    DrawMateStreamer, GrblAlarmError, GrblHandshakeError, GRBL_RX_BUFFER_SIZE
+)
+
+# Number of motion blocks in GRBL 1.1's planner buffer (BLOCK_BUFFER_SIZE on the Uno)
+GRBL_PLANNER_BLOCKS = 15
+
+
+class StreamAborted(Exception):
+    """Raised inside a running stream when it is cancelled by a soft reset."""
+
+
+@dataclass(frozen=True)
+class StreamStatus:
+    """Snapshot of the machine and the stream, published on every status report."""
+
+    state: str = "Unknown"
+    machine_position: tuple = (0.0, 0.0, 0.0)
+    planner_blocks_free: Optional[int] = None  # Only if GRBL reports Bf ($10 bit 1)
+    rx_bytes_free: int = GRBL_RX_BUFFER_SIZE
+    lines_total: int = 0
+    lines_sent: int = 0
+    lines_acked: int = 0
+    errors: int = 0
+    elapsed: float = 0.0
+    eta: Optional[float] = None  # Seconds left, extrapolated from the ack rate
+
+    @property
+    def progress(self) -> float:
+        return self.lines_acked / self.lines_total if self.lines_total else 0.0
+
+
+def parse_status_report(report: str) -> dict:
+    """
+    Split a GRBL 1.1 status report into its fields.
+
+    '<Hold:0|MPos:1.000,2.000,0.000|Bf:15,128|FS:0,0>' becomes
+    {'state': 'Hold', 'MPos': '1.000,2.000,0.000', 'Bf': '15,128', 'FS': '0,0'}
+    """
+    fields = report.strip().strip("<>").split("|")
+    parsed = {"state": fields[0].split(":")[0]}
+    for field in fields[1:]:
+        key, _, value = field.partition(":")
+        parsed[key] = value
+    return parsed
+
+
+class AsyncDrawMateStreamer:
+    """Runs the character-counting stream and the '?' status poll side by side on asyncio."""
+
+    def __init__(self,
+                 streamer: DrawMateStreamer,
+                 status_interval: float = 0.2,
+                 on_status: Optional[Callable[[StreamStatus], None]] = None):
+        """
+        Args:
+            streamer: Streamer whose connection and handshake are reused
+            status_interval: Seconds between '?' real-time status polls
+            on_status: Called with a StreamStatus on every status report
+        """
+        self.streamer = streamer
+        self.status_interval = status_interval
+        self.on_status = on_status
+        self.status = StreamStatus()
+
+        self._grbl = None
+        self._loop = None
+        self._responses = None
+        self._reader_thread = None
+        self._stop_reader = threading.Event()
+        self._tasks = []
+        self._subscribers = []
+
+        self._pending = deque()  # (line_number, line, byte_count) awaiting an ack
+        self._buffered_bytes = 0
+        self._errors = []
+        self._alarm = None
+        self._aborted = False
+        self._started_at = 0.0
+        self._acked = asyncio.Event()
+        self._banner = asyncio.Event()
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    # -------------------------------
+    # Internal Helpers
+    # -------------------------------
+    def _write(self, payload: bytes):
+        self._grbl.write(payload)
+
+    def _read_responses(self):
+        """Reader thread: hand every line GRBL sends to the event loop."""
+        while not self._stop_reader.is_set():
+            try:
+                raw = self._grbl.readline()
+            except serial.SerialException as e:
+                self._loop.call_soon_threadsafe(self._responses.put_nowait, e)
+                return
+            if raw:
+                response = raw.decode(errors="ignore").strip()
+                if response:
+                    self._loop.call_soon_threadsafe(self._responses.put_nowait, response)
+
+    async def _dispatch_responses(self):
+        while True:
+            response = await self._responses.get()
+            if isinstance(response, Exception):
+                self._alarm = f"serial error: {response}"
+                self._acked.set()
+                return
+
+            if response.startswith("<"):
+                self._handle_status_report(response)
+            elif response == "ok" or response.startswith("error:"):
+                if not self._pending:
+                    continue
+                line_number, line, byte_count = self._pending.popleft()
+                self._buffered_bytes -= byte_count
+                if response != "ok":
+                    self._errors.append((line_number, line, response))
+                    print(f"   ← {response} (line {line_number}: {line})")
+                self.status = replace(self.status,
+                                      lines_acked=self.status.lines_acked + 1,
+                                      errors=len(self._errors))
+                self._acked.set()
+            elif response.startswith("ALARM:"):
+                self._alarm = response
+                self._acked.set()
+            elif response.startswith("Grbl "):
+                self._banner.set()
+            else:
+                # [MSG:...], [GC:...] and other feedback
+                print(f"   ← {response}")
+
+    def _handle_status_report(self, report: str):
+        fields = parse_status_report(report)
+
+        position = self.status.machine_position
+        if "MPos" in fields:
+            position = tuple(float(v) for v in fields["MPos"].split(","))
+
+        planner_blocks_free = self.status.planner_blocks_free
+        if "Bf" in fields:
+            planner_blocks_free = int(fields["Bf"].split(",")[0])
+
+        elapsed = time.monotonic() - self._started_at if self._started_at else 0.0
+        acked = self.status.lines_acked
+        eta = None
+        if acked and self.status.lines_total:
+            eta = elapsed / acked * (self.status.lines_total - acked)
+
+        self.status = replace(self.status,
+                              state=fields["state"],
+                              machine_position=position,
+                              planner_blocks_free=planner_blocks_free,
+                              rx_bytes_free=GRBL_RX_BUFFER_SIZE - self._buffered_bytes,
+                              elapsed=elapsed,
+                              eta=eta)
+        self._publish()
+
+    def _publish(self):
+        if self.on_status is not None:
+            self.on_status(self.status)
+        for queue in self._subscribers:
+            # Slow consumers only ever see the latest snapshot
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(self.status)
+
+    async def _poll_status(self):
+        while True:
+            self._write(b"?")
+            await asyncio.sleep(self.status_interval)
+
+    async def _wait_for_ack(self):
+        """Block until GRBL acknowledges at least one more line."""
+        self._acked.clear()
+        await self._acked.wait()
+
+        if self._aborted:
+            raise StreamAborted("Stream aborted by soft reset.")
+        if self._alarm is not None:
+            raise GrblAlarmError(f"GRBL {self._alarm} after {self.status.lines_acked} acknowledged lines.")
+
+    # -------------------------------
+    # Connection Lifecycle
+    # -------------------------------
+    async def open(self):
+        """Connect (or reuse the streamer's connection) and start the reader and status poll."""
+        self._grbl = await asyncio.to_thread(self.streamer.open)
+        self._loop = asyncio.get_running_loop()
+        self._responses = asyncio.Queue()
+
+        self._stop_reader.clear()
+        self._reader_thread = threading.Thread(target=self._read_responses, daemon=True)
+        self._reader_thread.start()
+
+        self._tasks = [
+            asyncio.create_task(self._dispatch_responses()),
+            asyncio.create_task(self._poll_status()),
+        ]
+
+    async def close(self):
+        """Stop polling and close the connection."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+        self._stop_reader.set()
+        if self._reader_thread is not None:
+            await asyncio.to_thread(self._reader_thread.join)
+            self._reader_thread = None
+
+        for queue in self._subscribers:
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(None)
+
+        self.streamer.close()
+
+    # -------------------------------
+    # Real-time Control
+    # -------------------------------
+    def feed_hold(self):
+        """Decelerate to a controlled stop. The stream pauses until resume()."""
+        self._write(b"!")
+
+    def resume(self):
+        """Resume motion after a feed hold."""
+        self._write(b"~")
+
+    async def soft_reset(self):
+        """
+        Soft-reset GRBL (CTRL-X) without closing the port.
+
+        Aborts the running stream with StreamAborted, waits for the new startup
+        banner and unlocks the machine again. Position is lost on a reset
+        during motion, so the next job re-homes.
+
+        Raises:
+            GrblHandshakeError: If GRBL does not come back within the handshake timeout
+        """
+        self._banner.clear()
+        self._write(b"\x18")
+
+        # GRBL flushes its RX buffer on reset, so nothing in flight will be acked
+        self._aborted = True
+        self._pending.clear()
+        self._buffered_bytes = 0
+        self._acked.set()
+        self.streamer.homed = False
+
+        try:
+            await asyncio.wait_for(self._banner.wait(), self.streamer.handshake_timeout)
+        except asyncio.TimeoutError:
+            raise GrblHandshakeError("Timed out waiting for the startup banner after soft reset.")
+
+        self._alarm = None
+        self._pending.append((0, "$X", 3))
+        self._buffered_bytes = 3
+        self._acked.clear()
+        self._write(b"$X\n")
+        await asyncio.wait_for(self._acked.wait(), self.streamer.handshake_timeout)
+
+    # -------------------------------
+    # Public Methods
+    # -------------------------------
+    async def updates(self):
+        """Async iterator over StreamStatus snapshots until the streamer is closed."""
+        queue = asyncio.Queue(maxsize=1)
+        self._subscribers.append(queue)
+        try:
+            while (status := await queue.get()) is not None:
+                yield status
+        finally:
+            self._subscribers.remove(queue)
+
+    async def stream_gcode(self, gcode_path: Path) -> list:
+        """
+        Stream a G-code file with the character-counting protocol.
+
+        Returns:
+            List of (line_number, line, error) tuples for every rejected line
+
+        Raises:
+            FileNotFoundError: If the G-code file doesn't exist
+            GrblAlarmError: If GRBL enters an alarm state mid-stream
+            StreamAborted: If soft_reset() is called while streaming
+        """
+        gcode_path = Path(gcode_path)
+        if not gcode_path.exists():
+            raise FileNotFoundError(f"G-code file {gcode_path} does not exist.")
+
+        lines = self.streamer.read_gcode_lines(gcode_path)
+        if self.streamer.compactor is not None:
+            lines = self.streamer.compactor.compact_lines(lines, on_report=print)
+        lines = list(self.streamer.skip_repeat_homing(lines))
+        return await self.stream_lines(lines)
+
+    async def stream_lines(self, lines: list) -> list:
+        """Stream already cleaned G-code lines. See stream_gcode()."""
+        self._pending.clear()
+        self._buffered_bytes = 0
+        self._errors = []
+        self._alarm = None
+        self._aborted = False
+        self._started_at = time.monotonic()
+        self.status = replace(self.status, lines_total=len(lines), lines_sent=0,
+                              lines_acked=0, errors=0, elapsed=0.0, eta=None)
+
+        for line_number, line in enumerate(lines, start=1):
+            payload = (line + "\n").encode()
+            if len(payload) > GRBL_RX_BUFFER_SIZE:
+                raise ValueError(
+                    f"Line {line_number} is {len(payload)} bytes, larger than GRBL's "
+                    f"{GRBL_RX_BUFFER_SIZE}-byte RX buffer: {line}"
+                )
+
+            while self._buffered_bytes + len(payload) > GRBL_RX_BUFFER_SIZE:
+                await self._wait_for_ack()
+
+            self._write(payload)
+            self._pending.append((line_number, line, len(payload)))
+            self._buffered_bytes += len(payload)
+            self.status = replace(self.status, lines_sent=line_number)
+
+        while self._pending:
+            await self._wait_for_ack()
+
+        self.status = replace(self.status, rx_bytes_free=GRBL_RX_BUFFER_SIZE,
+                              elapsed=time.monotonic() - self._started_at, eta=0.0)
+        self._publish()
+        return self._errors
+
+
+# -------------------------------
+# Standalone CLI Interface
+# -------------------------------
+def _print_progress(status: StreamStatus):
+    x, y, z = status.machine_position[:3]
+    eta = f"{status.eta:6.0f}s" if status.eta is not None else "     ?"
+    print(f"\r{status.state:<6} X{x:8.3f} Y{y:8.3f} Z{z:7.3f} "
+          f"{status.lines_acked}/{status.lines_total} ({status.progress:5.1%}) "
+          f"RX free {status.rx_bytes_free:3d} ETA {eta}", end="", flush=True)
+
+
+async def _run(port: str, gcode_paths: list):
+    async with AsyncDrawMateStreamer(DrawMateStreamer(port), on_status=_print_progress) as streamer:
+        for gcode_path in gcode_paths:
+            try:
+                errors = await streamer.stream_gcode(gcode_path)
+            except asyncio.CancelledError:
+                # Stop the pen as quickly as possible before the port closes
+                streamer.feed_hold()
+                await streamer.soft_reset()
+                raise
+            print(f"\n✅ {gcode_path} finished with {len(errors)} error(s).")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stream G-code to GRBL with live status.")
+    parser.add_argument("port", help="Serial port (e.g. /dev/ttyACM0)")
+    parser.add_argument("gcode_paths", type=Path, nargs="+", help="G-code file(s) to stream")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(_run(args.port, args.gcode_paths))
+    except KeyboardInterrupt:
+        print("\n⚠️ Interrupted by user. Machine was feed-held and reset.")
+    except (GrblAlarmError, GrblHandshakeError, serial.SerialException) as e:
+        print(f"\n[!] {e}")
@@ -0,0 +1,256 @@
+"""
+DrawMate Batch Converter
+------------------------
+Converts a directory or glob of images to G-code ahead of time, spreading
+the files over a process pool. Every worker runs GCodeConverter's in-process
+pipeline against the shared ArtifactCache, so:
+
+    - a file that was already converted with the same settings is reported
+      as cached and skipped (re-running an interrupted batch resumes it)
+    - results from main.py, earlier batches and other workers are reused
+
+Usage:
+    python BatchConverter.py assets/
+    python BatchConverter.py "drawings/*.png" --workers 8
+    python BatchConverter.py assets/ --threshold 0.4 --svg
+    python BatchConverter.py "scans/*.jpg" --threshold adaptive
+
+Author: DrawMate Project
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+import cv2
+
+from ArtifactCache import ArtifactCache
+from GCodeConverter import GCodeConverter
+from GrblSettings import GrblSettings
+from PlotTimeEstimator import PlotTimeEstimator
+from Vectorizer import THRESHOLD_METHODS
+
+IMAGE_SUFFIXES = {".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff", ".webp"}
+
+# Worker processes set this in _init_worker; convert_batch sets it for cache hits
+_converter: Optional[GCodeConverter] = None
+
+
+@dataclass(frozen=True)
+class BatchResult:
+    """Outcome of converting one image."""
+
+    image_path: Path
+    gcode_path: Optional[Path]
+    seconds: float
+    cached: bool
+    metadata: dict
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def parse_threshold(value: str):
+    """A threshold method name, or a level in 0-1."""
+    return value if value in THRESHOLD_METHODS else float(value)
+
+
+def find_images(source: str) -> list:
+    """Image files in a directory (non-recursive) or matching a glob pattern, sorted."""
+    source_path = Path(source)
+    if source_path.is_dir():
+        candidates = source_path.iterdir()
+    elif source_path.is_file():
+        candidates = [source_path]
+    else:
+        candidates = (Path(match) for match in glob.glob(source, recursive=True))
+    return sorted(path for path in candidates if path.suffix.lower() in IMAGE_SUFFIXES)
+
+
+# -------------------------------
+# Worker Process
+# -------------------------------
+def _init_worker(converter_options: dict):
+    global _converter
+    # One process per core already; OpenCV's own threads would oversubscribe
+    cv2.setNumThreads(1)
+    _converter = _build_converter(**converter_options)
+
+
+def _build_converter(asset_directory: Path, gcode_directory: Path, cache_directory: Path,
+                     cache_max_size_in_bytes: int, settings_path: Path, **parameters) -> GCodeConverter:
+    grbl_settings = GrblSettings.from_export(settings_path)
+    return GCodeConverter(
+        asset_directory,
+        gcode_directory,
+        grbl_settings=grbl_settings,
+        cache=ArtifactCache(cache_directory, cache_max_size_in_bytes),
+        plot_time_estimator=PlotTimeEstimator(grbl_settings),
+        **parameters,
+    )
+
+
+def _convert_one(image_path: Path, write_svg: bool) -> BatchResult:
+    started = time.perf_counter()
+    try:
+        result = _converter.convert(image_path, write_svg)
+    except Exception as e:
+        return BatchResult(image_path, None, time.perf_counter() - started, False, {}, f"{type(e).__name__}: {e}")
+    return BatchResult(image_path, result.gcode_path, time.perf_counter() - started, result.cached, result.metadata)
+
+
+# -------------------------------
+# Public Functions
+# -------------------------------
+def convert_batch(image_paths: list, converter_options: dict, workers: int = None,
+                  write_svg: bool = False, on_result=None) -> list:
+    """
+    Convert images in parallel.
+
+    Images the cache already holds for the current settings are answered in
+    this process without starting a worker, which is what makes re-running
+    an interrupted batch resume where it stopped.
+
+    Args:
+        image_paths: Images to convert
+        converter_options: Keyword arguments for _build_converter
+        workers: Worker processes (default: one per CPU)
+        write_svg: Also write the optimized SVGs
+        on_result: Called in this process with every BatchResult as it completes
+
+    Returns:
+        BatchResults in the order of image_paths
+    """
+    global _converter
+    workers = workers or os.cpu_count() or 1
+    results = {}
+
+    def finish(result: BatchResult):
+        results[result.image_path] = result
+        if on_result is not None:
+            on_result(result)
+
+    _converter = _build_converter(**converter_options)
+    parameters = _converter.conversion_parameters
+
+    pending = []
+    for image_path in image_paths:
+        try:
+            cached = _converter.cache.get(ArtifactCache.key(image_path.read_bytes(), parameters)) is not None
+        except OSError:
+            cached = False
+        if cached:
+            finish(_convert_one(image_path, write_svg))
+        else:
+            pending.append(image_path)
+
+    if pending:
+        with ProcessPoolExecutor(max_workers=min(workers, len(pending)),
+                                 initializer=_init_worker, initargs=(converter_options,)) as pool:
+            futures = {pool.submit(_convert_one, image_path, write_svg): image_path for image_path in pending}
+            for future in as_completed(futures):
+                try:
+                    finish(future.result())
+                except Exception as e:
+                    # _convert_one catches conversion errors; this is the worker itself
+                    # dying (BrokenProcessPool) or its result failing to unpickle
+                    finish(BatchResult(futures[future], None, 0.0, False, {}, f"{type(e).__name__}: {e}"))
+
+    return [results[image_path] for image_path in image_paths]
+
+
+def _minutes(seconds: float) -> str:
+    return f"{int(seconds // 60)}m{seconds % 60:04.1f}s"
+
+
+def print_summary(results: list, wall_time: float):
+    print()
+    print(f"{'image':<32}{'status':>8}{'time s':>9}{'paths':>8}{'plot time':>12}")
+    for result in results:
+        status = "failed" if not result.ok else "cached" if result.cached else "ok"
+        plot_time = result.metadata.get("estimated_plot_time_in_seconds")
+        print(f"{result.image_path.name[:31]:<32}{status:>8}{result.seconds:>9.2f}"
+              f"{result.metadata.get('path_count', 0):>8}{_minutes(plot_time) if plot_time else '-':>12}")
+
+    converted = [r for r in results if r.ok and not r.cached]
+    failed = [r for r in results if not r.ok]
+    total_plot_time = sum(r.metadata.get("estimated_plot_time_in_seconds", 0.0) for r in results if r.ok)
+    print(f"\n✅ {len(converted)} converted, 💾 {sum(r.cached for r in results)} cached, "
+          f"❌ {len(failed)} failed in {wall_time:.1f}s "
+          f"(CPU {sum(r.seconds for r in converted):.1f}s). Total plot time {_minutes(total_plot_time)}")
+
+
+# -------------------------------
+# Standalone CLI Interface
+# -------------------------------
+if __name__ == "__main__":
+    from config.config import (
+        ARC_FIT_TOLERANCE_IN_MILLIMETERS, ASSET_DIR, CACHE_DIR, CACHE_MAX_SIZE_IN_BYTES, CANVAS_HEIGHT_IN_MILLIMETERS,
+        CANVAS_WIDTH_IN_MILLIMETERS, COMPACT_GCODE, CONFIG_DIR, FIRMWARE_SETTINGS_PATH, GCODE_DIR,
+        PEN_DOWN_GAP_IN_MILLIMETERS
+    )
+
+    parser = argparse.ArgumentParser(description="Convert many images to G-code in parallel.")
+    parser.add_argument("source", help="Directory of images or a glob pattern (quote it)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: one per CPU)")
+    parser.add_argument("--threshold", type=parse_threshold, default="otsu",
+                        help=f"Ink threshold: a level in 0-1 or one of {', '.join(THRESHOLD_METHODS)} (default: otsu)")
+    parser.add_argument("--speckle-size", type=float, default=0.5,
+                        help="Remove ink specks and holes smaller than this many mm square (default: 0.5)")
+    parser.add_argument("--full-resolution", action="store_true",
+                        help="Trace at the image's resolution instead of the plotter's step resolution")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Simplify tolerance in mm (default: 0.2)")
+    parser.add_argument("--pen-down-gap", type=float, default=PEN_DOWN_GAP_IN_MILLIMETERS,
+                        help=f"Bridge gaps below this many mm with the pen down (default: {PEN_DOWN_GAP_IN_MILLIMETERS})")
+    parser.add_argument("--arc-tolerance", type=float, default=ARC_FIT_TOLERANCE_IN_MILLIMETERS,
+                        help=f"Fit G2/G3 arcs within this many mm, e.g. 0.2; 0 disables "
+                             f"(default: {ARC_FIT_TOLERANCE_IN_MILLIMETERS or 'off'})")
+    parser.add_argument("--compact", action=argparse.BooleanOptionalAction, default=COMPACT_GCODE,
+                        help=f"Strip comments and redundant words, round to the step resolution (default: {COMPACT_GCODE})")
+    parser.add_argument("--tracer", default="auto", help="auto, potrace or opencv (default: auto)")
+    parser.add_argument("--svg", action="store_true", help="Also write the optimized SVGs to the asset directory")
+    args = parser.parse_args()
+
+    image_paths = find_images(args.source)
+    if not image_paths:
+        print(f"[!] No images found for {args.source}")
+        sys.exit(1)
+
+    options = dict(
+        asset_directory=ASSET_DIR,
+        gcode_directory=GCODE_DIR,
+        cache_directory=CACHE_DIR,
+        cache_max_size_in_bytes=CACHE_MAX_SIZE_IN_BYTES,
+        settings_path=FIRMWARE_SETTINGS_PATH,
+        canvas_width_in_millimeters=CANVAS_WIDTH_IN_MILLIMETERS,
+        canvas_height_in_millimeters=CANVAS_HEIGHT_IN_MILLIMETERS,
+        threshold=args.threshold,
+        speckle_size_in_millimeters=args.speckle_size,
+        downscale_to_plotter_resolution=not args.full_resolution,
+        simplify_tolerance_in_millimeters=args.tolerance,
+        tracer=args.tracer,
+        pen_down_gap_in_millimeters=args.pen_down_gap,
+        arc_tolerance_in_millimeters=args.arc_tolerance or None,
+        compact_gcode=args.compact,
+        vpype_config_path=CONFIG_DIR / "drawmate.toml",
+    )
+
+    def report(result: BatchResult):
+        if result.ok:
+            print(f"{'💾' if result.cached else '✅'} {result.image_path} → {result.gcode_path} ({result.seconds:.2f}s)")
+        else:
+            print(f"❌ {result.image_path}: {result.error}")
+
+    print(f"🖼️  Converting {len(image_paths)} image(s) with {args.workers or os.cpu_count()} worker(s)...")
+    started = time.perf_counter()
+    results = convert_batch(image_paths, options, args.workers, args.svg, on_result=report)
+    print_summary(results, time.perf_counter() - started)
+    sys.exit(0 if all(result.ok for result in results) else 1)
@@ -5,119 +5,536 @@ Streams a G-code file to a GRBL-controlled Arduino (CNC shield).
 
 Usage (standalone):
     python DrawMateStreamer.py /dev/ttyACM0 gcode/cat.gcode
+    python DrawMateStreamer.py /dev/ttyACM0 gcode/cat.gcode --mode send-wait
+    python DrawMateStreamer.py /dev/ttyACM0 gcode/cat.gcode gcode/bird.gcode
 
 Usage (imported):
     from DrawMateStreamer import DrawMateStreamer
     streamer = DrawMateStreamer("/dev/ttyACM0")
     streamer.stream_gcode("gcode/cat.gcode")
 
+Usage (lines from a generator, e.g. plotting while the converter still emits):
+    streamer.stream_gcode(gcode_converter.gcode_stream(Path("assets/bird.jpg")))
+
+Usage (persistent connection, several jobs without reconnecting or re-homing):
+    with DrawMateStreamer("/dev/ttyACM0") as streamer:
+        streamer.stream_gcode("gcode/cat.gcode")
+        streamer.stream_gcode("gcode/bird.gcode")
+
+Usage (home while the G-code is still being produced, then plot it):
+    lines = PrefetchedLines(gcode_converter.gcode_stream(Path("assets/bird.jpg")))  # Starts converting
+    with DrawMateStreamer("/dev/ttyACM0") as streamer:
+        streamer.home()              # The job's own $H is then skipped
+        streamer.stream_gcode(lines)
+
+Usage (compacted on the wire: no comments, redundant words or excess digits):
+    streamer = DrawMateStreamer("/dev/ttyACM0", compactor=GCodeCompactor.from_settings(settings))
+    python DrawMateStreamer.py /dev/ttyACM0 gcode/cat.gcode --compact
+
+Streaming modes:
+    char-count  Keeps GRBL's 127-byte serial RX buffer full by tracking the
+                size of every unacknowledged line (GRBL's stream.py protocol).
+                The planner never starves between segments.
+    send-wait   Sends one line and waits for its ack before the next.
+                Slow, but the safest fallback for debugging.
+
 Author: DrawMate Project
 """
 
+import argparse
+import queue
 import serial
+import threading
 import time
 import sys
+from collections import deque
 from pathlib import Path
+from typing import Iterable, Optional, Union
+
+from GCodeCompactor import GCodeCompactor
+
+# Size of GRBL 1.1's serial receive buffer (RX_BUFFER_SIZE in config.h)
+GRBL_RX_BUFFER_SIZE = 127
+
+STREAM_MODE_CHAR_COUNT = "char-count"
+STREAM_MODE_SEND_WAIT = "send-wait"
+STREAM_MODES = (STREAM_MODE_CHAR_COUNT, STREAM_MODE_SEND_WAIT)
+
+# Lines a generator source may run ahead of the serial link
+PREFETCH_LINES = 4096
+
+# Longest homing cycle ($H) to wait for: both axes seek, locate and pull off
+HOMING_TIMEOUT_IN_SECONDS = 60
+
+# Longest wait for GRBL to acknowledge the next line while lines are in flight:
+# covers a $H inside the job and a long slow move with the planner full
+ACK_TIMEOUT_IN_SECONDS = 90
+
+
+class GrblAlarmError(Exception):
+    """Raised when GRBL reports an ALARM and the stream has to be aborted."""
+
+
+class GrblHandshakeError(Exception):
+    """Raised when GRBL does not complete the connection handshake in time."""
+
+
+class GrblAckTimeoutError(TimeoutError):
+    """Raised when GRBL stops acknowledging streamed lines."""
+
+
+class PrefetchedLines:
+    """
+    Pulls lines from an iterable on a background thread, up to size lines ahead.
+
+    Serial reads release the GIL, so a generator source (e.g. the converter)
+    keeps emitting from the moment the stream is requested, through the
+    handshake and while the streamer waits for acks. Exceptions raised by the
+    source are re-raised to the consumer. Created ahead of stream_gcode (which
+    takes it as is), the source starts producing before the connection exists.
+    """
+
+    _DONE = object()
+
+    def __init__(self, lines: Iterable[str], size: int = PREFETCH_LINES):
+        self._lines = lines
+        self._buffer = queue.Queue(maxsize=size)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._produce, name="gcode-prefetch", daemon=True)
+        self._thread.start()
+
+    def _produce(self):
+        try:
+            for line in self._lines:
+                while not self._stop.is_set():
+                    try:
+                        self._buffer.put(line, timeout=0.1)
+                        break
+                    except queue.Full:
+                        continue
+                if self._stop.is_set():
+                    # Let the source clean up (e.g. discard a partial file)
+                    if hasattr(self._lines, "close"):
+                        self._lines.close()
+                    return
+            self._buffer.put(self._DONE)
+        except BaseException as e:
+            self._buffer.put(e)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        item = self._buffer.get()
+        if item is self._DONE:
+            self._buffer.put(item)
+            raise StopIteration
+        if isinstance(item, BaseException):
+            raise item
+        return item
+
+    def close(self):
+        self._stop.set()
+        # Unblock a producer waiting on a full buffer
+        while self._thread.is_alive():
+            try:
+                self._buffer.get_nowait()
+            except queue.Empty:
+                pass
+            self._thread.join(timeout=0.1)
 
 
 class DrawMateStreamer:
     """Handles serial communication and G-code streaming to GRBL."""
 
-    def __init__(self, port: str, baudrate: int = 115200, timeout: int = 1):
+    def __init__(self, port: str, baudrate: int = 115200, timeout: int = 1,
+                 mode: str = STREAM_MODE_CHAR_COUNT, handshake_timeout: float = 10,
+                 compactor: Optional[GCodeCompactor] = None,
+                 ack_timeout: float = ACK_TIMEOUT_IN_SECONDS):
+        if mode not in STREAM_MODES:
+            raise ValueError(f"Unknown stream mode '{mode}'. Expected one of {STREAM_MODES}.")
+
         self.port = port
         self.baudrate = baudrate
         self.timeout = timeout
+        self.mode = mode
+        self.handshake_timeout = handshake_timeout
+        self.compactor = compactor
+        self.ack_timeout = ack_timeout
+
+        self._grbl = None
+        self._homed = False
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
 
     # -------------------------------
     # Internal Helpers
     # -------------------------------
+    def _read_until(self, grbl, accept, what: str, timeout: Optional[float] = None) -> str:
+        """
+        Read GRBL responses until one satisfies accept() or the handshake times out.
+
+        Returns:
+            The accepted response line
+
+        Raises:
+            GrblHandshakeError: If GRBL answers with an error or nothing acceptable arrives in time
+        """
+        timeout = self.handshake_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            response = grbl.readline().decode(errors="ignore").strip()
+            if not response:
+                continue
+            if accept(response):
+                return response
+            if response.startswith("error:"):
+                raise GrblHandshakeError(f"GRBL answered {response} while waiting for {what}.")
+            print(f"💬 {response}")
+
+        raise GrblHandshakeError(f"Timed out after {timeout}s waiting for {what}.")
+
     def _connect(self):
         """Establish and initialize serial connection to GRBL."""
         print(f"📡 Connecting to GRBL on {self.port} at {self.baudrate} baud...")
 
         grbl = serial.Serial(self.port, self.baudrate, timeout=self.timeout)
-        time.sleep(1)
+        try:
+            grbl.reset_input_buffer()
 
-        # --- Soft reset (CTRL-X) ---
-        print("🔄 Sending soft reset (CTRL-X)...")
-        grbl.write(b"\x18")
-        time.sleep(2)
+            # --- Soft reset (CTRL-X) ---
+            # If opening the port auto-reset the Arduino, the bootloader swallows
+            # this byte and the power-on banner answers instead. Either way we
+            # continue as soon as a banner arrives.
+            print("🔄 Sending soft reset (CTRL-X)...")
+            grbl.write(b"\x18")
+            banner = self._read_until(grbl, lambda r: r.startswith("Grbl "), "the startup banner")
+            print(f"💬 Startup message: {banner}")
 
-        # Read startup message
-        startup = grbl.read_all().decode(errors="ignore").strip()
-        if startup:
-            print(f"💬 Startup message:\n{startup}\n")
+            # --- Unlock GRBL if alarmed ---
+            print("🔓 Unlocking GRBL ($X)...")
+            grbl.write(b"$X\n")
+            self._read_until(grbl, lambda r: r == "ok", "the $X acknowledgement")
 
-        # --- Unlock GRBL if alarmed ---
-        print("🔓 Unlocking GRBL ($X)...")
-        grbl.write(b"$X\n")
-        time.sleep(0.5)
-        grbl.flushInput()
+        except Exception:
+            grbl.close()
+            raise
 
         print("✅ GRBL ready.\n")
         return grbl
 
-
     def _send_line(self, grbl, line: str):
         grbl.write((line + "\n").encode())
         print(f"→ {line}")
 
-        # Read response safely
-        for _ in range(40):  # ~4 seconds
+        # Wall-clock deadline: each readline can block for the serial timeout
+        deadline = time.monotonic() + self.ack_timeout
+        while time.monotonic() < deadline:
             response = grbl.readline().decode().strip()
             if response:
                 print(f"   ← {response}")
                 return
 
-        print("   ⚠️ No response received (timeout).")
+        print(f"   ⚠️ No response received in {self.ack_timeout}s (timeout).")
+
+    @staticmethod
+    def _clean_lines(lines: Iterable[str]):
+        """Yield the streamable lines (no blanks or full-line comments)."""
+        for raw_line in lines:
+            line = raw_line.strip()
+            if not line or line.startswith(";"):
+                continue
+            yield line
+
+    def _stream_send_wait(self, grbl, lines):
+        """Send one line at a time and wait for its response before the next."""
+        for line in lines:
+            self._send_line(grbl, line)
+            time.sleep(0.05)
+
+    def _stream_character_counting(self, grbl, lines):
+        """
+        Stream using GRBL's character-counting protocol.
+
+        Every sent line stays in a pending queue with its byte count until GRBL
+        acknowledges it with 'ok' or 'error:N'. A new line is written only when
+        it fits into what is left of the RX buffer, so the buffer stays full and
+        the planner always has the next segment queued.
+
+        Returns:
+            List of (line_number, line, error) tuples for every rejected line
+
+        Raises:
+            GrblAlarmError: If GRBL enters an alarm state mid-stream
+            GrblAckTimeoutError: If no ack arrives for ack_timeout seconds while lines are in flight
+            ValueError: If a single line is larger than the RX buffer
+        """
+        pending = deque()  # (line_number, line, byte_count) awaiting an ack
+        buffered_bytes = 0
+        errors = []
+        acked = 0
+        last_ack = time.monotonic()
+
+        def handle_response() -> None:
+            nonlocal buffered_bytes, acked, last_ack
+
+            response = grbl.readline().decode(errors="ignore").strip()
+            if not response:
+                # Serial timeout: give up once GRBL has been silent for too long
+                if time.monotonic() - last_ack > self.ack_timeout:
+                    line_number, sent_line, _ = pending[0]
+                    raise GrblAckTimeoutError(
+                        f"No acknowledgement from GRBL for {self.ack_timeout}s "
+                        f"(waiting on line {line_number}: {sent_line})."
+                    )
+                return
+
+            if response == "ok" or response.startswith("error:"):
+                line_number, sent_line, byte_count = pending.popleft()
+                buffered_bytes -= byte_count
+                acked += 1
+                last_ack = time.monotonic()
+                if response != "ok":
+                    errors.append((line_number, sent_line, response))
+                    print(f"   ← {response} (line {line_number}: {sent_line})")
+            elif response.startswith("ALARM:"):
+                raise GrblAlarmError(f"GRBL {response} after {acked} acknowledged lines.")
+            else:
+                # Banners, [MSG:...] and other unsolicited feedback
+                print(f"   ← {response}")
+
+        for line_number, line in enumerate(lines, start=1):
+            payload = (line + "\n").encode()
+            if len(payload) > GRBL_RX_BUFFER_SIZE:
+                raise ValueError(
+                    f"Line {line_number} is {len(payload)} bytes, larger than GRBL's "
+                    f"{GRBL_RX_BUFFER_SIZE}-byte RX buffer: {line}"
+                )
+
+            # Wait for acks until the new line fits into the RX buffer
+            while buffered_bytes + len(payload) > GRBL_RX_BUFFER_SIZE:
+                handle_response()
 
+            if not pending:
+                # Nothing was in flight, so the silence so far (e.g. a slow source) doesn't count
+                last_ack = time.monotonic()
+            grbl.write(payload)
+            pending.append((line_number, line, len(payload)))
+            buffered_bytes += len(payload)
+            print(f"→ {line}")
+
+        # Drain the acks of everything still in flight
+        while pending:
+            handle_response()
+
+        return errors
 
     # -------------------------------
-    # Public Method
+    # Connection Lifecycle
     # -------------------------------
-    def stream_gcode(self, gcode_path: Path):
-        gcode_path = Path(gcode_path)
+    @property
+    def is_open(self) -> bool:
+        return self._grbl is not None and self._grbl.is_open
+
+    @property
+    def homed(self) -> bool:
+        """Whether the machine counts as homed on this connection (jobs then skip their $H)."""
+        return self._homed
+
+    @homed.setter
+    def homed(self, homed: bool):
+        # Set to skip homing (e.g. an emulator or a machine without switches),
+        # or clear it when something outside the streamer has reset GRBL
+        self._homed = homed
+
+    def open(self):
+        """Connect to GRBL, or reuse the connection that is already open."""
+        if not self.is_open:
+            self._grbl = self._connect()
+            self._homed = False
+        return self._grbl
+
+    def close(self):
+        """Close the serial connection if it is open."""
+        if self._grbl is not None:
+            self._grbl.close()
+            self._grbl = None
+        self._homed = False
+
+    def abort(self):
+        """
+        Stop the machine now: feed hold, then soft reset.
+
+        The reset discards every block GRBL still has buffered. A reset during
+        motion loses the machine position (GRBL raises ALARM:3), so the
+        machine has to be homed again before the next job.
+        """
+        if self.is_open:
+            self._grbl.write(b"!")
+            self._grbl.write(b"\x18")
+        self._homed = False
+
+    def home(self, timeout: float = HOMING_TIMEOUT_IN_SECONDS):
+        """
+        Run the homing cycle ($H) now, connecting first if needed.
 
-        if not gcode_path.exists():
-            print(f"[!] G-code file not found: {gcode_path}")
+        Jobs streamed afterwards on this connection skip their own $H, so
+        homing can happen while the G-code is still being prepared.
+
+        Raises:
+            GrblAlarmError: If the homing cycle fails (e.g. a limit switch isn't found)
+            GrblHandshakeError: If GRBL rejects $H (homing disabled) or doesn't finish in time
+        """
+        grbl = self.open()
+        if self._homed:
             return
+        print("🏠 Homing ($H)...")
+        grbl.write(b"$H\n")
+        response = self._read_until(grbl, lambda r: r == "ok" or r.startswith("ALARM:"),
+                                    "the end of the homing cycle", timeout)
+        if response.startswith("ALARM:"):
+            raise GrblAlarmError(f"GRBL raised {response} while homing.")
+        self._homed = True
+        print("✅ Homed.\n")
 
-        try:
-            grbl = self._connect()
-            print("🚀 Beginning G-code stream...\n")
+    # -------------------------------
+    # Line Preparation (shared with AsyncDrawMateStreamer)
+    # -------------------------------
+    @staticmethod
+    def read_gcode_lines(gcode_path: Path):
+        """Yield the streamable lines of a G-code file."""
+        with open(gcode_path, "r") as gfile:
+            yield from DrawMateStreamer._clean_lines(gfile)
 
-            with open(gcode_path, "r") as gfile:
-                for raw_line in gfile:
-                    line = raw_line.strip()
-                    if not line or line.startswith(";"):
-                        continue
+    def skip_repeat_homing(self, lines):
+        """Drop $H from jobs after the machine has been homed on this connection."""
+        for line in lines:
+            if line.upper() == "$H":
+                if self._homed:
+                    print("🏠 Already homed on this connection. Skipping $H.")
+                    continue
+                self._homed = True
+            yield line
+
+    # -------------------------------
+    # Public Method
+    # -------------------------------
+    def stream_gcode(self, gcode: Union[Path, str, Iterable[str]]) -> bool:
+        """
+        Stream a G-code file, or any iterable of G-code lines, to GRBL.
+
+        Lines from an iterable are pulled on a background thread while the
+        stream runs, so a generator can still be producing later paths while
+        the first ones are plotted. With a compactor, lines are compacted on
+        their way to the serial port and the bytes saved are reported.
 
-                    self._send_line(grbl, line)
-                    time.sleep(0.05)
+        A stream that doesn't reach its end closes the connection, even a
+        persistent one: GRBL may still be running (or acknowledging) lines of
+        the aborted job, so the next job reconnects to a reset GRBL instead.
+
+        Returns:
+            Whether every line was streamed and accepted by GRBL
+
+        Raises:
+            KeyboardInterrupt: After stopping the machine (see abort())
+        """
+        if isinstance(gcode, (str, Path)):
+            gcode_path = Path(gcode)
+            if not gcode_path.exists():
+                print(f"[!] G-code file not found: {gcode_path}")
+                return False
+            # Already cleaned while reading
+            source_lines = self.read_gcode_lines(gcode_path)
+            lines = source_lines
+        else:
+            # A PrefetchedLines may already be running, e.g. started while homing
+            source_lines = gcode if isinstance(gcode, PrefetchedLines) else PrefetchedLines(gcode)
+            lines = self._clean_lines(source_lines)
+
+        # Only a connection opened for this call is closed afterwards, unless the stream is aborted
+        persistent = self.is_open
+        finished = False
+
+        try:
+            grbl = self.open()
+            print(f"🚀 Beginning G-code stream ({self.mode})...\n")
+
+            if self.compactor is not None:
+                lines = self.compactor.compact_lines(lines, on_report=print)
+            lines = self.skip_repeat_homing(lines)
+            errors = []
+            if self.mode == STREAM_MODE_CHAR_COUNT:
+                errors = self._stream_character_counting(grbl, lines)
+                if errors:
+                    print(f"\n⚠️ GRBL rejected {len(errors)} line(s).")
+            else:
+                self._stream_send_wait(grbl, lines)
 
             print("\n✅ G-code stream finished.")
-            grbl.close()
+            finished = True
+            return not errors
 
+        except GrblAlarmError as e:
+            # GRBL needs to be homed again once it has been alarmed
+            self._homed = False
+            print(f"\n🚨 {e} Stream aborted.")
+        except GrblHandshakeError as e:
+            print(f"[!] GRBL handshake failed: {e}")
+        except GrblAckTimeoutError as e:
+            print(f"\n[!] {e} Stream aborted.")
         except serial.SerialException as e:
             print(f"[!] Serial connection error: {e}")
         except KeyboardInterrupt:
-            print("\n⚠️ Interrupted by user.")
+            print("\n⚠️ Interrupted by user. Stopping the plotter (feed hold, soft reset).")
+            self.abort()
+            raise
         except Exception as e:
             print(f"[!] Unexpected error: {e}")
-
+        finally:
+            source_lines.close()
+            if not (persistent and finished):
+                self.close()
+        return False
 
 
 # -------------------------------
 # Standalone CLI Interface
 # -------------------------------
 if __name__ == "__main__":
-    if len(sys.argv) < 3:
-        print("Usage: python DrawMateStreamer.py <serial_port> <gcode_path>")
-        print("Example: python DrawMateStreamer.py /dev/ttyACM0 gcode/cat.gcode")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(description="Stream a G-code file to GRBL.")
+    parser.add_argument("port", help="Serial port (e.g. /dev/ttyACM0)")
+    parser.add_argument("gcode_paths", type=Path, nargs="+",
+                        help="G-code file(s) to stream over a single connection")
+    parser.add_argument(
+        "--mode",
+        choices=STREAM_MODES,
+        default=STREAM_MODE_CHAR_COUNT,
+        help="Streaming protocol (default: char-count; send-wait is the safe fallback)"
+    )
+    parser.add_argument("--compact", action="store_true",
+                        help="Strip comments and redundant words and round to the machine's step resolution")
+    parser.add_argument("--settings", type=Path, default=None,
+                        help="Firmware settings export for --compact (default: config FIRMWARE_SETTINGS_PATH)")
+    args = parser.parse_args()
 
-    port = sys.argv[1]
-    gcode_path = Path(sys.argv[2])
+    compactor = None
+    if args.compact:
+        from GrblSettings import GrblSettings
+        from config.config import FIRMWARE_SETTINGS_PATH
+        compactor = GCodeCompactor.from_settings(GrblSettings.from_export(args.settings or FIRMWARE_SETTINGS_PATH))
 
-    streamer = DrawMateStreamer(port)
-    streamer.stream_gcode(gcode_path)
+    try:
+        with DrawMateStreamer(args.port, mode=args.mode, compactor=compactor) as streamer:
+            results = [streamer.stream_gcode(gcode_path) for gcode_path in args.gcode_paths]
+        if not all(results):
+            sys.exit(1)
+    except (GrblHandshakeError, serial.SerialException) as e:
+        print(f"[!] Could not connect to GRBL: {e}")
+        sys.exit(1)
+    except KeyboardInterrupt:
+        sys.exit(130)
@@ -0,0 +1,282 @@
+"""
+DrawMate G-code Compactor
+-------------------------
+Shrinks G-code before it goes over the 115200-baud link into GRBL's 127-byte
+receive buffer, without changing what the machine does:
+
+    - comments (inline ';' and '(...)') and whitespace are stripped
+    - modal words that are already in effect (G0/G1, G90, G21, F...) are dropped
+    - axis words that don't move the axis are dropped, and lines left with
+      nothing to do (e.g. a repeated 'G0 Z9') are skipped
+    - coordinates are rounded to the machine's resolution: the fewest decimals
+      whose rounding error stays below max_step_error steps of $100-$102
+    - numbers lose trailing zeros and leading zeros ('0.50' → '.5'), which
+      GRBL's number parser accepts
+
+Arc endpoints are rounded too; the IJ center is then moved onto the
+perpendicular bisector of the rounded endpoints, so GRBL never rejects an arc
+for a start/end radius mismatch (error:33).
+
+Only what is known to be in effect is omitted: every job starts from an
+unknown modal state, and positions are forgotten after '$' commands (e.g. $H)
+and non-modal commands such as G28 or G92. Coordinates are only rounded in
+absolute millimeter mode (G90 G21) once the program has set it.
+
+Usage (standalone):
+    python GCodeCompactor.py gcode/cat.gcode -o gcode/cat-compact.gcode
+
+Usage (imported):
+    compactor = GCodeCompactor.from_settings(GrblSettings.from_export(FIRMWARE_SETTINGS_PATH))
+    for line in compactor.compact_lines(lines, on_report=print):
+        ...
+
+Author: DrawMate Project
+"""
+
+import argparse
+import math
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Iterator
+
+import numpy as np
+
+from GrblSettings import GrblSettings
+
+COMMENT_PATTERN = re.compile(r"\(.*?\)|;.*")
+WORD_PATTERN = re.compile(r"([A-Z])([-+]?(?:\d+\.?\d*|\.\d+))")
+
+AXES = "XYZ"
+
+# Modal group of every modal G code GRBL 1.1 supports
+MODAL_GROUPS = {
+    0: "motion", 1: "motion", 2: "motion", 3: "motion", 38.2: "motion", 80: "motion",
+    17: "plane", 18: "plane", 19: "plane",
+    20: "units", 21: "units",
+    90: "distance", 91: "distance",
+    93: "feed_rate_mode", 94: "feed_rate_mode",
+    54: "coordinate_system", 55: "coordinate_system", 56: "coordinate_system",
+    57: "coordinate_system", 58: "coordinate_system", 59: "coordinate_system",
+}
+# Non-modal commands whose axis words aren't plain targets, or that move the machine
+NON_MODAL_G_CODES = {10, 28, 28.1, 30, 30.1, 53, 92, 92.1}
+
+
+@dataclass(frozen=True)
+class CompactionReport:
+    """G-code lines and bytes (newlines included) before and after compaction."""
+
+    lines_before: int
+    lines_after: int
+    bytes_before: int
+    bytes_after: int
+
+    @property
+    def bytes_saved(self) -> int:
+        return self.bytes_before - self.bytes_after
+
+    @property
+    def reduction(self) -> float:
+        return self.bytes_saved / self.bytes_before if self.bytes_before else 0.0
+
+    def __str__(self) -> str:
+        return (f"📦 G-code compacted: {self.bytes_before} → {self.bytes_after} bytes "
+                f"({self.bytes_saved} saved, -{self.reduction:.0%}), "
+                f"lines {self.lines_before} → {self.lines_after}")
+
+
+def decimals_for_resolution(resolution: float, max_step_error: float = 0.05) -> int:
+    """Fewest decimals whose rounding error (half a unit) is at most max_step_error steps."""
+    return max(0, math.ceil(-math.log10(2.0 * max_step_error * resolution) - 1e-9))
+
+
+def format_number(value: float, decimals: int) -> str:
+    """Shortest text of value rounded to decimals, e.g. 0.50 → '.5', -0.0 → '0', 10.0 → '10'."""
+    text = f"{round(value, decimals) + 0.0:.{decimals}f}"
+    if "." in text:
+        text = text.rstrip("0").rstrip(".")
+    if text.startswith("0."):
+        text = text[1:]
+    elif text.startswith("-0."):
+        text = "-" + text[2:]
+    return text or "0"
+
+
+class GCodeCompactor:
+    """Lossless (to within a fraction of a motor step) G-code compaction."""
+
+    def __init__(self,
+                 resolution: tuple = (1 / 4.702, 1 / 5.201, 1 / 3.180),
+                 max_step_error: float = 0.05,
+                 arc_center_decimals: int = 3):
+        """
+        Args:
+            resolution: (x, y, z) distance of one motor step in mm
+            max_step_error: Largest rounding error of a coordinate, in steps
+            arc_center_decimals: Decimals of I and J, fine enough for GRBL's
+                0.005 mm arc radius check
+        """
+        self.resolution = tuple(resolution)
+        self.max_step_error = max_step_error
+        self.decimals = tuple(decimals_for_resolution(r, max_step_error) for r in self.resolution)
+        self.arc_center_decimals = arc_center_decimals
+
+    @classmethod
+    def from_settings(cls, settings: GrblSettings, max_step_error: float = 0.05) -> "GCodeCompactor":
+        """Compactor for the step size ($100-$102) of the given firmware settings."""
+        return cls(settings.resolution_in_mm, max_step_error)
+
+    # -------------------------------
+    # Internal Helpers
+    # -------------------------------
+    def _arc_center(self, start: list, source_start: list, end: list, offset: list) -> list:
+        """IJ offset from the rounded start to the source center, moved onto the rounded chord's bisector."""
+        center = np.array(source_start[:2]) + offset
+        start, end = np.array(start[:2]), np.array(end[:2])
+        chord = end - start
+        length = np.hypot(*chord)
+        if length > 0:
+            normal = np.array([-chord[1], chord[0]]) / length
+            midpoint = 0.5 * (start + end)
+            center = midpoint + ((center - midpoint) @ normal) * normal
+        return list(center - start)
+
+    def _compact_line(self, line: str, state: dict) -> str:
+        """Compacted text of one line ('' when nothing is left to send), updating state."""
+        code = "".join(COMMENT_PATTERN.sub("", line).split()).upper()
+        if not code:
+            return ""
+        if code[0] in "$%":
+            # System commands such as $H move the machine or change settings
+            state["position"] = [None] * 3
+            state["source_position"] = [None] * 3
+            return code
+
+        words = WORD_PATTERN.findall(code)
+        if "".join(letter + value for letter, value in words) != code:
+            return code  # Let GRBL report what it can't parse
+
+        g_codes = [float(value) for letter, value in words if letter == "G"]
+        if any(g in NON_MODAL_G_CODES for g in g_codes):
+            state["modal"].clear()
+            state["position"] = [None] * 3
+            state["source_position"] = [None] * 3
+            return code
+
+        modal = state["modal"]
+        line_modal = {MODAL_GROUPS[g]: g for g in g_codes if g in MODAL_GROUPS}
+        effective = {**modal, **line_modal}
+        motion = effective.get("motion")
+        # Rounding and omitting axes is only safe where targets are absolute millimeters
+        rounding = effective.get("distance") == 90 and effective.get("units") == 21
+        arc = motion in (2, 3)
+        if arc and (effective.get("plane") != 17 or "R" in code
+                    or None in state["position"][:2] or None in state["source_position"][:2]):
+            rounding = False
+
+        position, source_position = state["position"], state["source_position"]
+        target, source_target = list(position), list(source_position)
+        offset = [0.0, 0.0]
+        compacted = []
+        for letter, value in words:
+            if letter == "G":
+                g = float(value)
+                group = MODAL_GROUPS.get(g)
+                if group is not None and modal.get(group) == g:
+                    continue
+                compacted.append(("G", value.lstrip("0") or "0" if "." not in value else value))
+            elif letter == "F":
+                if state["feed"] == float(value):
+                    continue
+                state["feed"] = float(value)
+                compacted.append(("F", format_number(float(value), 6)))
+            elif letter in AXES:
+                axis = AXES.index(letter)
+                if not rounding:
+                    target[axis] = source_target[axis] = None
+                    compacted.append((letter, value))
+                    continue
+                source_target[axis] = float(value)
+                text = format_number(float(value), self.decimals[axis])
+                target[axis] = float(text)
+                compacted.append((letter, text))
+            elif letter in "IJ" and rounding and arc:
+                offset["IJ".index(letter)] = float(value)
+            else:
+                compacted.append((letter, value))
+
+        if rounding:
+            # Drop axis words that don't move the axis (arcs keep theirs: GRBL requires them)
+            compacted = [
+                (letter, value) for letter, value in compacted
+                if letter not in AXES or arc or target[AXES.index(letter)] != position[AXES.index(letter)]
+            ]
+            if arc:
+                center = self._arc_center(position, source_position, target, offset)
+                compacted += [("I", format_number(center[0], self.arc_center_decimals)),
+                              ("J", format_number(center[1], self.arc_center_decimals))]
+
+        if all(letter == "G" and MODAL_GROUPS.get(float(value)) == "motion" for letter, value in compacted):
+            # Nothing to send but (maybe) a motion mode without a move: skip it and keep
+            # the mode GRBL actually has, so the next move states its own
+            line_modal.pop("motion", None)
+            modal.update(line_modal)
+            return ""
+
+        modal.update(line_modal)
+        state["position"], state["source_position"] = target, source_target
+        return "".join(letter + value for letter, value in compacted)
+
+    # -------------------------------
+    # Public Methods
+    # -------------------------------
+    def compact_lines(self, lines: Iterable[str], on_report=None) -> Iterator[str]:
+        """
+        Yield the compacted G-code lines, skipping lines left empty.
+
+        Args:
+            lines: G-code lines without newlines
+            on_report: Called with a CompactionReport once every line is out
+        """
+        state = {"modal": {}, "feed": None, "position": [None] * 3, "source_position": [None] * 3}
+        lines_before = lines_after = bytes_before = bytes_after = 0
+        for line in lines:
+            lines_before += 1
+            bytes_before += len(line) + 1
+            compacted = self._compact_line(line, state)
+            if not compacted:
+                continue
+            lines_after += 1
+            bytes_after += len(compacted) + 1
+            yield compacted
+
+        if on_report is not None:
+            on_report(CompactionReport(lines_before, lines_after, bytes_before, bytes_after))
+
+
+# -------------------------------
+# Standalone CLI Interface
+# -------------------------------
+if __name__ == "__main__":
+    from config.config import FIRMWARE_SETTINGS_PATH
+
+    parser = argparse.ArgumentParser(description="Compact a G-code file for streaming to GRBL.")
+    parser.add_argument("gcode_path", type=Path, help="G-code file to compact")
+    parser.add_argument("-o", "--output", type=Path, default=None,
+                        help="Output file (default: <name>-compact.gcode next to the input)")
+    parser.add_argument("--max-step-error", type=float, default=0.05,
+                        help="Largest coordinate rounding error in motor steps (default: 0.05)")
+    parser.add_argument("--settings", type=Path, default=FIRMWARE_SETTINGS_PATH,
+                        help="Firmware settings export to read $100-$102 from")
+    args = parser.parse_args()
+
+    if not args.gcode_path.exists():
+        raise FileNotFoundError(f"G-code file {args.gcode_path} does not exist.")
+    output_path = args.output or args.gcode_path.with_name(f"{args.gcode_path.stem}-compact.gcode")
+
+    compactor = GCodeCompactor.from_settings(GrblSettings.from_export(args.settings), args.max_step_error)
+    with open(args.gcode_path, "r") as source, open(output_path, "w") as target:
+        for compacted_line in compactor.compact_lines((line.rstrip("\n") for line in source), on_report=print):
+            target.write(compacted_line + "\n")
+    print(f"✅ Compacted G-code saved: {output_path}")
@@ -2,10 +2,46 @@
 DrawMate: Image to GRBL G-code Pipeline
 
 Converts raster images to optimized G-code for pen plotters using GRBL.
-Uses ImageMagick for preprocessing, Potrace for vectorization, and vpype for optimization.
+Uses OpenCV for preprocessing, Potrace for vectorization, and vpype for optimization.
+
+raster_to_gcode runs the same pipeline in-process (Vectorizer, the vpype API
+and GCodeWriter) without spawning convert, potrace or vpype, and without
+SVG files on disk unless asked for.
 """
+import os
+import shutil
 import subprocess
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Iterator, Optional, Union
+
+import numpy as np
+import vpype as vp
+import vpype_cli
+
+from ArcFitter import ArcFitReport, ArcFitter
+from ArtifactCache import ArtifactCache
+from GCodeCompactor import CompactionReport, GCodeCompactor
+from GCodeWriter import GCodeWriter
+from GrblSettings import GrblSettings
+from PathCollection import PathCollection
+from PathOptimizer import OrderingReport, PathOptimizer
+from PenLiftOptimizer import PenLiftOptimizer, PenLiftReport
+from PlotTimeEstimator import PlotTimeEstimator
+from Vectorizer import encode_pbm, load_grayscale, preprocess_bitmap, resolve_tracer, trace_bitmap
+
+# potrace writes SVG in points, one point per bitmap pixel; vpype works in CSS pixels
+CSS_PIXELS_PER_POINT = 96 / 72
+
+
+@dataclass(frozen=True)
+class ConversionResult:
+    """Outputs of GCodeConverter.convert."""
+
+    gcode_path: Path
+    svg_path: Optional[Path]
+    metadata: dict   # path_count, segment_count, pen_down_length_in_millimeters, estimated_plot_time_in_seconds, pen_lifts
+    cached: bool
 
 
 class GCodeConverter:
@@ -13,7 +49,7 @@ class GCodeConverter:
     Converts raster images to GRBL-compatible G-code for pen plotters.
 
     The conversion pipeline:
-    1. Raster image → Bitmap (ImageMagick)
+    1. Raster image → Bitmap (OpenCV: downscale, threshold, despeckle)
     2. Bitmap → SVG (Potrace)
     3. SVG → Optimized SVG (vpype)
     4. SVG → G-code (vpype-gcode)
@@ -23,11 +59,48 @@ class GCodeConverter:
                  asset_directory: Path,
                  gcode_directory: Path,
                  canvas_width_in_millimeters: float,
-                 canvas_height_in_millimeters: float
+                 canvas_height_in_millimeters: float,
+                 threshold: Union[float, str] = "otsu",
+                 simplify_tolerance_in_millimeters: float = 0.2,
+                 margin_in_millimeters: float = 3.0,
+                 tracer: str = "auto",
+                 speckle_size_in_millimeters: float = 0.5,
+                 downscale_to_plotter_resolution: bool = True,
+                 vpype_config_path: Path = Path("./config/drawmate.toml"),
+                 gwrite_profile: str = "drawmate",
+                 path_order_time_budget_in_seconds: float = 1.0,
+                 pen_down_gap_in_millimeters: float = 0.5,
+                 arc_tolerance_in_millimeters: Optional[float] = None,
+                 compact_gcode: bool = False,
+                 grbl_settings: GrblSettings = GrblSettings(),
+                 cache: Optional[ArtifactCache] = None,
+                 plot_time_estimator: Optional[PlotTimeEstimator] = None
                  ):
         self.canvas_width_in_millimeters = canvas_width_in_millimeters
         self.canvas_height_in_millimeters = canvas_height_in_millimeters
 
+        self.threshold = threshold
+        self.simplify_tolerance_in_millimeters = simplify_tolerance_in_millimeters
+        self.margin_in_millimeters = margin_in_millimeters
+        self.tracer = tracer
+        self.speckle_size_in_millimeters = speckle_size_in_millimeters
+        # One pixel per motor step at most; finer detail can't be drawn anyway
+        self.pixels_per_millimeter = max(grbl_settings.steps_per_mm[:2]) if downscale_to_plotter_resolution else None
+        self.vpype_config_path = vpype_config_path
+        self.gwrite_profile = gwrite_profile
+        self.path_optimizer = PathOptimizer(path_order_time_budget_in_seconds)
+        self.pen_lift_optimizer = PenLiftOptimizer.from_settings(grbl_settings, pen_down_gap_in_millimeters)
+        # Optional: G2/G3 arcs in place of G1 runs (None keeps plain polylines)
+        self.arc_fitter = (ArcFitter.from_settings(grbl_settings, arc_tolerance_in_millimeters)
+                           if arc_tolerance_in_millimeters else None)
+        # Optional: strip comments and redundant words, round to the step resolution
+        self.gcode_compactor = GCodeCompactor.from_settings(grbl_settings) if compact_gcode else None
+        self._gcode_writer = None
+
+        # In-process pipeline only: reuse earlier results, record plot time estimates
+        self.cache = cache
+        self.plot_time_estimator = plot_time_estimator or PlotTimeEstimator(grbl_settings)
+
         self.asset_directory = asset_directory
         self.gcode_directory = gcode_directory
         self.gcode_directory.mkdir(exist_ok=True)
@@ -51,24 +124,16 @@ class GCodeConverter:
 
         output_svg_path = self.asset_directory / f"{input_image_path.stem}.svg"
 
-        # Convert to bitmap and trace to SVG
+        # Preprocess in memory and pipe a packed bitmap to potrace
         try:
-            bitmap_process = subprocess.Popen(
-                ["convert", str(input_image_path), "-threshold", "50%", "bmp:-"],
-                stdout=subprocess.PIPE
-            )
-
             subprocess.run(
                 ["potrace", "-s", "-o", str(output_svg_path), "-"],
-                stdin=bitmap_process.stdout,
+                input=encode_pbm(self.preprocess(load_grayscale(input_image_path))),
                 check=True,
-                capture_output=True
+                capture_output=True,
+                timeout=30
             )
-            bitmap_process.wait(timeout=30)
 
-        except subprocess.TimeoutExpired:
-            bitmap_process.kill()
-            raise
         except subprocess.CalledProcessError:
             raise
 
@@ -77,10 +142,10 @@ class GCodeConverter:
             subprocess.run([
                 "vpype",
                 "read", str(output_svg_path),
-                "linesimplify", "--tolerance", "0.2mm",
+                "linesimplify", "--tolerance", f"{self.simplify_tolerance_in_millimeters}mm",
                 "linemerge",
                 "linesort",
-                "layout", "-m 3mm", "--landscape", f"{self.canvas_width_in_millimeters}x{self.canvas_height_in_millimeters}mm",
+                "layout", f"-m {self.margin_in_millimeters}mm", "--landscape", f"{self.canvas_width_in_millimeters}x{self.canvas_height_in_millimeters}mm",
                 "write", str(output_svg_path),
             ], check=True, capture_output=True, text=True
             )
@@ -113,10 +178,10 @@ class GCodeConverter:
         try:
             subprocess.run([
                 "vpype",
-                "--config", str(Path("./config/drawmate.toml")),
+                "--config", str(self.vpype_config_path),
                 "read", str(input_svg_path),
                 "gwrite",
-                "--profile", "drawmate",
+                "--profile", self.gwrite_profile,
                 str(output_gcode_path),
             ], check=True, capture_output=True, text=True
             )
@@ -126,3 +191,379 @@ class GCodeConverter:
 
         except subprocess.CalledProcessError:
             raise
+
+    # -------------------------------
+    # In-Process Pipeline
+    # -------------------------------
+    @property
+    def gcode_writer(self) -> GCodeWriter:
+        if self._gcode_writer is None:
+            self._gcode_writer = GCodeWriter.from_config(self.vpype_config_path, self.gwrite_profile)
+        return self._gcode_writer
+
+    def pen_origin(self, document: vp.Document) -> tuple:
+        """Where the pen starts (machine X0 Y0) in the document's coordinates."""
+        if self.gcode_writer.profile.get("vertical_flip", False) and document.page_size is not None:
+            return 0.0, document.page_size[1]
+        return 0.0, 0.0
+
+    def preprocess(self, gray: np.ndarray) -> np.ndarray:
+        """
+        Ink mask of a grayscale image, ready to trace.
+
+        The image is shrunk until a pixel covers at least one motor step once
+        laid out on the canvas, and speckles smaller than
+        speckle_size_in_millimeters (square) are removed.
+        """
+        page_width = max(self.canvas_width_in_millimeters, self.canvas_height_in_millimeters)
+        page_height = min(self.canvas_width_in_millimeters, self.canvas_height_in_millimeters)
+        page_width -= 2 * self.margin_in_millimeters
+        page_height -= 2 * self.margin_in_millimeters
+
+        max_size = None
+        if self.pixels_per_millimeter:
+            max_size = (int(page_width * self.pixels_per_millimeter), int(page_height * self.pixels_per_millimeter))
+            height, width = gray.shape[:2]
+            scale = min(max_size[0] / width, max_size[1] / height, 1.0)
+            height, width = height * scale, width * scale
+        else:
+            height, width = gray.shape[:2]
+
+        # layout fits the drawing to the page: millimeters per pixel of the (downscaled) image
+        millimeters_per_pixel = min(page_width / width, page_height / height)
+        speckle_area = int((self.speckle_size_in_millimeters / millimeters_per_pixel) ** 2)
+        return preprocess_bitmap(gray, self.threshold, max_size, speckle_area)
+
+    def _layout(self, image) -> tuple:
+        """
+        Preprocess and trace an image, and lay the outlines out on the canvas.
+
+        vpype's layout is a uniform scale plus a translation, so it is run on
+        the two corners of the traced bounds and the same transform is
+        applied to every outline.
+
+        Returns:
+            (document, paths, scale): a vpype Document without lines but with
+            the page size set, the traced paths laid out on it (in traced
+            order), and the layout's scale factor
+        """
+        ink = self.preprocess(load_grayscale(image))
+        outlines = trace_bitmap(ink, self.tracer).scaled(CSS_PIXELS_PER_POINT, CSS_PIXELS_PER_POINT)
+        corners = (outlines.coords.min(axis=0), outlines.coords.max(axis=0)) if len(outlines) else ((0, 0), (0, 0))
+        corners = np.array([complex(x, y) for x, y in corners])
+
+        laid_out = vpype_cli.execute(
+            f"layout -m {self.margin_in_millimeters}mm --landscape "
+            f"{self.canvas_width_in_millimeters}x{self.canvas_height_in_millimeters}mm",
+            document=vp.Document(vp.LineCollection([corners])),
+        )
+        moved = laid_out.layers[1][0]
+        scale = abs(moved[1] - moved[0]) / abs(corners[1] - corners[0]) if corners[1] != corners[0] else 1.0
+        shift = moved[0] - scale * corners[0]
+
+        paths = outlines.scaled(scale, scale).translated(shift.real, shift.imag)
+        return vp.Document(metadata=laid_out.metadata), paths, scale
+
+    def _iter_drawing_chunks(self, document: vp.Document, paths: PathCollection, layout_scale: float,
+                             order_paths: bool, optimize_pen_lifts: bool, reports: dict) -> Iterator[PathCollection]:
+        """
+        The laid-out paths in drawing order, chunk by chunk: ordered, simplified and pen-lift optimized.
+
+        With ordering, the first chunk is ready once the greedy tour and its
+        first window are done; simplification and the pen-lift pass run per
+        chunk. vpype's linemerge isn't run: ordering (which may reverse a
+        path) followed by pen-down bridging joins paths whose ends meet.
+        The OrderingReport and PenLiftReport land in reports once the last
+        chunk is out.
+        """
+        millimeter = vp.convert_length("mm")
+        if order_paths:
+            chunks = self.path_optimizer.optimize_chunks(
+                paths, self.pen_origin(document), on_report=lambda report: reports.update(ordering=report))
+        else:
+            chunks = [paths]
+        # The tolerance applies to the traced image, as with linesimplify before layout. Douglas-Peucker
+        # keeps first and last points, so entries, exits and seams stay put.
+        tolerance = self.simplify_tolerance_in_millimeters * millimeter * layout_scale
+        chunks = (chunk.simplified(tolerance) for chunk in chunks)
+        if optimize_pen_lifts:
+            chunks = self.pen_lift_optimizer.optimize_chunks(
+                chunks, scale=millimeter, on_report=lambda report: reports.update(pen_lifts=report))
+        yield from chunks
+
+    def _vectorize(self, image, order_paths: bool = True, optimize_pen_lifts: bool = True) -> tuple:
+        """vectorize(), also returning the OrderingReport and PenLiftReport (None when skipped)."""
+        document, paths, layout_scale = self._layout(image)
+        reports = {}
+        drawing = PathCollection.concatenate(
+            self._iter_drawing_chunks(document, paths, layout_scale, order_paths, optimize_pen_lifts, reports))
+        if len(drawing):
+            document.add(vp.LineCollection(drawing.to_complex()), 1)
+        return document, reports.get("ordering"), reports.get("pen_lifts")
+
+    def vectorize(self, image, order_paths: bool = True, optimize_pen_lifts: bool = True) -> vp.Document:
+        """
+        Trace and optimize an image into a vpype Document laid out on the canvas.
+
+        Same steps as raster_to_svg (preprocess, trace, layout, simplify), all
+        in memory, with PathOptimizer's travel-minimizing order in place of
+        linesort and a PenLiftOptimizer pass for emission.
+
+        Args:
+            image: Path to a raster image, or a BGR/grayscale NumPy array
+            order_paths: Reorder the paths to minimize pen-up travel
+            optimize_pen_lifts: Bridge small gaps with the pen down and drop sub-step/collinear points
+        """
+        return self._vectorize(image, order_paths, optimize_pen_lifts)[0]
+
+    @property
+    def conversion_parameters(self) -> dict:
+        """Every setting that changes the in-process output (part of the cache key)."""
+        return {
+            "threshold": self.threshold,
+            "simplify_tolerance_in_millimeters": self.simplify_tolerance_in_millimeters,
+            "margin_in_millimeters": self.margin_in_millimeters,
+            "canvas_in_millimeters": [self.canvas_width_in_millimeters, self.canvas_height_in_millimeters],
+            # What "auto" runs depends on the installed packages
+            "tracer": resolve_tracer(self.tracer),
+            "speckle_size_in_millimeters": self.speckle_size_in_millimeters,
+            "pixels_per_millimeter": self.pixels_per_millimeter,
+            "path_order_time_budget_in_seconds": self.path_optimizer.time_budget_in_seconds,
+            "pen_down_gap_in_millimeters": self.pen_lift_optimizer.gap_tolerance,
+            "resolution_in_millimeters": self.pen_lift_optimizer.resolution.tolist(),
+            "arc_fit_tolerance_in_millimeters": self.arc_fitter.tolerance if self.arc_fitter else None,
+            "compaction_decimals": self.gcode_compactor.decimals if self.gcode_compactor else None,
+            "gwrite_profile": self.gwrite_profile,
+            "gwrite_templates": self.gcode_writer.profile,
+            # Stored as estimated_plot_time_in_seconds
+            "plot_time_settings": self.plot_time_estimator.settings,
+        }
+
+    def _document_metadata(self, document: vp.Document, gcode_path: Path,
+                           ordering: Optional[OrderingReport], pen_lifts: Optional[PenLiftReport],
+                           arcs: Optional[ArcFitReport] = None,
+                           compaction: Optional[CompactionReport] = None) -> dict:
+        millimeter = vp.convert_length("mm")
+        metadata = {
+            "path_count": sum(len(layer) for layer in document.layers.values()),
+            "segment_count": int(document.segment_count()),
+            "pen_down_length_in_millimeters": float(document.length()) / millimeter,
+        }
+        if ordering is not None:
+            metadata["pen_up_travel_with_linesort_in_millimeters"] = ordering.travel_linesort / millimeter
+            metadata["pen_up_travel_in_millimeters"] = ordering.travel_after / millimeter
+        if pen_lifts is not None:
+            metadata["paths_before_pen_lift_pass"] = pen_lifts.paths_before
+            metadata["g1_lines_before_pen_lift_pass"] = pen_lifts.g1_lines_before
+            metadata["g1_lines"] = pen_lifts.g1_lines_after
+        if arcs is not None:
+            metadata["arc_count"] = arcs.arcs
+            metadata["gcode_lines_before_arc_fitting"] = arcs.lines_before
+            metadata["gcode_bytes_before_arc_fitting"] = arcs.bytes_before
+        if compaction is not None:
+            metadata["gcode_bytes_before_compaction"] = compaction.bytes_before
+            metadata["gcode_bytes_saved_by_compaction"] = compaction.bytes_saved
+        with open(gcode_path, "rb") as gfile:
+            content = gfile.read()
+        metadata["gcode_lines"] = content.count(b"\n")
+        metadata["gcode_bytes"] = len(content)
+        estimate = self.plot_time_estimator.estimate(gcode_path)
+        metadata["estimated_plot_time_in_seconds"] = estimate.total_time
+        # Counted in the emitted G-code, after templates, arc fitting and compaction
+        metadata["pen_lifts"] = estimate.pen_lifts
+        return metadata
+
+    def _link_output(self, cached_path: Path, output_path: Path):
+        """Expose a cached file under the gcode/asset directory without copying when possible."""
+        if output_path.exists():
+            return
+        try:
+            os.link(cached_path, output_path)
+        except FileExistsError:
+            pass
+        except OSError:
+            shutil.copyfile(cached_path, output_path)
+
+    def _generate_lines(self, image: Union[Path, bytes], name: str, write_svg: bool, on_result) -> Iterator[str]:
+        """
+        Yield the G-code lines of an image, teeing them to the output file.
+
+        Lines come straight from the cache on a hit. Otherwise the image is
+        traced and laid out, the start template is emitted, and the paths
+        follow chunk by chunk as PathOptimizer orders them (see
+        _iter_drawing_chunks), so the first strokes can be plotted while
+        later paths are still being ordered and simplified. Everything goes
+        into a staging file that is only published (cache entry, gcode/ link)
+        once the last line is out. on_result receives the ConversionResult at
+        the end.
+        """
+        if isinstance(image, (bytes, bytearray)):
+            image_bytes = bytes(image)
+        elif not image.exists():
+            raise FileNotFoundError(f"Image file {image} does not exist.")
+        else:
+            image_bytes = image.read_bytes()
+
+        key = ArtifactCache.key(image_bytes, self.conversion_parameters)
+        output_name = f"{name}-{key[:12]}"
+        output_gcode_path = self.gcode_directory / f"{output_name}.gcode"
+        output_svg_path = self.asset_directory / f"{output_name}.svg"
+
+        artifact = self.cache.get(key) if self.cache is not None else None
+        if artifact is not None:
+            self._link_output(artifact.gcode_path, output_gcode_path)
+            write_svg = write_svg and artifact.svg_path is not None
+            if write_svg:
+                self._link_output(artifact.svg_path, output_svg_path)
+            with open(output_gcode_path, "r") as gfile:
+                for line in gfile:
+                    yield line.rstrip("\n")
+            on_result(ConversionResult(output_gcode_path, output_svg_path if write_svg else None,
+                                       artifact.metadata, cached=True))
+            return
+
+        document, paths, layout_scale = self._layout(image_bytes)
+
+        if self.cache is not None:
+            # The SVG is always cached so a later write_svg request is a hit too
+            staging = self.cache.new_staging_directory()
+            staged_gcode_path = staging / ArtifactCache.GCODE_NAME
+            staged_svg_path = staging / ArtifactCache.SVG_NAME
+        else:
+            staged_gcode_path = output_gcode_path.with_suffix(".gcode.partial")
+            staged_svg_path = output_svg_path
+
+        reports, drawn = {}, []
+
+        def drawing_chunks() -> Iterator[PathCollection]:
+            for chunk in self._iter_drawing_chunks(document, paths, layout_scale, True, True, reports):
+                drawn.append(chunk)
+                yield chunk
+
+        # The start template goes out before ordering starts, each chunk's paths as soon as they are ordered
+        bounds = (paths.coords.min(axis=0), paths.coords.max(axis=0)) if len(paths) else ((0, 0), (0, 0))
+        lines = self.gcode_writer.iter_chunked_lines(drawing_chunks(), document.page_size, bounds,
+                                                     document.metadata, filename=str(output_gcode_path))
+        if self.arc_fitter is not None:
+            lines = self.arc_fitter.fit_lines(lines, on_report=lambda report: reports.update(arcs=report))
+        if self.gcode_compactor is not None:
+            lines = self.gcode_compactor.compact_lines(
+                lines, on_report=lambda report: reports.update(compaction=report))
+
+        try:
+            with open(staged_gcode_path, "w") as tee:
+                for line in lines:
+                    tee.write(line + "\n")
+                    yield line
+        except BaseException:
+            # Stream abandoned or failed: never publish a partial file
+            if self.cache is not None:
+                shutil.rmtree(staging, ignore_errors=True)
+            else:
+                staged_gcode_path.unlink(missing_ok=True)
+            raise
+
+        drawing = PathCollection.concatenate(drawn)
+        if len(drawing):
+            document.add(vp.LineCollection(drawing.to_complex()), 1)
+        if self.cache is not None or write_svg:
+            with open(staged_svg_path, "w") as svg_file:
+                vp.write_svg(svg_file, document)
+        metadata = self._document_metadata(document, staged_gcode_path, reports.get("ordering"),
+                                           reports.get("pen_lifts"), reports.get("arcs"), reports.get("compaction"))
+
+        if self.cache is not None:
+            artifact = self.cache.put(key, staging, metadata)
+            self._link_output(artifact.gcode_path, output_gcode_path)
+            if write_svg:
+                self._link_output(artifact.svg_path, output_svg_path)
+            metadata = artifact.metadata
+        else:
+            staged_gcode_path.replace(output_gcode_path)
+
+        on_result(ConversionResult(output_gcode_path, output_svg_path if write_svg else None,
+                                   metadata, cached=False))
+
+    def gcode_stream(self, input_image: Union[Path, bytes], write_svg: bool = False,
+                     name: Optional[str] = None) -> "GCodeStream":
+        """
+        G-code lines of an image as an iterable, produced while they are consumed.
+
+        Hand it to DrawMateStreamer.stream_gcode to start plotting the first
+        paths before the rest has been emitted. The lines are also written to
+        gcode/<name>-<hash>.gcode (and the cache) for replay; stream.result is
+        set once every line has been consumed.
+
+        Args:
+            input_image: Path to input raster image (PNG, JPG, etc.), or its
+                encoded bytes (e.g. straight from LineArtGenerator)
+            write_svg: Also write the optimized SVG to the asset directory
+            name: Output file name stem (default: the image file's stem, "image" for bytes)
+        """
+        return GCodeStream(self, input_image, write_svg, name)
+
+    def convert(self, input_image_path: Path, write_svg: bool = False) -> ConversionResult:
+        """
+        Convert a raster image straight to G-code without external processes.
+
+        Outputs are named <stem>-<hash>, so different images with the same
+        file name don't overwrite each other. With a cache, a previously
+        converted image and parameter set is served from it.
+
+        Args:
+            input_image_path: Path to input raster image (PNG, JPG, etc.)
+            write_svg: Also write the optimized SVG to the asset directory
+
+        Returns:
+            ConversionResult with the output paths and metadata
+
+        Raises:
+            FileNotFoundError: If the input image doesn't exist
+        """
+        stream = self.gcode_stream(input_image_path, write_svg)
+        for _ in stream:
+            pass
+        return stream.result
+
+    def raster_to_gcode(self, input_image_path: Path, write_svg: bool = False) -> Path:
+        """
+        Convert a raster image straight to G-code without external processes.
+
+        Args:
+            input_image_path: Path to input raster image (PNG, JPG, etc.)
+            write_svg: Also write the optimized SVG to the asset directory
+
+        Returns:
+            Path to a generated G-code file
+
+        Raises:
+            FileNotFoundError: If the input image doesn't exist
+        """
+        result = self.convert(input_image_path, write_svg)
+        if write_svg:
+            print(f"SVG optimized: {result.svg_path}")
+        print(f"G-code created: {result.gcode_path}{' (cached)' if result.cached else ''}")
+        return result.gcode_path
+
+
+class GCodeStream:
+    """
+    Iterable of the G-code lines of one image (see GCodeConverter.gcode_stream).
+
+    Iterating runs the conversion; result holds the ConversionResult once the
+    iteration has finished.
+    """
+
+    def __init__(self, converter: GCodeConverter, input_image: Union[Path, bytes], write_svg: bool = False,
+                 name: Optional[str] = None):
+        self.converter = converter
+        self.input_image = input_image if isinstance(input_image, (bytes, bytearray)) else Path(input_image)
+        self.name = name or (self.input_image.stem if isinstance(self.input_image, Path) else "image")
+        self.write_svg = write_svg
+        self.result: Optional[ConversionResult] = None
+
+    def _set_result(self, result: ConversionResult):
+        self.result = result
+
+    def __iter__(self) -> Iterator[str]:
+        return self.converter._generate_lines(self.input_image, self.name, self.write_svg, self._set_result)
@@ -0,0 +1,216 @@
+"""
+DrawMate G-code Writer
+----------------------
+In-process replacement for `vpype gwrite`. Reads a [gwrite.<profile>] section
+from a vpype config file (config/drawmate.toml) and expands its templates the
+same way vpype-gcode does, directly from an in-memory vpype Document.
+
+Usage:
+    writer = GCodeWriter.from_config(Path("config/drawmate.toml"), "drawmate")
+    writer.write(document, Path("gcode/bird.gcode"))
+
+Author: DrawMate Project
+"""
+
+import collections
+import tomllib
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+import numpy as np
+import vpype as vp
+
+
+class GCodeWriter:
+    """Expands a vpype-gcode profile over the lines of a vpype Document."""
+
+    def __init__(self, profile: dict):
+        self.profile = profile
+        self.unit_scale = vp.convert_length(profile.get("unit", "mm"))
+
+    @classmethod
+    def from_config(cls, config_path: Path, profile_name: str) -> "GCodeWriter":
+        """
+        Load a gwrite profile from a vpype TOML config.
+
+        Raises:
+            FileNotFoundError: If the config file doesn't exist
+            KeyError: If the profile is not defined in it
+        """
+        config_path = Path(config_path)
+        if not config_path.exists():
+            raise FileNotFoundError(f"vpype config {config_path} does not exist.")
+
+        with open(config_path, "rb") as config_file:
+            config = tomllib.load(config_file)
+
+        profiles = config.get("gwrite", {})
+        if profile_name not in profiles:
+            raise KeyError(f"gwrite profile '{profile_name}' not found in {config_path}.")
+        return cls(profiles[profile_name])
+
+    # -------------------------------
+    # Internal Helpers
+    # -------------------------------
+    def _transform(self, page_size, bounds):
+        """
+        Function mapping a line in document units to output units, flipped like gwrite.
+
+        Args:
+            page_size: (width, height) of the page in document units, None if undefined
+            bounds: (low, high) corners of the whole drawing in document units (for inverts)
+        """
+        profile = self.profile
+        scale = np.array([profile.get("scale_x", 1.0), profile.get("scale_y", 1.0)]) / self.unit_scale
+        offset = np.array([profile.get("offset_x", 0.0), profile.get("offset_y", 0.0)])
+        flips = np.array([profile.get("horizontal_flip", False), profile.get("vertical_flip", False)])
+        inverts = np.array([profile.get("invert_x", False), profile.get("invert_y", False)])
+
+        # Mirror within the drawing's own bounds
+        corners = np.asarray(bounds, dtype=np.float64) * scale + offset
+        low, high = corners.min(axis=0), corners.max(axis=0)
+        if flips.any():
+            # Mirror within the whole page
+            if page_size is None:
+                raise RuntimeError("Cannot flip a document with an undefined page size")
+            page = np.array(page_size) / self.unit_scale
+
+        def transform(line: np.ndarray) -> np.ndarray:
+            line = np.asarray(line, dtype=np.float64) * scale + offset
+            if inverts.any():
+                line = np.where(inverts, low + high - line, line)
+            if flips.any():
+                line = np.where(flips, page - line, line)
+            return line
+
+        return transform
+
+    def _transformed_layers(self, document: vp.Document) -> list:
+        """Every layer as (layer_id, [(n, 2) arrays]) in output units, flipped like gwrite."""
+        layers = [(layer_id, [np.column_stack((line.real, line.imag)) for line in layer])
+                  for layer_id, layer in document.layers.items()]
+
+        all_points = [line for _, lines in layers for line in lines if len(line)]
+        if not all_points:
+            return layers
+
+        stacked = np.concatenate(all_points)
+        transform = self._transform(document.page_size, (stacked.min(axis=0), stacked.max(axis=0)))
+        return [(layer_id, [transform(line) for line in lines]) for layer_id, lines in layers]
+
+    def _expand(self, layers: list, metadata: dict, filename: str) -> Iterator[str]:
+        """
+        Yield the expanded template text piece by piece.
+
+        Args:
+            layers: (layer_id, lines) pairs; lines may be a lazy iterable of (n, 2)
+                arrays in output units, pulled only as the text is consumed
+        """
+        profile = self.profile
+        defaults = profile.get("default_values", {})
+
+        def expand(template_name: str, **context) -> str:
+            template = profile.get(template_name)
+            if template is None:
+                return ""
+            return template.format_map(collections.ChainMap(context, metadata, defaults))
+
+        yield expand("document_start", filename=filename)
+
+        last_x = last_y = 0.0
+        for layer_index, (layer_id, lines) in enumerate(layers):
+            layer_context = dict(layer_index=layer_index, layer_index1=layer_index + 1,
+                                 layer_id=layer_id, filename=filename)
+            yield expand("layer_start", x=last_x, y=last_y, index=layer_index,
+                         index1=layer_index + 1, **layer_context)
+
+            # One line of lookahead: line_join goes between lines, not after the last
+            lines = iter(lines)
+            line = next(lines, None)
+            lines_index = 0
+            while line is not None:
+                following = next(lines, None)
+                line_context = dict(layer_context, lines_index=lines_index, lines_index1=lines_index + 1)
+                yield expand("line_start", x=last_x, y=last_y, index=lines_index,
+                             index1=lines_index + 1, **line_context)
+
+                segment_last_index = len(line) - 1
+                for segment_index, (x, y) in enumerate(line.tolist()):
+                    if "segment_first" in profile and segment_index == 0:
+                        template_name = "segment_first"
+                    elif "segment_last" in profile and segment_index == segment_last_index:
+                        template_name = "segment_last"
+                    else:
+                        template_name = "segment"
+
+                    yield expand(template_name, x=x, y=y, dx=x - last_x, dy=y - last_y,
+                                 _x=-x, _y=-y, _dx=last_x - x, _dy=last_y - y,
+                                 index=segment_index, index1=segment_index + 1,
+                                 segment_index=segment_index, segment_index1=segment_index + 1,
+                                 **line_context)
+                    last_x, last_y = x, y
+
+                yield expand("line_end", x=last_x, y=last_y, index=lines_index,
+                             index1=lines_index + 1, **line_context)
+                if "line_join" in profile and following is not None:
+                    yield expand("line_join", **line_context)
+                line, lines_index = following, lines_index + 1
+
+            yield expand("layer_end", x=last_x, y=last_y, index=layer_index,
+                         index1=layer_index + 1, **layer_context)
+            if "layer_join" in profile and layer_index != len(layers) - 1:
+                yield expand("layer_join", **layer_context)
+
+        yield expand("document_end", filename=filename)
+
+    @staticmethod
+    def _split_lines(chunks: Iterable[str]) -> Iterator[str]:
+        """Re-cut text chunks into lines (without newlines)."""
+        remainder = ""
+        for chunk in chunks:
+            lines = (remainder + chunk).split("\n")
+            remainder = lines.pop()
+            yield from lines
+        if remainder:
+            yield remainder
+
+    # -------------------------------
+    # Public Methods
+    # -------------------------------
+    def iter_gcode(self, document: vp.Document, filename: str = "") -> Iterator[str]:
+        """Yield the expanded template text piece by piece."""
+        return self._expand(self._transformed_layers(document), document.metadata, filename)
+
+    def iter_lines(self, document: vp.Document, filename: str = "") -> Iterator[str]:
+        """Yield the G-code one line at a time (without newlines), path by path."""
+        return self._split_lines(self.iter_gcode(document, filename))
+
+    def iter_chunked_lines(self, chunks: Iterable, page_size, bounds, metadata: Optional[dict] = None,
+                           layer_id: int = 1, filename: str = "") -> Iterator[str]:
+        """
+        G-code lines of a one-layer drawing whose paths arrive in chunks, e.g.
+        from PathOptimizer.optimize_chunks().
+
+        The document start is yielded before the first chunk is requested, and
+        every chunk is expanded as soon as it arrives. Flips need the page size
+        and inverts the bounds of the whole drawing, so both are passed up front.
+
+        Args:
+            chunks: Iterables of (n, 2) paths in document units (e.g. PathCollections)
+            page_size: (width, height) of the page in document units
+            bounds: (low, high) corners of the whole drawing in document units
+            metadata: Document metadata the templates may refer to
+            layer_id: Layer the paths belong to
+            filename: Output file name the templates may refer to
+        """
+        transform = self._transform(page_size, bounds)
+        lines = (transform(line) for chunk in chunks for line in chunk)
+        return self._split_lines(self._expand([(layer_id, lines)], metadata or {}, filename))
+
+    def write(self, document: vp.Document, output_path: Path) -> Path:
+        """Write the G-code for a document to output_path."""
+        output_path = Path(output_path)
+        with open(output_path, "w") as gcode_file:
+            for chunk in self.iter_gcode(document, filename=str(output_path)):
+                gcode_file.write(chunk)
+        return output_path
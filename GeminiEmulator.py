@@ -0,0 +1,178 @@
+"""
+DrawMate Gemini Emulator
+------------------------
+Offline stand-in for the google-genai client, so LineArtGenerator (its
+response cache, upload downscaling, concurrent candidates and retries) can be
+run and tested without network access, an API key or the google-genai package.
+
+It mirrors the part of the client LineArtGenerator uses:
+    client.models.generate_content(model=..., contents=[prompt, PIL image])
+    await client.aio.models.generate_content(model=..., contents=[prompt, PIL image])
+        → response.parts[i].inline_data.data / .inline_data.mime_type / .text
+
+The "generated" image is a line drawing of the uploaded image (its edges,
+black on white, at a random edge threshold so candidates differ), at the
+uploaded size. Latency can be jittered and a share of calls can fail with
+a 503 or hang, to exercise deadlines and retries. Every call is recorded in
+calls.
+
+Usage:
+    emulator = GeminiEmulator(latency_in_seconds=2.0, latency_jitter_in_seconds=4.0, failure_rate=0.3)
+    generator = LineArtGenerator(client=emulator)
+    generator.generate(ASSET_DIR / "bird.jpg", CONFIG_DIR / "LineArtContinuationPrompt.md")
+    print(emulator.calls)
+
+Author: DrawMate Project
+"""
+
+import asyncio
+import io
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+from PIL import Image, ImageFilter, ImageOps
+
+
+class EmulatedServerError(Exception):
+    """A 5xx answer; carries code and message like google.genai.errors.APIError."""
+
+    def __init__(self, code: int = 503, message: str = "The model is overloaded. Please try again later."):
+        super().__init__(f"{code} {message}")
+        self.code = code
+        self.message = message
+
+
+@dataclass(frozen=True)
+class EmulatedCall:
+    """One generate_content request as the emulator received it."""
+
+    model: str
+    prompt: str
+    image_size: tuple        # (width, height) of the uploaded image, (0, 0) without one
+    upload_bytes: int        # Size of the uploaded image re-encoded in its own format
+    latency_in_seconds: float
+    outcome: str             # "image", "text", "error" or "hang"
+    edge_threshold: int      # Of the line drawing answered with "image"
+
+
+@dataclass(frozen=True)
+class _Blob:
+    data: bytes
+    mime_type: str
+
+
+@dataclass(frozen=True)
+class _Part:
+    inline_data: Optional[_Blob] = None
+    text: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class _Response:
+    parts: list = field(default_factory=list)
+
+
+def _line_drawing(image: Image.Image, edge_threshold: int = 32) -> Image.Image:
+    """Black edges on white, like the line art Gemini is asked for."""
+    edges = ImageOps.grayscale(image).filter(ImageFilter.FIND_EDGES)
+    return ImageOps.invert(edges.point(lambda value: 255 if value > edge_threshold else 0))
+
+
+class _Models:
+    def __init__(self, emulator: "GeminiEmulator"):
+        self._emulator = emulator
+
+    def generate_content(self, model: str, contents: list, config=None) -> _Response:
+        call = self._emulator._record(model, contents)
+        if call.outcome == "hang":
+            threading.Event().wait()
+        time.sleep(call.latency_in_seconds)
+        return self._emulator._answer(call, contents)
+
+
+class _AsyncModels:
+    def __init__(self, emulator: "GeminiEmulator"):
+        self._emulator = emulator
+
+    async def generate_content(self, model: str, contents: list, config=None) -> _Response:
+        call = self._emulator._record(model, contents)
+        if call.outcome == "hang":
+            await asyncio.Event().wait()
+        await asyncio.sleep(call.latency_in_seconds)
+        # Drawing the answer is CPU work, like decoding it would be on the real client
+        return await asyncio.to_thread(self._emulator._answer, call, contents)
+
+
+class _AsyncClient:
+    def __init__(self, emulator: "GeminiEmulator"):
+        self.models = _AsyncModels(emulator)
+
+
+class GeminiEmulator:
+    """Answers generate_content with a line drawing of the uploaded image."""
+
+    def __init__(self,
+                 latency_in_seconds: float = 0.0,
+                 return_image: bool = True,
+                 latency_jitter_in_seconds: float = 0.0,
+                 failure_rate: float = 0.0,
+                 hang_rate: float = 0.0,
+                 seed: Optional[int] = None):
+        """
+        Args:
+            latency_in_seconds: Time every request takes, like the network round trip
+            return_image: Answer with text only (no image) when False
+            latency_jitter_in_seconds: Up to this much extra latency, uniformly at random
+            failure_rate: Share of requests answered with EmulatedServerError (503)
+            hang_rate: Share of requests that never answer (until cancelled)
+            seed: Seed of the random latencies, failures and edge thresholds
+        """
+        self.latency_in_seconds = latency_in_seconds
+        self.return_image = return_image
+        self.latency_jitter_in_seconds = latency_jitter_in_seconds
+        self.failure_rate = failure_rate
+        self.hang_rate = hang_rate
+        self.calls = []
+        self.models = _Models(self)
+        self.aio = _AsyncClient(self)
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _record(self, model: str, contents: list) -> EmulatedCall:
+        prompt = "\n".join(item for item in contents if isinstance(item, str))
+        images = [item for item in contents if isinstance(item, Image.Image)]
+
+        upload_bytes = 0
+        if images:
+            encoded = io.BytesIO()
+            images[0].save(encoded, format=images[0].format or "PNG")
+            upload_bytes = len(encoded.getvalue())
+
+        with self._lock:
+            latency = self.latency_in_seconds + self._random.uniform(0.0, self.latency_jitter_in_seconds)
+            draw = self._random.random()
+            if draw < self.hang_rate:
+                outcome = "hang"
+            elif draw < self.hang_rate + self.failure_rate:
+                outcome = "error"
+            else:
+                outcome = "image" if self.return_image and images else "text"
+            call = EmulatedCall(model, prompt, images[0].size if images else (0, 0), upload_bytes,
+                                latency, outcome, self._random.randint(16, 64))
+            self.calls.append(call)
+        return call
+
+    def _answer(self, call: EmulatedCall, contents: list) -> _Response:
+        if call.outcome == "error":
+            raise EmulatedServerError()
+        if call.outcome == "text":
+            return _Response([_Part(text="I can't draw that.")])
+
+        image = next(item for item in contents if isinstance(item, Image.Image))
+        output = io.BytesIO()
+        _line_drawing(image, call.edge_threshold).save(output, format="PNG")
+        return _Response([_Part(text="Here is the continued drawing."),
+                          _Part(inline_data=_Blob(output.getvalue(), "image/png"))])
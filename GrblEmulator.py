@@ -0,0 +1,696 @@
+"""
+DrawMate GRBL Emulator
+----------------------
+Emulates a GRBL 1.1h controller on a pseudo-terminal so the streaming code can
+be tested and tuned without the Arduino. DrawMateStreamer connects to the pty
+path exactly as it would to /dev/ttyACM0.
+
+What is emulated:
+    - Startup banner on soft reset, alarm lock when homing is enabled, $X / $H
+    - 'ok' / 'error:N' per line, ALARM:3 on a reset during motion
+    - The 127-byte serial RX buffer (overflowing bytes are dropped and counted)
+    - Serial line rate (10 bits per byte at the configured baud rate)
+    - The 15-block planner buffer: 'ok' is held back while the planner is full
+    - Motion timing from the settings export ($110-$112 rates, $120-$122
+      accelerations, $11 junction deviation, $12 arc segmentation)
+    - Real-time '?', '!', '~' and CTRL-X
+    - Alarms raised on demand (trigger_alarm), e.g. a hard limit mid-stream
+
+The motion model looks one block ahead instead of running GRBL's full
+planner, which is enough to expose planner starvation: when the next block has
+not arrived in time, the current one decelerates to a full stop.
+
+Usage (benchmark every streaming mode against a file):
+    python GrblEmulator.py gcode/DrawMate_Calibration.gcode
+    python GrblEmulator.py gcode/cat.gcode --time-scale 0.1 --modes char-count
+
+Usage (imported):
+    with GrblEmulator(GrblSettings.from_export(FIRMWARE_SETTINGS_PATH)) as emulator:
+        DrawMateStreamer(emulator.port).stream_gcode("gcode/cat.gcode")
+        print(emulator.stats)
+
+Author: DrawMate Project
+"""
+
+import argparse
+import contextlib
+import io
+import math
+import os
+import re
+import select
+import threading
+import time
+import tty
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from GrblSettings import GrblSettings
+
+GRBL_BANNER = "Grbl 1.1h ['$' for help]"
+GRBL_RX_BUFFER_SIZE = 127
+GRBL_PLANNER_BLOCKS = 15
+GRBL_LINE_BUFFER_SIZE = 80
+MINIMUM_JUNCTION_SPEED = 0.0
+HOMING_TIME_IN_SECONDS = 2.0
+
+# GRBL 1.1 error codes used by the emulator
+ERROR_EXPECTED_COMMAND_LETTER = 1
+ERROR_BAD_NUMBER_FORMAT = 2
+ERROR_INVALID_STATEMENT = 3
+ERROR_SETTING_DISABLED = 5
+ERROR_SYSTEM_LOCKED = 9
+ERROR_LINE_OVERFLOW = 14
+ERROR_UNSUPPORTED_COMMAND = 20
+ERROR_INVALID_TARGET = 33
+
+WORD_PATTERN = re.compile(r"([A-Z])([-+]?(?:\d+\.?\d*|\.\d+))")
+
+
+@dataclass
+class EmulatorStats:
+    """Counters collected while the emulator runs. Times are in emulated seconds."""
+
+    bytes_received: int = 0
+    rx_overflow_bytes: int = 0
+    lines_received: int = 0
+    lines_ok: int = 0
+    lines_error: int = 0
+    blocks_executed: int = 0
+    motion_time: float = 0.0
+    starvation_time: float = 0.0
+    starvation_stops: int = 0
+    first_line_at: Optional[float] = None
+    last_ack_at: Optional[float] = None
+
+    @property
+    def stream_time(self) -> float:
+        if self.first_line_at is None or self.last_ack_at is None:
+            return 0.0
+        return self.last_ack_at - self.first_line_at
+
+    @property
+    def lines_per_second(self) -> float:
+        return self.lines_received / self.stream_time if self.stream_time else 0.0
+
+
+@dataclass
+class _Block:
+    """One planner block: a straight move at a nominal speed and acceleration."""
+
+    start: tuple
+    target: tuple
+    length: float
+    unit_vector: tuple
+    nominal_speed: float
+    acceleration: float
+
+
+def _axis_limited(unit_vector: tuple, limits: tuple) -> float:
+    """Largest speed or acceleration along unit_vector that no single axis exceeds."""
+    limited = math.inf
+    for component, limit in zip(unit_vector, limits):
+        if component:
+            limited = min(limited, limit / abs(component))
+    return limited
+
+
+def _junction_speed(previous: _Block, block: _Block, junction_deviation: float) -> float:
+    """GRBL's junction deviation speed limit between two consecutive blocks."""
+    cos_theta = -sum(a * b for a, b in zip(previous.unit_vector, block.unit_vector))
+    if cos_theta > 0.999999:
+        return MINIMUM_JUNCTION_SPEED
+    if cos_theta < -0.999999:
+        return min(previous.nominal_speed, block.nominal_speed)
+
+    sin_theta_d2 = math.sqrt(0.5 * (1.0 - cos_theta))
+    acceleration = min(previous.acceleration, block.acceleration)
+    speed = math.sqrt(acceleration * junction_deviation * sin_theta_d2 / (1.0 - sin_theta_d2))
+    return min(speed, previous.nominal_speed, block.nominal_speed)
+
+
+def _trapezoid(length: float, entry: float, exit_: float, nominal: float, acceleration: float):
+    """
+    Time to cover length with a trapezoidal (or triangular) velocity profile.
+
+    Returns:
+        (total_time, deceleration_time) in seconds
+    """
+    # Clamp entry/exit to what the block can physically reach
+    exit_ = min(exit_, math.sqrt(entry * entry + 2 * acceleration * length))
+    entry = min(entry, math.sqrt(exit_ * exit_ + 2 * acceleration * length))
+
+    peak = math.sqrt((2 * acceleration * length + entry * entry + exit_ * exit_) / 2)
+    if peak <= nominal:
+        return (peak - entry) / acceleration + (peak - exit_) / acceleration, (peak - exit_) / acceleration
+
+    accelerate = (nominal * nominal - entry * entry) / (2 * acceleration)
+    decelerate = (nominal * nominal - exit_ * exit_) / (2 * acceleration)
+    cruise = (length - accelerate - decelerate) / nominal
+    deceleration_time = (nominal - exit_) / acceleration
+    return (nominal - entry) / acceleration + cruise + deceleration_time, deceleration_time
+
+
+class GrblEmulator:
+    """GRBL 1.1h stand-in served on a pseudo-terminal."""
+
+    def __init__(self,
+                 settings: GrblSettings = GrblSettings(),
+                 baudrate: int = 115200,
+                 time_scale: float = 1.0):
+        """
+        Args:
+            settings: Machine settings to time motion with
+            baudrate: Emulated serial line rate
+            time_scale: Real seconds per emulated second (e.g. 0.1 runs 10x faster)
+        """
+        self.settings = settings
+        self.baudrate = baudrate
+        self.time_scale = time_scale
+        self.stats = EmulatorStats()
+        self.port = None
+
+        self._master = None
+        self._slave = None
+        self._running = False
+        self._threads = []
+        self._lock = threading.Condition()
+        self._write_lock = threading.Lock()
+
+        self._max_rate = settings.max_rate_in_mm_per_second
+        self._acceleration = settings.acceleration_in_mm_per_second2
+        self._reset_state()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    # -------------------------------
+    # Internal Helpers
+    # -------------------------------
+    def _reset_state(self):
+        """Power-on / soft reset state. Call with the lock held (or before start)."""
+        self._rx_buffer = bytearray()
+        self._planner = deque()
+        self._position = [0.0, 0.0, 0.0]      # Planned position (end of last queued block)
+        self._machine_position = [0.0, 0.0, 0.0]
+        self._executing = None                # (block, started_at_emulated, duration)
+        self._feed_rate = 0.0
+        self._motion_mode = 0
+        self._absolute = True
+        self._inches = False
+        self._hold = False
+        self._state = "Alarm" if self.settings.homing_enabled else "Idle"
+        self._reset_generation = getattr(self, "_reset_generation", 0) + 1
+        self._starving_since = None
+
+    def _now(self) -> float:
+        """Emulated clock."""
+        return time.monotonic() / self.time_scale
+
+    def _sleep(self, seconds: float):
+        time.sleep(seconds * self.time_scale)
+
+    def _send(self, message: str):
+        with self._write_lock:
+            os.write(self._master, (message + "\r\n").encode())
+
+    def _rx_loop(self):
+        """Serial receive: real-time bytes act at once, the rest fills the RX buffer."""
+        seconds_per_byte = 10.0 / self.baudrate
+        while self._running:
+            readable, _, _ = select.select([self._master], [], [], 0.05)
+            if not readable:
+                continue
+            try:
+                data = os.read(self._master, 64)
+            except OSError:
+                continue
+
+            for value in data:
+                self._sleep(seconds_per_byte)
+                byte = bytes((value,))
+                if byte == b"?":
+                    self._send(self._status_report())
+                elif byte == b"!":
+                    with self._lock:
+                        if self._state in ("Run", "Idle") and (self._planner or self._executing):
+                            self._hold = True
+                            self._state = "Hold:0"
+                        self._lock.notify_all()
+                elif byte == b"~":
+                    with self._lock:
+                        if self._hold:
+                            self._hold = False
+                            self._state = "Run"
+                        self._lock.notify_all()
+                elif byte == b"\x18":
+                    self._soft_reset()
+                else:
+                    with self._lock:
+                        self.stats.bytes_received += 1
+                        if len(self._rx_buffer) >= GRBL_RX_BUFFER_SIZE:
+                            self.stats.rx_overflow_bytes += 1
+                        else:
+                            self._rx_buffer.append(value)
+                        self._lock.notify_all()
+
+    def _soft_reset(self):
+        with self._lock:
+            moving = self._executing is not None or bool(self._planner)
+            self._reset_state()
+            if moving:
+                self._state = "Alarm"
+            self._lock.notify_all()
+        if moving:
+            self._send("ALARM:3")
+        self._send("")
+        self._send(GRBL_BANNER)
+        if self._state == "Alarm":
+            self._send("[MSG:'$H'|'$X' to unlock]")
+
+    def _status_report(self) -> str:
+        with self._lock:
+            position = list(self._machine_position)
+            if self._executing is not None:
+                block, started_at, duration = self._executing
+                fraction = min(1.0, (self._now() - started_at) / duration) if duration else 1.0
+                position = [s + (t - s) * fraction for s, t in zip(block.start, block.target)]
+            report = [self._state, "MPos:" + ",".join(f"{axis:.3f}" for axis in position)]
+            if self.settings.status_report_mask & 2:
+                planner_free = GRBL_PLANNER_BLOCKS - len(self._planner) - (self._executing is not None)
+                report.append(f"Bf:{planner_free},{GRBL_RX_BUFFER_SIZE - len(self._rx_buffer)}")
+            report.append(f"FS:{self._feed_rate * 60:.0f},0")
+        return "<" + "|".join(report) + ">"
+
+    def _protocol_loop(self):
+        """Take complete lines out of the RX buffer and execute them, like protocol_main_loop."""
+        while self._running:
+            with self._lock:
+                while self._running and b"\n" not in self._rx_buffer:
+                    self._lock.wait(0.05)
+                if not self._running:
+                    return
+                end = self._rx_buffer.index(b"\n")
+                raw_line = bytes(self._rx_buffer[:end])
+                del self._rx_buffer[:end + 1]
+                generation = self._reset_generation
+                if self.stats.first_line_at is None:
+                    self.stats.first_line_at = self._now()
+                self.stats.lines_received += 1
+
+            line = raw_line.decode(errors="ignore").strip()
+            if len(line) > GRBL_LINE_BUFFER_SIZE:
+                error = ERROR_LINE_OVERFLOW
+            else:
+                error = self._execute_line(line, generation)
+
+            with self._lock:
+                # A soft reset while the line was waiting for planner space discards it silently
+                if generation != self._reset_generation:
+                    continue
+                if error:
+                    self.stats.lines_error += 1
+                else:
+                    self.stats.lines_ok += 1
+                self.stats.last_ack_at = self._now()
+            self._send(f"error:{error}" if error else "ok")
+
+    def _execute_line(self, line: str, generation: int) -> int:
+        """Execute one line. Returns 0 for 'ok' or a GRBL error code."""
+        line = re.sub(r"\(.*?\)", "", line).split(";")[0]
+        line = line.replace(" ", "").upper()
+        if not line:
+            return 0
+
+        if line.startswith("$"):
+            return self._execute_system_command(line)
+
+        with self._lock:
+            if self._state == "Alarm":
+                return ERROR_SYSTEM_LOCKED
+
+        words = WORD_PATTERN.findall(line)
+        if "".join(letter + value for letter, value in words) != line:
+            return ERROR_EXPECTED_COMMAND_LETTER if line[0].isdigit() else ERROR_BAD_NUMBER_FORMAT
+
+        target = list(self._position)
+        center_offset = [0.0, 0.0]
+        dwell = None
+        motion = self._motion_mode
+        axis_words = False
+        scale = 25.4 if self._inches else 1.0
+
+        for letter, value in words:
+            number = float(value)
+            if letter == "G":
+                code = number
+                if code in (0, 1, 2, 3):
+                    motion = int(code)
+                elif code == 4:
+                    dwell = 0.0
+                elif code == 20:
+                    self._inches, scale = True, 25.4
+                elif code == 21:
+                    self._inches, scale = False, 1.0
+                elif code == 90:
+                    self._absolute = True
+                elif code == 91:
+                    self._absolute = False
+                elif code not in (17, 54, 94):
+                    return ERROR_UNSUPPORTED_COMMAND
+            elif letter == "M":
+                if number not in (0, 1, 2, 3, 4, 5, 8, 9, 30):
+                    return ERROR_UNSUPPORTED_COMMAND
+            elif letter in "XYZ":
+                axis = "XYZ".index(letter)
+                target[axis] = number * scale + (0.0 if self._absolute else target[axis])
+                axis_words = True
+            elif letter in "IJ":
+                center_offset["IJ".index(letter)] = number * scale
+            elif letter == "F":
+                self._feed_rate = number * scale / 60.0
+            elif letter == "P":
+                dwell = number
+            elif letter in "ST":
+                continue
+            else:
+                return ERROR_UNSUPPORTED_COMMAND
+
+        self._motion_mode = motion
+        if dwell is not None:
+            self._wait_for_idle(generation)
+            self._sleep(dwell)
+            return 0
+        if not axis_words:
+            return 0
+
+        for axis, limit in enumerate(self.settings.max_travel_in_mm):
+            if self.settings.soft_limits_enabled and abs(target[axis]) > limit:
+                return ERROR_INVALID_TARGET
+
+        if motion in (2, 3):
+            # Like gc_execute_line(): the target must lie on the circle through the start
+            radius = math.hypot(center_offset[0], center_offset[1])
+            target_radius = math.hypot(target[0] - self._position[0] - center_offset[0],
+                                       target[1] - self._position[1] - center_offset[1])
+            radius_error = abs(target_radius - radius)
+            if radius_error > 0.005 and (radius_error > 0.5 or radius_error > 0.001 * radius):
+                return ERROR_INVALID_TARGET
+            points = self._arc_points(target, center_offset, clockwise=motion == 2)
+        else:
+            points = [target]
+
+        for point in points:
+            self._queue_block(point, rapid=motion == 0, generation=generation)
+        return 0
+
+    def _arc_points(self, target: list, center_offset: list, clockwise: bool) -> list:
+        """Split an XY arc into chords within $12 arc tolerance, like mc_arc()."""
+        start = self._position
+        center = (start[0] + center_offset[0], start[1] + center_offset[1])
+        radius = math.hypot(center_offset[0], center_offset[1])
+        start_angle = math.atan2(start[1] - center[1], start[0] - center[0])
+        end_angle = math.atan2(target[1] - center[1], target[0] - center[0])
+
+        sweep = end_angle - start_angle
+        if clockwise and sweep >= 0:
+            sweep -= 2 * math.pi
+        elif not clockwise and sweep <= 0:
+            sweep += 2 * math.pi
+
+        tolerance = self.settings.arc_tolerance_in_mm
+        segment_length = math.sqrt(tolerance * (2 * radius - tolerance)) if radius > tolerance else radius
+        segments = max(1, int(abs(0.5 * sweep * radius) / segment_length)) if segment_length else 1
+
+        points = []
+        for index in range(1, segments):
+            angle = start_angle + sweep * index / segments
+            z = start[2] + (target[2] - start[2]) * index / segments
+            points.append([center[0] + radius * math.cos(angle), center[1] + radius * math.sin(angle), z])
+        points.append(target)
+        return points
+
+    def _queue_block(self, target: list, rapid: bool, generation: int):
+        delta = [t - p for t, p in zip(target, self._position)]
+        length = math.sqrt(sum(d * d for d in delta))
+        if length == 0:
+            return
+
+        unit_vector = tuple(d / length for d in delta)
+        max_speed = _axis_limited(unit_vector, self._max_rate)
+        nominal_speed = max_speed if rapid or not self._feed_rate else min(self._feed_rate, max_speed)
+        block = _Block(
+            start=tuple(self._position),
+            target=tuple(target),
+            length=length,
+            unit_vector=unit_vector,
+            nominal_speed=nominal_speed,
+            acceleration=_axis_limited(unit_vector, self._acceleration),
+        )
+
+        with self._lock:
+            # plan_buffer_line() blocks while the planner is full; 'ok' waits with it
+            while self._occupied_blocks() >= GRBL_PLANNER_BLOCKS:
+                if generation != self._reset_generation or not self._running:
+                    return
+                self._lock.wait(0.05)
+            if generation != self._reset_generation:
+                return
+
+            if self._starving_since is not None:
+                self.stats.starvation_time += self._now() - self._starving_since
+                self.stats.starvation_stops += 1
+                self._starving_since = None
+
+            self._planner.append(block)
+            self._position = list(target)
+            if self._state == "Idle":
+                self._state = "Run"
+            self._lock.notify_all()
+
+    def _occupied_blocks(self) -> int:
+        return len(self._planner) + (self._executing is not None)
+
+    def _wait_for_idle(self, generation: int):
+        with self._lock:
+            while self._running and generation == self._reset_generation and self._occupied_blocks():
+                self._lock.wait(0.05)
+
+    def _run_for(self, duration: float, generation: int) -> bool:
+        """
+        Advance the executing block for duration emulated seconds, pausing during feed hold.
+
+        Returns:
+            False if a soft reset interrupted the block
+        """
+        remaining = duration
+        while remaining > 0:
+            with self._lock:
+                while self._hold and generation == self._reset_generation:
+                    self._lock.wait(0.05)
+                if generation != self._reset_generation or not self._running:
+                    return False
+            tick = min(remaining, 0.01 / self.time_scale)
+            started = self._now()
+            self._sleep(tick)
+            remaining -= self._now() - started
+        return True
+
+    def _motion_loop(self):
+        """Stepper side: execute planner blocks with one block of lookahead."""
+        entry_speed = 0.0
+        while self._running:
+            with self._lock:
+                while self._running and not self._planner:
+                    self._lock.wait(0.05)
+                if not self._running:
+                    return
+                generation = self._reset_generation
+                block = self._planner.popleft()
+                following = self._planner[0] if self._planner else None
+                self._executing = (block, self._now(), 0.0)
+
+            jd = self.settings.junction_deviation_in_mm
+            if following is not None:
+                exit_speed = _junction_speed(block, following, jd)
+                duration, _ = _trapezoid(block.length, entry_speed, exit_speed, block.nominal_speed, block.acceleration)
+                completed = self._run_for(duration, generation)
+            else:
+                # Nothing queued behind this block: plan a stop, but if the next block
+                # arrives before deceleration starts, blend into it instead
+                duration, deceleration = _trapezoid(block.length, entry_speed, 0.0, block.nominal_speed, block.acceleration)
+                with self._lock:
+                    self._executing = (block, self._executing[1], duration)
+                cruise_time = duration - deceleration
+                completed = self._run_for(cruise_time, generation)
+                exit_speed = 0.0
+                with self._lock:
+                    following = self._planner[0] if self._planner else None
+                if completed and following is not None:
+                    exit_speed = _junction_speed(block, following, jd)
+                    blended, _ = _trapezoid(block.length, entry_speed, exit_speed, block.nominal_speed, block.acceleration)
+                    remaining = max(0.0, blended - cruise_time)
+                    duration = cruise_time + remaining
+                    completed = self._run_for(remaining, generation)
+                elif completed:
+                    completed = self._run_for(deceleration, generation)
+
+            with self._lock:
+                if not completed:
+                    entry_speed = 0.0
+                    continue
+                self._machine_position = list(block.target)
+                self._executing = None
+                self.stats.blocks_executed += 1
+                self.stats.motion_time += duration
+                entry_speed = exit_speed
+                if not self._planner:
+                    entry_speed = 0.0
+                    self._starving_since = self._now()
+                    if self._state == "Run":
+                        self._state = "Idle"
+                self._lock.notify_all()
+
+    def _execute_system_command(self, line: str) -> int:
+        if line == "$X":
+            with self._lock:
+                if self._state == "Alarm":
+                    self._state = "Idle"
+                    self._send("[MSG:Caution: Unlocked]")
+            return 0
+        if line == "$H":
+            if not self.settings.homing_enabled:
+                return ERROR_SETTING_DISABLED
+            with self._lock:
+                self._state = "Home"
+            self._sleep(HOMING_TIME_IN_SECONDS)
+            with self._lock:
+                self._position = [0.0, 0.0, 0.0]
+                self._machine_position = [0.0, 0.0, 0.0]
+                self._state = "Idle"
+            return 0
+        if line == "$$":
+            for key, value in self.settings.raw:
+                self._send(f"{key}={value}")
+            return 0
+        if line == "$I":
+            self._send("[VER:1.1h.20190830:]")
+            self._send("[OPT:V,15,128]")
+            return 0
+        if line == "$G":
+            motion = f"G{self._motion_mode}"
+            units = "G20" if self._inches else "G21"
+            distance = "G90" if self._absolute else "G91"
+            self._send(f"[GC:{motion} G54 G17 {units} {distance} G94 M5 M9 T0 F{self._feed_rate * 60:.0f} S0]")
+            return 0
+        return ERROR_INVALID_STATEMENT
+
+    # -------------------------------
+    # Public Methods
+    # -------------------------------
+    def start(self) -> str:
+        """Open the pty and start serving. Returns the port path to connect to."""
+        self._master, self._slave = os.openpty()
+        tty.setraw(self._slave)
+        self.port = os.ttyname(self._slave)
+        self._running = True
+        self._threads = [
+            threading.Thread(target=target, daemon=True)
+            for target in (self._rx_loop, self._protocol_loop, self._motion_loop)
+        ]
+        for thread in self._threads:
+            thread.start()
+        return self.port
+
+    def stop(self):
+        with self._lock:
+            self._running = False
+            self._lock.notify_all()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        for fd in (self._master, self._slave):
+            if fd is not None:
+                os.close(fd)
+        self._master = self._slave = None
+
+    def trigger_alarm(self, code: int = 1):
+        """
+        Raise ALARM:code now, like a hard limit switch tripping (ALARM:1).
+
+        As in GRBL, motion stops at once, buffered lines and planned blocks
+        are discarded and the machine stays locked until $X or $H.
+        """
+        with self._lock:
+            self._reset_state()
+            self._state = "Alarm"
+            self._lock.notify_all()
+        self._send(f"ALARM:{code}")
+        self._send("[MSG:Reset to continue]")
+
+    def wait_until_idle(self, timeout: Optional[float] = None) -> bool:
+        """Block until the planner has drained. Returns False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            while self._occupied_blocks() or self._rx_buffer:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._lock.wait(0.05 if remaining is None else min(0.05, remaining))
+        return True
+
+
+# -------------------------------
+# Benchmark
+# -------------------------------
+def benchmark(gcode_path: Path, modes: tuple, settings: GrblSettings, time_scale: float = 1.0) -> dict:
+    """
+    Stream gcode_path to a fresh emulator once per streaming mode.
+
+    Host-side delays (such as send-wait's 50 ms pause) run in real time and
+    are not scaled, so compare modes at the same time_scale.
+
+    Returns:
+        {mode: EmulatorStats}
+    """
+    # Imported here so the emulator itself has no pyserial dependency
+    from DrawMateStreamer import DrawMateStreamer
+
+    results = {}
+    for mode in modes:
+        with GrblEmulator(settings, time_scale=time_scale) as emulator:
+            with contextlib.redirect_stdout(io.StringIO()):
+                with DrawMateStreamer(emulator.port, mode=mode) as streamer:
+                    # $H is emulated as a fixed delay that would only skew the comparison
+                    streamer.homed = True
+                    streamer.stream_gcode(gcode_path)
+                    emulator.wait_until_idle()
+            results[mode] = emulator.stats
+    return results
+
+
+if __name__ == "__main__":
+    from config.config import FIRMWARE_SETTINGS_PATH
+    from DrawMateStreamer import STREAM_MODES
+
+    parser = argparse.ArgumentParser(description="Benchmark streaming modes against an emulated GRBL.")
+    parser.add_argument("gcode_path", type=Path, help="G-code file to stream")
+    parser.add_argument("--modes", nargs="+", choices=STREAM_MODES, default=list(STREAM_MODES))
+    parser.add_argument("--time-scale", type=float, default=1.0,
+                        help="Real seconds per emulated second (default: 1.0)")
+    parser.add_argument("--settings", type=Path, default=FIRMWARE_SETTINGS_PATH,
+                        help="Firmware settings export to time motion with")
+    args = parser.parse_args()
+
+    results = benchmark(args.gcode_path, tuple(args.modes), GrblSettings.from_export(args.settings), args.time_scale)
+
+    print(f"{'mode':<12}{'lines':>8}{'lines/s':>10}{'stream s':>10}{'motion s':>10}{'starved s':>11}{'stops':>7}{'errors':>8}")
+    for mode, stats in results.items():
+        print(f"{mode:<12}{stats.lines_received:>8}{stats.lines_per_second:>10.1f}{stats.stream_time:>10.2f}"
+              f"{stats.motion_time:>10.2f}{stats.starvation_time:>11.2f}{stats.starvation_stops:>7}{stats.lines_error:>8}")
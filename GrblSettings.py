@@ -0,0 +1,77 @@
+"""
+DrawMate GRBL Settings
+----------------------
+Loads the firmware settings export (config/final-firmware_*.settings) into a
+typed object so the emulator and the plot-time estimator model the same
+machine that is actually plotting.
+
+Usage:
+    from GrblSettings import GrblSettings
+    settings = GrblSettings.from_export(FIRMWARE_SETTINGS_PATH)
+    settings.max_rate_in_mm_per_second  # (x, y, z)
+
+Author: DrawMate Project
+"""
+
+import json
+from dataclasses import dataclass
+from pathlib import Path
+
+
+@dataclass(frozen=True)
+class GrblSettings:
+    """The subset of GRBL 1.1 '$' settings that govern motion timing."""
+
+    steps_per_mm: tuple = (4.702, 5.201, 3.180)                   # $100-$102
+    max_rate_in_mm_per_minute: tuple = (5000.0, 5000.0, 500.0)    # $110-$112
+    acceleration_in_mm_per_second2: tuple = (5000.0, 5000.0, 1.0) # $120-$122
+    max_travel_in_mm: tuple = (240.0, 170.0, 25.0)                # $130-$132
+    junction_deviation_in_mm: float = 0.010                       # $11
+    arc_tolerance_in_mm: float = 0.002                            # $12
+    status_report_mask: int = 1                                   # $10
+    soft_limits_enabled: bool = True                              # $20
+    homing_enabled: bool = True                                   # $22
+    raw: tuple = ()                                               # Every ($key, value) pair as exported
+
+    @classmethod
+    def from_export(cls, settings_path: Path) -> "GrblSettings":
+        """
+        Build settings from a firmware settings export (JSON with a 'settings' list).
+
+        Raises:
+            FileNotFoundError: If the export doesn't exist
+            KeyError: If one of the motion settings is missing from the export
+        """
+        settings_path = Path(settings_path)
+        if not settings_path.exists():
+            raise FileNotFoundError(f"Settings export {settings_path} does not exist.")
+
+        with open(settings_path, "r") as settings_file:
+            export = json.load(settings_file)
+
+        values = {entry["key"]: entry["value"] for entry in export["settings"]}
+
+        def axes(first_key: int) -> tuple:
+            return tuple(float(values[f"${first_key + axis}"]) for axis in range(3))
+
+        return cls(
+            steps_per_mm=axes(100),
+            max_rate_in_mm_per_minute=axes(110),
+            acceleration_in_mm_per_second2=axes(120),
+            max_travel_in_mm=axes(130),
+            junction_deviation_in_mm=float(values["$11"]),
+            arc_tolerance_in_mm=float(values["$12"]),
+            status_report_mask=int(values["$10"]),
+            soft_limits_enabled=bool(int(values["$20"])),
+            homing_enabled=bool(int(values["$22"])),
+            raw=tuple(sorted(values.items(), key=lambda item: float(item[0][1:]))),
+        )
+
+    @property
+    def max_rate_in_mm_per_second(self) -> tuple:
+        return tuple(rate / 60.0 for rate in self.max_rate_in_mm_per_minute)
+
+    @property
+    def resolution_in_mm(self) -> tuple:
+        """Distance of a single step on each axis."""
+        return tuple(1.0 / steps for steps in self.steps_per_mm)
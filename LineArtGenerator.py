@@ -1,8 +1,104 @@
-from google import genai
-from PIL import Image
+"""
+DrawMate Line Art Generator
+---------------------------
+Asks Gemini to continue a line drawing (control image + prompt) and saves the
+generated image next to the assets.
+
+    - Uploads are downscaled to upload_max_size_in_pixels on the long side and
+      re-encoded (PNG or JPEG, whichever is smaller), so a 12 MP photo doesn't
+      cost a 12 MP upload
+    - Responses are cached on disk (ArtifactCache) under a hash of the image
+      bytes, the prompt text, the model and the upload size: an identical
+      request is answered without a round trip, and the cache is bounded in
+      size with least-recently-used eviction
+    - `candidates` requests are issued concurrently through the async client.
+      Every attempt has a deadline, and timeouts, 429s and 5xx answers are
+      retried with jittered exponential backoff (tenacity), so one slow or
+      failed request no longer stalls the job
+    - With a GCodeConverter, each answer is traced as it arrives and scored by
+      plottability (path count, then ink length): the first one within
+      max_paths wins and the other requests are cancelled; if none is, the
+      best-scoring one is kept. Without a converter the first image wins
+
+Usage (standalone):
+    python LineArtGenerator.py assets/bird.jpg config/LineArtContinuationPrompt.md
+    python LineArtGenerator.py assets/bird.jpg config/LineArtContinuationPrompt.md --offline
+
+Usage (imported):
+    generator = LineArtGenerator(cache=ArtifactCache(AI_CACHE_DIR, AI_CACHE_MAX_SIZE_IN_BYTES),
+                                 converter=gcode_converter)
+    output_path = generator.generate(control_image_path, prompt_path)
+    output_path = await generator.generate_async(control_image_path, prompt_path)  # From a running loop
+    line_art = await generator.continue_image(image_bytes, prompt_text)            # In memory, no files
+
+Author: DrawMate Project
+"""
+
+import argparse
+import asyncio
+import io
+import time
+from dataclasses import dataclass
 from pathlib import Path
 from typing import Optional
-from config.config import AI_MODEL, ASSET_DIR, GEMINI_API_KEY
+
+import vpype as vp
+from PIL import Image, ImageOps
+from tenacity import AsyncRetrying, retry_if_exception, stop_after_attempt, wait_random_exponential
+
+from ArtifactCache import ArtifactCache
+from config.config import (
+    AI_CANDIDATES, AI_MAX_ATTEMPTS, AI_MAX_PATHS, AI_MODEL, AI_REQUEST_TIMEOUT_IN_SECONDS,
+    AI_UPLOAD_MAX_SIZE_IN_PIXELS, ASSET_DIR, GEMINI_API_KEY
+)
+
+try:
+    from google import genai
+except ImportError:
+    genai = None
+
+# The google-genai client re-encodes non-PNG images as JPEG at this quality
+UPLOAD_JPEG_QUALITY = 75
+
+# HTTP status codes worth another attempt: timeout, rate limit, server side
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+RETRY_WAIT_IN_SECONDS = 2.0       # Base of the jittered exponential backoff
+RETRY_MAX_WAIT_IN_SECONDS = 30.0
+
+
+@dataclass(frozen=True)
+class Candidate:
+    """One generated image, how long it took and (with a converter) how well it plots."""
+
+    index: int
+    image_bytes: bytes       # Encoded as Gemini sent it (PNG, JPEG)
+    seconds: float
+    attempts: int
+    path_count: Optional[int] = None
+    ink_length_in_millimeters: Optional[float] = None
+
+    @property
+    def rank(self) -> tuple:
+        """Sort key: fewest paths (pen lifts), then least ink."""
+        return self.path_count, self.ink_length_in_millimeters
+
+    def __str__(self) -> str:
+        text = f"🎨 Candidate {self.index + 1} in {self.seconds:.1f}s ({self.attempts} attempt(s))"
+        if self.path_count is not None:
+            text += f": {self.path_count} paths, {self.ink_length_in_millimeters / 1000:.2f} m of ink"
+        return text
+
+
+def _is_transient(error: BaseException) -> bool:
+    """Timeouts, and API errors (google.genai.errors.APIError or alike) with a retryable status."""
+    return isinstance(error, asyncio.TimeoutError) or getattr(error, "code", None) in RETRYABLE_STATUS_CODES
+
+
+def _response_image_bytes(response) -> Optional[bytes]:
+    for part in response.parts or []:
+        if part.inline_data is not None:
+            return part.inline_data.data
+    return None
 
 
 def _read_file_as_string(file_path: Path) -> str:
@@ -14,11 +110,213 @@ def _read_file_as_string(file_path: Path) -> str:
     return content
 
 
+def prepare_upload(image: Image.Image, max_size_in_pixels: int) -> Image.Image:
+    """
+    Downscale an image to max_size_in_pixels on its long side and re-encode it for upload.
+
+    Transparency is flattened onto white paper. The image is encoded as PNG
+    and as JPEG and the smaller one is kept (PNG for line art, JPEG for
+    photos); it is returned opened from those bytes, so the genai client
+    uploads them without converting again.
+    """
+    image = ImageOps.exif_transpose(image)
+    if image.mode in ("RGBA", "LA", "P"):
+        image = image.convert("RGBA")
+        paper = Image.new("RGBA", image.size, "white")
+        image = Image.alpha_composite(paper, image)
+    image = image.convert("RGB")
+    image.thumbnail((max_size_in_pixels, max_size_in_pixels), Image.LANCZOS)
+
+    png, jpeg = io.BytesIO(), io.BytesIO()
+    image.save(png, format="PNG")
+    image.save(jpeg, format="JPEG", quality=UPLOAD_JPEG_QUALITY)
+    smallest = min(png, jpeg, key=lambda encoded: len(encoded.getvalue()))
+    smallest.seek(0)
+    return Image.open(smallest)
+
+
 class LineArtGenerator:
-    def __init__(self, api_key: str = GEMINI_API_KEY):
-        self.client = genai.Client(api_key=api_key)
+    """Gemini line-art continuation: concurrent candidates, retries, a response cache and upload downscaling."""
 
-    def generate(self, control_image_path: Path, continuation_prompt_path: Path) -> Optional[Path]:
+    IMAGE_NAME = "response.png"
+
+    def __init__(self,
+                 api_key: str = GEMINI_API_KEY,
+                 client=None,
+                 model: str = AI_MODEL,
+                 cache: Optional[ArtifactCache] = None,
+                 upload_max_size_in_pixels: int = AI_UPLOAD_MAX_SIZE_IN_PIXELS,
+                 output_directory: Path = ASSET_DIR,
+                 candidates: int = AI_CANDIDATES,
+                 request_timeout_in_seconds: float = AI_REQUEST_TIMEOUT_IN_SECONDS,
+                 max_attempts: int = AI_MAX_ATTEMPTS,
+                 converter=None,
+                 max_paths: Optional[int] = AI_MAX_PATHS):
+        """
+        Args:
+            api_key: Gemini API key (ignored when a client is given)
+            client: genai.Client, or a stand-in such as GeminiEmulator
+            model: Gemini model name
+            cache: Response cache, None to always call the API
+            upload_max_size_in_pixels: Long side of uploaded images
+            output_directory: Where generated images are saved
+            candidates: Requests issued concurrently per image
+            request_timeout_in_seconds: Deadline of one request attempt
+            max_attempts: Attempts per candidate before it is given up
+            converter: GCodeConverter used to score candidates, None to take the first image
+            max_paths: Accept the first candidate tracing to at most this many paths;
+                None to wait for all candidates and keep the best
+
+        Raises:
+            ImportError: If no client is given and google-genai isn't installed
+        """
+        if client is None:
+            if genai is None:
+                raise ImportError("LineArtGenerator needs the google-genai package (or a client stand-in).")
+            client = genai.Client(api_key=api_key)
+
+        self.client = client
+        self.model = model
+        self.cache = cache
+        self.upload_max_size_in_pixels = upload_max_size_in_pixels
+        self.output_directory = Path(output_directory)
+        self.candidates = candidates
+        self.request_timeout_in_seconds = request_timeout_in_seconds
+        self.max_attempts = max_attempts
+        self.converter = converter
+        self.max_paths = max_paths
+
+    def cache_key(self, image_bytes: bytes, prompt: str) -> str:
+        """Cache key of a request: everything that changes what Gemini is sent."""
+        return ArtifactCache.key(image_bytes, {
+            "prompt": prompt,
+            "model": self.model,
+            "upload_max_size_in_pixels": self.upload_max_size_in_pixels,
+        })
+
+    def _store(self, key: str, upload: Image.Image, candidate: Candidate):
+        staging = self.cache.new_staging_directory()
+        (staging / self.IMAGE_NAME).write_bytes(candidate.image_bytes)
+        self.cache.put_entry(key, staging, {
+            "model": self.model,
+            "upload_size": list(upload.size),
+            "upload_format": upload.format,
+            "seconds": candidate.seconds,
+            "attempts": candidate.attempts,
+            "path_count": candidate.path_count,
+        }, self.IMAGE_NAME)
+
+    # -------------------------------
+    # Candidates
+    # -------------------------------
+    def score(self, candidate: Candidate) -> Candidate:
+        """The candidate with its path count and ink length once traced by the converter."""
+        document = self.converter.vectorize(candidate.image_bytes, order_paths=False, optimize_pen_lifts=False)
+        path_count = sum(len(layer) for layer in document.layers.values())
+        ink_length = document.length() / vp.convert_length("mm")
+        return Candidate(candidate.index, candidate.image_bytes, candidate.seconds, candidate.attempts,
+                         path_count, ink_length)
+
+    async def _request_candidate(self, index: int, prompt: str, upload: Image.Image) -> Optional[Candidate]:
+        """One candidate: generate_content with a deadline per attempt and jittered retries."""
+        started = time.perf_counter()
+        retrying = AsyncRetrying(
+            stop=stop_after_attempt(self.max_attempts),
+            wait=wait_random_exponential(multiplier=RETRY_WAIT_IN_SECONDS, max=RETRY_MAX_WAIT_IN_SECONDS),
+            retry=retry_if_exception(_is_transient),
+            before_sleep=lambda state: print(f"🔁 Candidate {index + 1}, attempt {state.attempt_number} failed "
+                                             f"({state.outcome.exception()!r}); retrying..."),
+            reraise=True,
+        )
+        async for attempt in retrying:
+            with attempt:
+                response = await asyncio.wait_for(
+                    self.client.aio.models.generate_content(model=self.model, contents=[prompt, upload]),
+                    self.request_timeout_in_seconds,
+                )
+
+        image_bytes = _response_image_bytes(response)
+        if image_bytes is None:
+            return None
+        candidate = Candidate(index, image_bytes, time.perf_counter() - started, retrying.statistics["attempt_number"])
+        if self.converter is not None:
+            candidate = await asyncio.to_thread(self.score, candidate)
+        return candidate
+
+    async def generate_candidates(self, prompt: str, upload: Image.Image) -> Optional[Candidate]:
+        """
+        Request candidates concurrently and pick one.
+
+        Returns:
+            The first acceptable candidate, else the best-ranked one, None if
+            every answer was text only
+
+        Raises:
+            Exception: The last request error, if no candidate got an answer
+        """
+        tasks = [asyncio.create_task(self._request_candidate(index, prompt, upload))
+                 for index in range(self.candidates)]
+        finished, error = [], None
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                try:
+                    candidate = await next_done
+                except Exception as exception:
+                    print(f"⚠️ Candidate failed: {exception!r}")
+                    error = exception
+                    continue
+                if candidate is None:
+                    continue
+                print(candidate)
+                if self.converter is None or (self.max_paths is not None and candidate.path_count <= self.max_paths):
+                    return candidate
+                finished.append(candidate)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        if finished:
+            return min(finished, key=lambda candidate: candidate.rank)
+        if error is not None:
+            raise error
+        return None
+
+    # -------------------------------
+    # Public Methods
+    # -------------------------------
+    async def continue_image(self, image_bytes: bytes, prompt: str) -> Optional[bytes]:
+        """
+        Line art continuing an image, all in memory: from the cache, else from Gemini.
+
+        Args:
+            image_bytes: Encoded control image (PNG, JPG, etc.)
+            prompt: Prompt text
+
+        Returns:
+            The generated image as encoded bytes, None if no image was generated
+
+        Raises:
+            errors.APIError: If every candidate failed (auth, or retries exhausted)
+            asyncio.TimeoutError: If every candidate ran out of attempts on deadlines
+        """
+        key = self.cache_key(image_bytes, prompt)
+        if self.cache is not None:
+            found = self.cache.get_entry(key)
+            if found is not None:
+                entry, _ = found
+                print(f"💾 Line art served from cache ({key[:12]})")
+                return (entry / self.IMAGE_NAME).read_bytes()
+
+        upload = prepare_upload(Image.open(io.BytesIO(image_bytes)), self.upload_max_size_in_pixels)
+        candidate = await self.generate_candidates(prompt, upload)
+        if candidate is None:
+            return None
+        if self.cache is not None:
+            self._store(key, upload, candidate)
+        return candidate.image_bytes
+
+    async def generate_async(self, control_image_path: Path, continuation_prompt_path: Path) -> Optional[Path]:
         """
         Generate line art continuation based on control image and prompt.
 
@@ -31,25 +329,76 @@ class LineArtGenerator:
 
         Raises:
             FileNotFoundError: If the control image or prompt file doesn't exist
-            errors.APIError: If API call fails (network, auth, rate limit, etc.)
+            errors.APIError: If every candidate failed (auth, or retries exhausted)
+            asyncio.TimeoutError: If every candidate ran out of attempts on deadlines
         """
+        control_image_path = Path(control_image_path)
         try:
-            control_image = Image.open(str(control_image_path))
+            image_bytes = control_image_path.read_bytes()
         except FileNotFoundError:
             raise FileNotFoundError(f"Control image {control_image_path} does not exist.")
 
-        response = self.client.models.generate_content(model=AI_MODEL,
-                                                       contents=[
-                                                           _read_file_as_string(continuation_prompt_path),
-                                                           control_image,
-                                                       ]
-                                                       )
+        prompt = _read_file_as_string(continuation_prompt_path)
+        generated = await self.continue_image(image_bytes, prompt)
+        if generated is None:
+            return None
 
-        output_path = ASSET_DIR / (control_image_path.stem + "_continuation.png")
-        for part in response.parts:
-            if part.inline_data is not None:
-                generated_image = part.as_image()
-                generated_image.save(str(output_path))
-                return output_path
+        output_path = self.output_directory / (control_image_path.stem + "_continuation.png")
+        output_path.write_bytes(generated)
+        return output_path
 
-        return None
+    def generate(self, control_image_path: Path, continuation_prompt_path: Path) -> Optional[Path]:
+        """generate_async() for callers without an event loop."""
+        return asyncio.run(self.generate_async(control_image_path, continuation_prompt_path))
+
+
+# -------------------------------
+# Standalone CLI Interface
+# -------------------------------
+if __name__ == "__main__":
+    from config.config import (
+        AI_CACHE_DIR, AI_CACHE_MAX_SIZE_IN_BYTES, CANVAS_HEIGHT_IN_MILLIMETERS, CANVAS_WIDTH_IN_MILLIMETERS,
+        FIRMWARE_SETTINGS_PATH, GCODE_DIR
+    )
+
+    parser = argparse.ArgumentParser(description="Continue a line drawing with Gemini.")
+    parser.add_argument("control_image", type=Path, help="Image to continue")
+    parser.add_argument("prompt", type=Path, help="Prompt file")
+    parser.add_argument("--offline", action="store_true", help="Answer with the local GeminiEmulator")
+    parser.add_argument("--no-cache", action="store_true", help="Always call the API")
+    parser.add_argument("--candidates", type=int, default=AI_CANDIDATES,
+                        help=f"Concurrent requests (default: {AI_CANDIDATES})")
+    parser.add_argument("--timeout", type=float, default=AI_REQUEST_TIMEOUT_IN_SECONDS,
+                        help=f"Deadline of one attempt in seconds (default: {AI_REQUEST_TIMEOUT_IN_SECONDS})")
+    parser.add_argument("--no-score", action="store_true",
+                        help="Take the first image instead of scoring candidates by plottability")
+    parser.add_argument("--max-paths", type=int, default=AI_MAX_PATHS,
+                        help=f"Accept the first candidate with at most this many paths, 0 to rank all "
+                             f"(default: {AI_MAX_PATHS})")
+    args = parser.parse_args()
+
+    stand_in = None
+    if args.offline:
+        from GeminiEmulator import GeminiEmulator
+        stand_in = GeminiEmulator(latency_in_seconds=2.0, latency_jitter_in_seconds=8.0,
+                                  failure_rate=0.2, hang_rate=0.1)
+
+    converter = None
+    if not args.no_score:
+        from GCodeConverter import GCodeConverter
+        from GrblSettings import GrblSettings
+        converter = GCodeConverter(ASSET_DIR, GCODE_DIR, CANVAS_WIDTH_IN_MILLIMETERS, CANVAS_HEIGHT_IN_MILLIMETERS,
+                                   grbl_settings=GrblSettings.from_export(FIRMWARE_SETTINGS_PATH))
+
+    generator = LineArtGenerator(
+        client=stand_in,
+        cache=None if args.no_cache else ArtifactCache(AI_CACHE_DIR, AI_CACHE_MAX_SIZE_IN_BYTES),
+        candidates=args.candidates,
+        request_timeout_in_seconds=args.timeout,
+        converter=converter,
+        max_paths=args.max_paths or None,
+    )
+    started = time.perf_counter()
+    result = generator.generate(args.control_image, args.prompt)
+    print(f"{'✅ Line art generated: ' + str(result) if result else 'No image generated by AI.'} "
+          f"({time.perf_counter() - started:.2f}s)")
@@ -2,30 +2,127 @@ import cv2
 import numpy as np
 from skimage.morphology import skeletonize
 
+from PathCollection import PathCollection
+
 ARUCO_DICT = cv2.aruco.getPredefinedDictionary(cv2.aruco.DICT_5X5_50)
 
+# Printed side length of the markers (0.75 in, as aruco/create_pdf.py lays them out)
+MARKER_SIZE_IN_MILLIMETERS = 19.05
+
+# Direction from a marker's center to each of its corners, in ArUco's corner
+# order (TL, TR, BR, BL) for a marker printed upright on the sheet
+MARKER_CORNER_DIRECTIONS = np.float32([(-1, -1), (1, -1), (1, 1), (-1, 1)])
+
+# (dy, dx) offsets of the 8-connected neighborhood
+NEIGHBOR_OFFSETS = [(-1, -1), (-1, 0), (-1, 1),
+                    (0, -1),           (0, 1),
+                    (1, -1),  (1, 0),  (1, 1)]
+
 class LineExtractor:
     def __init__(self,
                  workspace_width_px=2200,
                  workspace_height_px=1700,
-                 marker_ids=(0, 1, 2, 3)):
+                 marker_ids=(0, 1, 2, 3),
+                 homography_tolerance_px=2.0,
+                 tracking_margin=0.75,
+                 detection_max_side=960,
+                 marker_size_mm=MARKER_SIZE_IN_MILLIMETERS):
         """
         marker_ids: (TL, TR, BL, BR)
+        marker_size_mm: printed side length of the markers, whose centers sit
+            on the workspace corners
+        homography_tolerance_px: reuse the cached homography while every marker
+            corner stays within this many pixels of where it was when fitted
+        tracking_margin: padding around each last known marker, as a fraction
+            of its size, for the ROI it is re-detected in
+        detection_max_side: full-frame searches run on a copy downscaled to
+            this longest side, then corners are refined at full resolution
+            (None searches the full-resolution frame)
         """
         self.W = workspace_width_px
         self.H = workspace_height_px
         self.marker_ids = marker_ids
+        self.homography_tolerance_px = homography_tolerance_px
+        self.tracking_margin = tracking_margin
+        self.detection_max_side = detection_max_side
+        self.marker_size_mm = marker_size_mm
+
+        # One detector for every capture instead of the legacy per-call function
+        self.detector = cv2.aruco.ArucoDetector(ARUCO_DICT, cv2.aruco.DetectorParameters())
+
+        # Marker corners the cached homography was fitted to: {marker_id: (4, 2)}
+        self._tracked_corners = None
+        self._cached_homography = None
+
+        # RMS distance (workspace px) between the 16 marker corners, as mapped
+        # by the last fitted homography, and where the printed sheet puts them
+        self.last_reprojection_error = None
 
     # ----------------------------------------------------------------------
     # MARKER DETECTION + HOMOGRAPHY
     # ----------------------------------------------------------------------
-    def _sort_markers(self, corners, ids):
+    def _detect_markers(self, image, offset=(0, 0)):
+        """Returns {marker_id: (4, 2) corners} in frame coordinates."""
+        corners, ids, _ = self.detector.detectMarkers(image)
+        if ids is None:
+            return {}
+        return {
+            int(mid): corner.reshape(4, 2) + np.float32(offset)
+            for corner, mid in zip(corners, ids.flatten())
+        }
+
+    def _detect_markers_coarse(self, gray):
+        """Find markers on a downscaled copy, then refine every corner at full resolution."""
+        h, w = gray.shape[:2]
+        scale = 1.0
+        if self.detection_max_side is not None:
+            scale = min(1.0, self.detection_max_side / max(h, w))
+        if scale == 1.0:
+            return self._refine_corners(gray, self._detect_markers(gray), window=3)
+
+        small = cv2.resize(gray, (round(w * scale), round(h * scale)), interpolation=cv2.INTER_AREA)
+        markers = {
+            mid: corners / np.float32(scale)
+            for mid, corners in self._detect_markers(small).items()
+        }
+        # Coarse corners are off by up to a downscaled pixel, so search that far
+        return self._refine_corners(gray, markers, window=int(np.ceil(1.0 / scale)) + 2)
+
+    @staticmethod
+    def _refine_corners(gray, markers, window):
+        """Subpixel-refine all marker corners at full resolution in one cornerSubPix call."""
+        if not markers:
+            return markers
+        ids = list(markers)
+        corners = np.concatenate([markers[mid] for mid in ids]).reshape(-1, 1, 2).astype(np.float32)
+        criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 30, 0.01)
+        cv2.cornerSubPix(gray, corners, (window, window), (-1, -1), criteria)
+        corners = corners.reshape(-1, 4, 2)
+        return {mid: corners[i] for i, mid in enumerate(ids)}
+
+    def _track_markers(self, frame):
+        """
+        Re-detect each marker only in a small ROI around its last known position.
+
+        Returns None as soon as one marker is lost, so the caller falls back to
+        a full-frame search.
+        """
+        h, w = frame.shape[:2]
         found = {}
-        for corner, mid in zip(corners, ids.flatten()):
-            c = corner[0]
-            cx = np.mean(c[:, 0])
-            cy = np.mean(c[:, 1])
-            found[mid] = (cx, cy)
+        for mid, corners in self._tracked_corners.items():
+            (x0, y0), (x1, y1) = corners.min(axis=0), corners.max(axis=0)
+            pad = max(x1 - x0, y1 - y0) * self.tracking_margin
+            x0, y0 = max(int(x0 - pad), 0), max(int(y0 - pad), 0)
+            x1, y1 = min(int(x1 + pad) + 1, w), min(int(y1 + pad) + 1, h)
+
+            detected = self._detect_markers(frame[y0:y1, x0:x1], offset=(x0, y0))
+            if mid not in detected:
+                return None
+            found[mid] = detected[mid]
+        return self._refine_corners(frame, found, window=3)
+
+    def _sort_markers(self, markers):
+        found = {mid: tuple(corners.mean(axis=0)) for mid, corners in markers.items()}
 
         TL, TR, BL, BR = self.marker_ids
         missing = [m for m in (TL, TR, BL, BR) if m not in found]
@@ -39,28 +136,62 @@ class LineExtractor:
             "BR": found[BR]
         }
 
-    def _compute_homography(self, frame):
-        corners, ids, _ = cv2.aruco.detectMarkers(frame, ARUCO_DICT)
-        if ids is None or len(ids) < 4:
-            raise ValueError("Not all 4 ArUco markers detected.")
+    def reset_homography_cache(self):
+        """Forget the tracked markers, e.g. after moving the camera or the sheet."""
+        self._tracked_corners = None
+        self._cached_homography = None
 
-        sorted_pts = self._sort_markers(corners, ids)
+    def _fit_homography(self, markers):
+        """
+        Fit the homography to all 16 marker corners instead of only the 4 centers.
 
-        src = np.float32([
-            sorted_pts["TL"],
-            sorted_pts["TR"],
-            sorted_pts["BL"],
-            sorted_pts["BR"]
-        ])
+        Each marker's center sits on a workspace corner and its corners lie
+        half the printed marker size away from it, so every detected corner
+        has a known target in workspace pixels.
+        """
+        self._sort_markers(markers)  # Raises if a marker is missing
 
-        dst = np.float32([
+        centers = np.float32([
             [0, 0],
             [self.W, 0],
             [0, self.H],
             [self.W, self.H]
         ])
+        half_size = 0.5 * self.marker_size_mm / np.float32(self.mm_per_px)
+        targets = np.repeat(centers, 4, axis=0) + np.tile(MARKER_CORNER_DIRECTIONS, (4, 1)) * half_size
+
+        corners = np.concatenate([markers[mid] for mid in self.marker_ids])
+        H, _ = cv2.findHomography(corners, targets)
 
-        H, _ = cv2.findHomography(src, dst)
+        fitted = cv2.perspectiveTransform(corners.reshape(-1, 1, 2), H).reshape(-1, 2)
+        self.last_reprojection_error = float(np.sqrt(np.mean(np.sum((fitted - targets) ** 2, axis=1))))
+        return H
+
+    def _compute_homography(self, frame):
+        gray = frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+        markers = None
+        if self._tracked_corners is not None:
+            markers = self._track_markers(gray)
+
+        if markers is not None:
+            drift = max(
+                np.abs(markers[mid] - corners).max()
+                for mid, corners in self._tracked_corners.items()
+            )
+            if drift <= self.homography_tolerance_px:
+                return self._cached_homography
+        else:
+            markers = self._detect_markers_coarse(gray)
+            if len(markers) < 4:
+                raise ValueError("Not all 4 ArUco markers detected.")
+
+        H = self._fit_homography(markers)
+        print(f"📐 Homography fitted to 16 marker corners: "
+              f"RMS reprojection error {self.last_reprojection_error:.2f} px")
+
+        self._tracked_corners = {mid: markers[mid] for mid in self.marker_ids}
+        self._cached_homography = H
         return H
 
     # ----------------------------------------------------------------------
@@ -83,63 +214,158 @@ class LineExtractor:
     # VECTORIZE: Convert skeleton pixels → polylines
     # ----------------------------------------------------------------------
     def _trace_paths(self, mask):
+        """
+        Walk the skeleton as a graph and return ordered polylines.
+
+        Neighbors, degrees, endpoints and junctions are found with NumPy
+        lookups over the skeleton pixels only. Diagonal links that are already
+        covered by two orthogonal steps are dropped so staircase corners do
+        not count as junctions. Strokes run endpoint → endpoint (or around a
+        loop) and are split at junctions. Touching junction pixels form one
+        junction node (the cluster pixel nearest its centroid), which every
+        stroke meeting the cluster ends on, so strokes stay connected however
+        the branches are spread over the cluster.
+        """
         h, w = mask.shape
-        visited = np.zeros_like(mask, dtype=bool)
-        paths = []
+        ys, xs = np.nonzero(mask)
+        n = len(xs)
+        if n == 0:
+            return PathCollection.empty()
+
+        # Pixel id lookup with a 1px border so every neighbor index is valid
+        ids = np.full((h + 2, w + 2), -1, dtype=np.int32)
+        ids[ys + 1, xs + 1] = np.arange(n)
+
+        nbr = np.stack([ids[ys + 1 + dy, xs + 1 + dx] for dy, dx in NEIGHBOR_OFFSETS], axis=1)
+        present = nbr >= 0
 
-        # Offsets for 8-connected neighbors
-        nbrs = [(-1,-1), (-1,0), (-1,1),
-                 (0,-1),         (0,1),
-                 (1,-1),  (1,0), (1,1)]
+        # A diagonal link is redundant when either orthogonal pixel between them is set
+        for k, (dy, dx) in enumerate(NEIGHBOR_OFFSETS):
+            if dy and dx:
+                vertical = NEIGHBOR_OFFSETS.index((dy, 0))
+                horizontal = NEIGHBOR_OFFSETS.index((0, dx))
+                present[:, k] &= ~(present[:, vertical] | present[:, horizontal])
+        nbr = np.where(present, nbr, -1)
 
-        def neighbors(x, y):
-            out = []
-            for dx, dy in nbrs:
-                nx, ny = x + dx, y + dy
-                if 0 <= nx < w and 0 <= ny < h:
-                    if mask[ny, nx] > 0:
-                        out.append((nx, ny))
-            return out
+        degree = present.sum(axis=1)
+        junction = degree >= 3
 
-        for y in range(h):
-            for x in range(w):
-                if mask[y, x] == 0 or visited[y, x]:
-                    continue
+        # Split the graph at junctions: chain pixels keep at most two chain neighbors
+        is_chain_nbr = (nbr >= 0) & ~junction[nbr]
+        chain_nbr = np.sort(np.where(is_chain_nbr, nbr, -1), axis=1)[:, ::-1]
+        first, second = chain_nbr[:, 0], chain_nbr[:, 1]
+        chain_degree = is_chain_nbr.sum(axis=1)
 
-                # Start a new stroke
-                stack = [(x, y)]
-                stroke = []
+        # Merge 8-connected junction pixels into one node each
+        junction_mask = np.zeros((h, w), dtype=np.uint8)
+        junction_mask[ys[junction], xs[junction]] = 1
+        _, labels = cv2.connectedComponents(junction_mask, connectivity=8)
+        cluster = labels[ys, xs]
+        count = np.bincount(cluster)
+        with np.errstate(invalid="ignore"):
+            center_x = np.bincount(cluster, xs) / count
+            center_y = np.bincount(cluster, ys) / count
+        distance = (xs - center_x[cluster]) ** 2 + (ys - center_y[cluster]) ** 2
+        by_distance = np.lexsort((distance, cluster))
+        representative = np.full(len(count), -1, dtype=np.int64)
+        representative[cluster[by_distance[::-1]]] = by_distance[::-1]  # Nearest one written last
+        node = np.where(junction, representative[cluster], -1)
 
-                while stack:
-                    px, py = stack.pop()
-                    if visited[py, px]:
-                        continue
+        # A non-junction pixel (degree <= 2) touches at most two junction nodes
+        junction_nbrs = np.where((nbr >= 0) & junction[nbr], node[nbr], -1)
+        junction_a = junction_nbrs.max(axis=1)
+        junction_b = np.where(junction_nbrs != junction_a[:, None], junction_nbrs, -1).max(axis=1)
 
-                    visited[py, px] = True
-                    stroke.append((px, py))
+        first, second = first.tolist(), second.tolist()
+        junction_a, junction_b = junction_a.tolist(), junction_b.tolist()
+        visited = bytearray(junction.astype(np.uint8).tobytes())
 
-                    for nx, ny in neighbors(px, py):
-                        if not visited[ny, nx]:
-                            stack.append((nx, ny))
+        def walk(start):
+            chain = [start]
+            visited[start] = 1
+            current = start
+            while True:
+                a, b = first[current], second[current]
+                if a >= 0 and not visited[a]:
+                    current = a
+                elif b >= 0 and not visited[b]:
+                    current = b
+                else:
+                    return chain
+                visited[current] = 1
+                chain.append(current)
 
-                if len(stroke) > 3:
-                    paths.append(stroke)
+        def extend_into_junctions(chain):
+            # Strokes end on the junction nodes they meet at; a single pixel can bridge two
+            head = junction_a[chain[0]]
+            tail = junction_b[chain[0]] if len(chain) == 1 else junction_a[chain[-1]]
+            if head >= 0:
+                chain.insert(0, head)
+            if tail >= 0 and (tail != head or len(chain) > 2):
+                chain.append(tail)
+            # Short strokes are noise, unless they link two junctions
+            links = head >= 0 and tail >= 0 and head != tail
+            return chain if len(chain) > 3 or links else None
 
-        return paths
+        chains = []
+
+        # Open strokes start at endpoints (or at pixels next to a junction)
+        for start in np.flatnonzero(~junction & (chain_degree <= 1)).tolist():
+            if not visited[start]:
+                chain = extend_into_junctions(walk(start))
+                if chain is not None:
+                    chains.append(chain)
+
+        # Whatever is left unvisited are closed loops
+        for start in np.flatnonzero(~junction).tolist():
+            if not visited[start]:
+                chain = walk(start)
+                chain.append(chain[0])
+                if len(chain) > 3:
+                    chains.append(chain)
+
+        return PathCollection.from_index_chains(np.column_stack((xs, ys)), chains)
 
     # ----------------------------------------------------------------------
     # PUBLIC API CALL
     # ----------------------------------------------------------------------
-    def extract(self, image_path):
+    @property
+    def mm_per_px(self):
+        """(x, y) scale from workspace pixels to mm (your real workspace size)."""
+        return 220 / self.W, 170 / self.H
+
+    @staticmethod
+    def _load_frame(image):
+        """Accept a BGR/gray frame, an encoded image buffer, or a file path."""
+        if isinstance(image, np.ndarray):
+            if image.ndim == 2:
+                return cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+            return image
+
+        if isinstance(image, (bytes, bytearray, memoryview)):
+            frame = cv2.imdecode(np.frombuffer(image, dtype=np.uint8), cv2.IMREAD_COLOR)
+            if frame is None:
+                raise ValueError("Could not decode image buffer.")
+            return frame
+
+        frame = cv2.imread(str(image))
+        if frame is None:
+            raise FileNotFoundError(image)
+        return frame
+
+    def extract(self, image):
         """
+        image: a camera frame (NumPy array, as returned by capture_image),
+               an encoded image buffer (bytes), or an image file path
+
         Returns:
             warped_image   (top-down corrected view)
-            paths_px       (list of stroke paths in pixel coords)
-            paths_mm       (list of stroke paths converted to mm)
+            paths_px       (PathCollection of stroke paths in pixel coords)
+            paths_mm       (PathCollection of stroke paths converted to mm)
+
+        Use paths.to_lists() for the older list-of-tuples form.
         """
-        frame = cv2.imread(image_path)
-        if frame is None:
-            raise FileNotFoundError(image_path)
+        frame = self._load_frame(image)
 
         H = self._compute_homography(frame)
         warped = cv2.warpPerspective(frame, H, (self.W, self.H))
@@ -147,13 +373,6 @@ class LineExtractor:
         mask = self._extract_line_mask(warped)
         paths_px = self._trace_paths(mask)
 
-        # Convert pixels → mm (scale to your real workspace size)
-        MM_PER_PX_X = 220 / self.W
-        MM_PER_PX_Y = 170 / self.H
-
-        paths_mm = [
-            [(x * MM_PER_PX_X, y * MM_PER_PX_Y) for (x, y) in stroke]
-            for stroke in paths_px
-        ]
+        paths_mm = paths_px.scaled(*self.mm_per_px)
 
         return warped, paths_px, paths_mm
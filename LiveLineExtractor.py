@@ -0,0 +1,350 @@
+"""
+DrawMate Live Line Extractor
+----------------------------
+Runs the LineExtractor pipeline continuously on camera frames so the operator
+gets a live preview of what will be plotted.
+
+Stages run as a producer/consumer chain on worker threads:
+
+    capture → homography + warp → line mask → trace → latest result
+
+OpenCV and skimage release the GIL, so the stages of consecutive frames
+overlap, and the mask stage (the most expensive one) can run several workers.
+Every hand-off holds only the newest frame: when a stage falls behind, older
+frames are dropped instead of queued, so latency stays bounded.
+
+Usage (standalone):
+    python LiveLineExtractor.py                 # webcam 0
+    python LiveLineExtractor.py --source snapshot.jpg --seconds 10
+    python LiveLineExtractor.py --source capture.avi --show
+
+Usage (imported):
+    with CameraSession(0) as camera, LiveLineExtractor(camera) as live:
+        result = live.wait_for_result(0, timeout=2.0)
+        print(result.paths_mm, live.stats())
+
+Author: DrawMate Project
+"""
+
+import argparse
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+import cv2
+import numpy as np
+
+from LineExtractor import LineExtractor
+from PathCollection import PathCollection
+from camera.camera_session import CameraSession, SyntheticSource
+
+STAGES = ("homography", "mask", "trace")
+STATS_WINDOW = 30
+
+
+@dataclass
+class _Work:
+    """A frame travelling through the pipeline."""
+
+    frame_number: int
+    captured_at: float
+    data: object
+    timings: dict = field(default_factory=dict)
+
+
+@dataclass(frozen=True)
+class LiveResult:
+    """Extraction result for one camera frame."""
+
+    frame_number: int
+    warped: np.ndarray
+    paths_px: PathCollection
+    paths_mm: PathCollection
+    latency: float   # Seconds from capture to result
+    timings: dict    # Seconds spent in each stage
+
+
+class _LatestSlot:
+    """Hand-off between stages that keeps only the newest frame."""
+
+    def __init__(self):
+        self._work = None
+        self._closed = False
+        self._condition = threading.Condition()
+        self.dropped = 0
+
+    def put(self, work: _Work):
+        with self._condition:
+            if self._work is not None:
+                self.dropped += 1
+                # Workers can finish out of order; never replace newer with older
+                if self._work.frame_number > work.frame_number:
+                    return
+            self._work = work
+            self._condition.notify()
+
+    def get(self) -> Optional[_Work]:
+        """Block for the next frame. Returns None once the slot is closed."""
+        with self._condition:
+            self._condition.wait_for(lambda: self._work is not None or self._closed)
+            work, self._work = self._work, None
+            return work
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+
+class LiveLineExtractor:
+    """Continuous capture → homography → mask → trace pipeline on worker threads."""
+
+    def __init__(self,
+                 camera: CameraSession,
+                 extractor: Optional[LineExtractor] = None,
+                 mask_workers: int = 2,
+                 on_result: Optional[Callable[[LiveResult], None]] = None):
+        """
+        Args:
+            camera: Open (or openable) camera session to read frames from
+            extractor: LineExtractor whose homography cache and settings are used
+            mask_workers: Threads for the mask stage, the most expensive one
+            on_result: Called from the trace thread with every new LiveResult
+        """
+        self.camera = camera
+        self.extractor = extractor or LineExtractor()
+        self.mask_workers = mask_workers
+        self.on_result = on_result
+
+        self._slots = {stage: _LatestSlot() for stage in STAGES}
+        self._threads = []
+        self._running = False
+
+        self._result = None
+        self._result_condition = threading.Condition()
+        self._stage_times = {stage: deque(maxlen=STATS_WINDOW) for stage in STAGES}
+        self._latencies = deque(maxlen=STATS_WINDOW)
+        self._result_times = deque(maxlen=STATS_WINDOW)
+        self._frames_captured = 0
+        # Per stage, incremented by all of its workers
+        self._frames_failed = {stage: 0 for stage in STAGES}
+        self._failures_lock = threading.Lock()
+        self._logged_failures = set()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    # -------------------------------
+    # Stages
+    # -------------------------------
+    def _capture_loop(self):
+        last_number = 0
+        while self._running:
+            frame = self.camera.wait_for_frame(last_number, timeout=0.5)
+            if frame is None:
+                continue
+            last_number, image = frame
+            self._frames_captured += 1
+            self._slots["homography"].put(_Work(last_number, time.monotonic(), image))
+
+    def _homography_stage(self, work: _Work):
+        # Stateful (tracked homography), so this stage has a single worker
+        H = self.extractor._compute_homography(work.data)
+        return cv2.warpPerspective(work.data, H, (self.extractor.W, self.extractor.H))
+
+    def _mask_stage(self, work: _Work):
+        return work.data, self.extractor._extract_line_mask(work.data)
+
+    def _trace_stage(self, work: _Work):
+        warped, mask = work.data
+        return warped, self.extractor._trace_paths(mask)
+
+    def _run_stage(self, stage: str, process: Callable, next_stage: Optional[str]):
+        slot = self._slots[stage]
+        while True:
+            work = slot.get()
+            if work is None:
+                return
+
+            started = time.monotonic()
+            try:
+                work.data = process(work)
+            except Exception as e:
+                # ValueError: markers not visible in this frame. Anything else (e.g. a cv2.error
+                # from a degenerate homography) is reported once; either way the frame is skipped.
+                self._count_failure(stage, e)
+                continue
+            elapsed = time.monotonic() - started
+            work.timings[stage] = elapsed
+            self._stage_times[stage].append(elapsed)
+
+            if next_stage is not None:
+                self._slots[next_stage].put(work)
+            else:
+                self._publish(work)
+
+    def _count_failure(self, stage: str, error: Exception):
+        with self._failures_lock:
+            self._frames_failed[stage] += 1
+            if isinstance(error, ValueError) or (stage, type(error)) in self._logged_failures:
+                return
+            self._logged_failures.add((stage, type(error)))
+        print(f"\n[!] {stage} stage failed on a frame ({type(error).__name__}: {str(error).strip()}). "
+              f"Skipping such frames.")
+
+    def _publish(self, work: _Work):
+        warped, paths_px = work.data
+        mm_per_px_x, mm_per_px_y = self.extractor.mm_per_px
+        result = LiveResult(
+            frame_number=work.frame_number,
+            warped=warped,
+            paths_px=paths_px,
+            paths_mm=paths_px.scaled(mm_per_px_x, mm_per_px_y),
+            latency=time.monotonic() - work.captured_at,
+            timings=dict(work.timings),
+        )
+
+        with self._result_condition:
+            if self._result is not None and self._result.frame_number > result.frame_number:
+                return
+            self._result = result
+            self._latencies.append(result.latency)
+            self._result_times.append(time.monotonic())
+            self._result_condition.notify_all()
+
+        if self.on_result is not None:
+            self.on_result(result)
+
+    # -------------------------------
+    # Public Methods
+    # -------------------------------
+    def start(self):
+        if self._running:
+            return self
+        self.camera.open()
+        self._running = True
+        self._slots = {stage: _LatestSlot() for stage in STAGES}
+
+        workers = [
+            ("homography", self._homography_stage, "mask", 1),
+            ("mask", self._mask_stage, "trace", self.mask_workers),
+            ("trace", self._trace_stage, None, 1),
+        ]
+        self._threads = [threading.Thread(target=self._capture_loop, name="live-capture", daemon=True)]
+        for stage, process, next_stage, count in workers:
+            for index in range(count):
+                self._threads.append(threading.Thread(
+                    target=self._run_stage, args=(stage, process, next_stage),
+                    name=f"live-{stage}-{index}", daemon=True,
+                ))
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def stop(self):
+        self._running = False
+        for slot in self._slots.values():
+            slot.close()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def latest(self) -> Optional[LiveResult]:
+        with self._result_condition:
+            return self._result
+
+    def wait_for_result(self, after_frame_number: int, timeout: Optional[float] = None) -> Optional[LiveResult]:
+        """Block until a result for a frame newer than after_frame_number exists (None on timeout)."""
+        with self._result_condition:
+            self._result_condition.wait_for(
+                lambda: self._result is not None and self._result.frame_number > after_frame_number,
+                timeout=timeout,
+            )
+            if self._result is None or self._result.frame_number <= after_frame_number:
+                return None
+            return self._result
+
+    def stats(self) -> dict:
+        """
+        Mean per-stage and end-to-end latency (ms), sustained fps, frame counters
+        and the RMS reprojection error (workspace px) of the current homography.
+        """
+        with self._result_condition:
+            times = list(self._result_times)
+            latencies = list(self._latencies)
+        with self._failures_lock:
+            failed = dict(self._frames_failed)
+
+        fps = 0.0
+        if len(times) >= 2 and times[-1] > times[0]:
+            fps = (len(times) - 1) / (times[-1] - times[0])
+
+        return {
+            "fps": fps,
+            "camera_fps": self.camera.fps,
+            "latency_ms": 1000 * float(np.mean(latencies)) if latencies else 0.0,
+            "stage_ms": {
+                stage: 1000 * float(np.mean(samples)) if samples else 0.0
+                for stage, samples in self._stage_times.items()
+            },
+            "frames_captured": self._frames_captured,
+            "frames_failed": sum(failed.values()),
+            "stage_failures": failed,
+            "frames_dropped": sum(slot.dropped for slot in self._slots.values()),
+            "reprojection_px": self.extractor.last_reprojection_error,
+        }
+
+
+# -------------------------------
+# Standalone CLI Interface
+# -------------------------------
+def _open_source(source: str):
+    """Webcam index, still image (served as a synthetic camera) or video file."""
+    if source.isdigit():
+        return int(source)
+    image = cv2.imread(source)
+    if image is not None:
+        return SyntheticSource(image.shape[1], image.shape[0], fps=30.0, frame=image)
+    return source
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Live line-extraction preview.")
+    parser.add_argument("--source", default="0", help="Webcam index, image or video file (default: 0)")
+    parser.add_argument("--seconds", type=float, default=None, help="Stop after this many seconds")
+    parser.add_argument("--mask-workers", type=int, default=2, help="Threads for the mask stage (default: 2)")
+    parser.add_argument("--show", action="store_true", help="Show the traced strokes in a window")
+    args = parser.parse_args()
+
+    with CameraSession(_open_source(args.source)) as camera, \
+            LiveLineExtractor(camera, mask_workers=args.mask_workers) as live:
+        started = time.monotonic()
+        last_frame = 0
+        try:
+            while args.seconds is None or time.monotonic() - started < args.seconds:
+                result = live.wait_for_result(last_frame, timeout=1.0)
+                if result is None:
+                    continue
+                last_frame = result.frame_number
+
+                if args.show:
+                    preview = result.warped.copy()
+                    for stroke in result.paths_px:
+                        cv2.polylines(preview, [stroke.astype(np.int32)], False, (0, 0, 255), 2)
+                    cv2.imshow("DrawMate live preview", cv2.resize(preview, None, fx=0.4, fy=0.4))
+                    if cv2.waitKey(1) & 0xFF == ord("q"):
+                        break
+
+                stats = live.stats()
+                stages = " ".join(f"{stage} {ms:5.1f}ms" for stage, ms in stats["stage_ms"].items())
+                print(f"\r🎥 {stats['fps']:4.1f} fps | latency {stats['latency_ms']:6.1f}ms | {stages} | "
+                      f"{len(result.paths_px)} strokes | dropped {stats['frames_dropped']}", end="", flush=True)
+        except KeyboardInterrupt:
+            pass
+        print()
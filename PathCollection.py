@@ -0,0 +1,208 @@
+"""
+DrawMate Path Collection
+------------------------
+Compact ragged-array storage for strokes: every point of every stroke lives in
+one contiguous float32 (N, 2) array, and an int64 offsets array marks where
+each stroke starts. Stroke i is coords[offsets[i]:offsets[i + 1]], a zero-copy
+view, and scaling or transforming all strokes is one NumPy operation.
+
+Usage:
+    paths = PathCollection.from_lists([[(0, 0), (1, 0), (1, 1)], [(5, 5), (6, 6)]])
+    paths_mm = paths.scaled(0.1, 0.1)
+    for stroke in paths_mm:      # (n, 2) float32 views
+        ...
+    paths_mm.to_lists()          # back to lists of (x, y) tuples
+
+Author: DrawMate Project
+"""
+
+from itertools import chain
+from typing import Iterable
+
+import cv2
+import numpy as np
+
+
+class PathCollection:
+    """Strokes stored as one coordinate array plus stroke offsets."""
+
+    def __init__(self, coords: np.ndarray, offsets: np.ndarray):
+        """
+        Args:
+            coords: (N, 2) array of x, y points of all strokes back to back
+            offsets: (n + 1,) array, stroke i spans coords[offsets[i]:offsets[i + 1]]
+        """
+        self.coords = np.ascontiguousarray(coords, dtype=np.float32).reshape(-1, 2)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        if self.offsets[0] != 0 or self.offsets[-1] != len(self.coords):
+            raise ValueError("Offsets must start at 0 and end at the number of points.")
+
+    # -------------------------------
+    # Constructors
+    # -------------------------------
+    @classmethod
+    def empty(cls) -> "PathCollection":
+        return cls(np.empty((0, 2), dtype=np.float32), np.zeros(1, dtype=np.int64))
+
+    @classmethod
+    def from_lists(cls, paths: Iterable) -> "PathCollection":
+        """Build from lists of (x, y) tuples or (n, 2) arrays."""
+        paths = [np.asarray(path, dtype=np.float32).reshape(-1, 2) for path in paths]
+        if not paths:
+            return cls.empty()
+        offsets = np.concatenate(([0], np.cumsum([len(path) for path in paths])))
+        return cls(np.concatenate(paths), offsets)
+
+    @classmethod
+    def from_complex(cls, lines: Iterable) -> "PathCollection":
+        """Build from complex arrays (vpype's line format)."""
+        return cls.from_lists([np.column_stack((line.real, line.imag)) for line in lines])
+
+    @classmethod
+    def from_index_chains(cls, points: np.ndarray, chains: list) -> "PathCollection":
+        """Build from lists of indices into points, gathering every coordinate in one step."""
+        if not chains:
+            return cls.empty()
+        indices = np.fromiter(chain.from_iterable(chains), dtype=np.int64)
+        offsets = np.concatenate(([0], np.cumsum([len(c) for c in chains])))
+        return cls(points[indices], offsets)
+
+    @classmethod
+    def concatenate(cls, collections: Iterable) -> "PathCollection":
+        """The strokes of several collections, one after the other."""
+        collections = [paths for paths in collections if len(paths)]
+        if not collections:
+            return cls.empty()
+        starts = np.cumsum([0] + [paths.point_count for paths in collections[:-1]])
+        offsets = np.concatenate([[0]] + [paths.offsets[1:] + start for paths, start in zip(collections, starts)])
+        return cls(np.concatenate([paths.coords for paths in collections]), offsets)
+
+    # -------------------------------
+    # Sequence Protocol
+    # -------------------------------
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index: int) -> np.ndarray:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("Path index out of range.")
+        return self.coords[self.offsets[index]:self.offsets[index + 1]]
+
+    def __iter__(self):
+        for start, end in zip(self.offsets[:-1], self.offsets[1:]):
+            yield self.coords[start:end]
+
+    def __repr__(self) -> str:
+        return f"PathCollection({len(self)} paths, {self.point_count} points)"
+
+    # -------------------------------
+    # Properties
+    # -------------------------------
+    @property
+    def point_count(self) -> int:
+        return len(self.coords)
+
+    @property
+    def point_counts(self) -> np.ndarray:
+        """Number of points in each stroke."""
+        return np.diff(self.offsets)
+
+    @property
+    def path_lengths(self) -> np.ndarray:
+        """Polyline length of each stroke (in coordinate units)."""
+        step = np.linalg.norm(np.diff(self.coords, axis=0), axis=1)
+        # Drop the jumps from the end of one stroke to the start of the next
+        step = np.concatenate((step, [0.0]))
+        step[self.offsets[1:-1] - 1] = 0.0
+        lengths = np.zeros(len(self))
+        nonempty = self.point_counts > 0
+        lengths[nonempty] = np.add.reduceat(step, self.offsets[:-1][nonempty])
+        return lengths
+
+    @property
+    def starts(self) -> np.ndarray:
+        """(n, 2) first point of each stroke."""
+        return self.coords[self.offsets[:-1]]
+
+    @property
+    def ends(self) -> np.ndarray:
+        """(n, 2) last point of each stroke."""
+        return self.coords[self.offsets[1:] - 1]
+
+    # -------------------------------
+    # Transforms
+    # -------------------------------
+    def scaled(self, sx: float, sy: float) -> "PathCollection":
+        return PathCollection(self.coords * np.float32((sx, sy)), self.offsets)
+
+    def translated(self, dx: float, dy: float) -> "PathCollection":
+        return PathCollection(self.coords + np.float32((dx, dy)), self.offsets)
+
+    def transformed(self, matrix: np.ndarray) -> "PathCollection":
+        """Apply a 2x3 affine or 3x3 perspective matrix to every point at once."""
+        matrix = np.asarray(matrix, dtype=np.float64)
+        points = self.coords.reshape(-1, 1, 2)
+        if matrix.shape == (2, 3):
+            moved = cv2.transform(points, matrix)
+        else:
+            moved = cv2.perspectiveTransform(points, matrix)
+        return PathCollection(moved.reshape(-1, 2), self.offsets)
+
+    def filtered(self, keep: np.ndarray) -> "PathCollection":
+        """Keep the strokes where the boolean mask keep is true."""
+        keep = np.asarray(keep, dtype=bool)
+        counts = self.point_counts[keep]
+        point_mask = np.repeat(keep, self.point_counts)
+        return PathCollection(self.coords[point_mask], np.concatenate(([0], np.cumsum(counts))))
+
+    def reordered(self, order: np.ndarray, reverse: np.ndarray = None, rotate: np.ndarray = None) -> "PathCollection":
+        """
+        Strokes in the given order, each reversed and/or rotated as requested.
+
+        Args:
+            order: Stroke indices in the new order
+            reverse: Boolean per entry of order, draw the stroke end → start
+            rotate: Per entry of order, for closed strokes (last point equal to
+                the first), the vertex the stroke should start and end at
+        """
+        order = np.asarray(order, dtype=np.int64)
+        counts = self.point_counts[order]
+        offsets = np.concatenate(([0], np.cumsum(counts)))
+        # Index of every output point into coords, built for all strokes at once
+        local = np.arange(offsets[-1]) - np.repeat(offsets[:-1], counts)
+        point_counts = np.repeat(counts, counts)
+        if reverse is not None:
+            reverse = np.repeat(np.asarray(reverse, dtype=bool), counts)
+            local = np.where(reverse, point_counts - 1 - local, local)
+        if rotate is not None:
+            shift = np.repeat(np.asarray(rotate, dtype=np.int64), counts)
+            ring = np.maximum(point_counts - 1, 1)
+            # The last index wraps to the shift itself, so the stroke stays closed
+            local = np.where(shift > 0, (local + shift) % ring, local)
+        return PathCollection(self.coords[np.repeat(self.offsets[order], counts) + local], offsets)
+
+    def simplified(self, tolerance: float) -> "PathCollection":
+        """Douglas-Peucker simplify every stroke (cv2.approxPolyDP) within tolerance."""
+        simplified = [
+            cv2.approxPolyDP(stroke.reshape(-1, 1, 2), tolerance, closed=False).reshape(-1, 2)
+            for stroke in self
+        ]
+        return PathCollection.from_lists(simplified)
+
+    # -------------------------------
+    # Converters
+    # -------------------------------
+    def to_lists(self) -> list:
+        """Strokes as lists of (x, y) tuples."""
+        points = self.coords.tolist()
+        return [
+            [tuple(point) for point in points[start:end]]
+            for start, end in zip(self.offsets[:-1].tolist(), self.offsets[1:].tolist())
+        ]
+
+    def to_complex(self) -> list:
+        """Strokes as complex128 arrays (vpype's line format), views of one array."""
+        complex_coords = self.coords[:, 0].astype(np.complex128) + 1j * self.coords[:, 1]
+        return np.split(complex_coords, self.offsets[1:-1])
@@ -0,0 +1,523 @@
+"""
+DrawMate Path Optimizer
+-----------------------
+Orders the converted paths to minimize pen-up travel, replacing vpype's
+greedy `linesort`. Reports measure the travel saved against linesort's order
+(linesort_travel), the ordering the pipeline used before.
+
+    1. Greedy nearest neighbor from the pen's start position over a KD-tree
+       of both endpoints of every open path, so it may be drawn reversed,
+       and of every vertex of every closed path (traced outlines are all
+       closed), so it may start at any point of the loop
+    2. Time-bounded improvement with KD-tree neighbor lists:
+         2-opt   reverse a run of paths (and the direction of each of them)
+                 when that shortens the two pen-up moves at its ends
+         Or-opt  move a single path, in either direction, between two
+                 paths that are close to its endpoints
+         seams   restart each closed path at the vertex closest to its
+                 neighbors in the new order, then reorder again
+
+Usage (standalone, compares with vpype's linesort and the traced order):
+    python PathOptimizer.py assets/bird.jpg --time-budget 2
+
+Usage (imported):
+    optimizer = PathOptimizer(time_budget_in_seconds=1.0)
+    ordered_paths, report = optimizer.optimize(paths, origin=(0.0, 0.0))
+    print(report)
+
+Usage (chunks in drawing order, the first ones ready before the rest is refined):
+    for chunk in optimizer.optimize_chunks(paths, origin=(0.0, 0.0), on_report=print):
+        draw(chunk)
+
+Author: DrawMate Project
+"""
+
+import argparse
+import math
+import time
+from dataclasses import dataclass
+from typing import Iterator
+
+import numpy as np
+import vpype as vp
+from scipy.spatial import cKDTree
+
+from PathCollection import PathCollection
+
+# Paths in the first window of optimize_chunks(); later windows double in size
+FIRST_CHUNK_PATHS = 32
+
+
+@dataclass(frozen=True)
+class OrderingReport:
+    """Pen-up travel (in path units) with vpype's linesort order and after ordering."""
+
+    paths: int
+    travel_linesort: float
+    travel_greedy: float
+    travel_after: float
+    two_opt_moves: int
+    or_opt_moves: int
+    seconds: float
+
+    @property
+    def reduction(self) -> float:
+        """Fraction of linesort's pen-up travel that was removed."""
+        return 1.0 - self.travel_after / self.travel_linesort if self.travel_linesort > 0 else 0.0
+
+    def __str__(self) -> str:
+        return (f"🧭 Pen-up travel {self.travel_linesort:.0f} with linesort → {self.travel_after:.0f} "
+                f"(greedy {self.travel_greedy:.0f}, -{self.reduction:.0%}) over {self.paths} paths; "
+                f"{self.two_opt_moves} 2-opt / {self.or_opt_moves} Or-opt moves in {self.seconds:.2f}s")
+
+
+def travel_distance(starts: np.ndarray, ends: np.ndarray, origin=(0.0, 0.0)) -> float:
+    """Pen-up travel from origin through paths drawn start → end in the given order."""
+    if not len(starts):
+        return 0.0
+    hops = np.vstack((np.asarray(origin, dtype=np.float64)[None], ends[:-1]))
+    return float(np.linalg.norm(starts - hops, axis=1).sum())
+
+
+def linesort_travel(paths: PathCollection, origin=(0.0, 0.0)) -> float:
+    """
+    Pen-up travel from origin through paths in the order vpype's linesort gives them.
+
+    Same greedy walk as the linesort command: start with the first path,
+    then always go to the nearest remaining endpoint (drawing that path
+    reversed if needed), and keep the original order if that is shorter.
+    """
+    if len(paths) < 2:
+        return travel_distance(paths.starts.astype(np.float64), paths.ends.astype(np.float64), origin)
+    lines = paths.to_complex()
+    line_index = vp.LineIndex(lines[1:], reverse=True)
+    ordered = [lines[0]]
+    while len(line_index) > 0:
+        index, reverse = line_index.find_nearest(ordered[-1][-1])
+        line = line_index.pop(index)
+        ordered.append(np.flip(line) if reverse else line)
+
+    sorted_starts = np.array([(line[0].real, line[0].imag) for line in ordered])
+    sorted_ends = np.array([(line[-1].real, line[-1].imag) for line in ordered])
+    starts, ends = paths.starts.astype(np.float64), paths.ends.astype(np.float64)
+
+    def pen_up_length(starts: np.ndarray, ends: np.ndarray) -> float:
+        return float(np.linalg.norm(starts[1:] - ends[:-1], axis=1).sum())
+
+    # linesort measures from the first path on, without the hop from the origin
+    if pen_up_length(starts, ends) < pen_up_length(sorted_starts, sorted_ends):
+        sorted_starts, sorted_ends = starts, ends
+    return travel_distance(sorted_starts, sorted_ends, origin)
+
+
+class PathOptimizer:
+    """KD-tree greedy ordering with path reversal, refined by 2-opt and Or-opt."""
+
+    def __init__(self, time_budget_in_seconds: float = 1.0, neighbors: int = 8):
+        """
+        Args:
+            time_budget_in_seconds: Wall time allowed for the improvement passes
+            neighbors: Candidate endpoints considered per move
+        """
+        self.time_budget_in_seconds = time_budget_in_seconds
+        self.neighbors = neighbors
+
+    # -------------------------------
+    # Construction
+    # -------------------------------
+    @staticmethod
+    def _closed(paths: PathCollection) -> np.ndarray:
+        """Paths that end where they start (traced outlines), which can be entered at any vertex."""
+        return (paths.point_counts > 2) & np.all(paths.starts == paths.ends, axis=1)
+
+    @staticmethod
+    def _candidates(paths: PathCollection, closed: np.ndarray):
+        """
+        Points where the pen may enter each path: both endpoints of an open
+        path, every vertex of a closed one.
+
+        Returns:
+            (entries, exits, owner, vertex): entry point, matching exit point,
+            owning path and vertex index within the path of every candidate
+        """
+        counts = paths.point_counts
+        owner = np.repeat(np.arange(len(paths)), counts)
+        vertex = np.arange(paths.point_count) - np.repeat(paths.offsets[:-1], counts)
+        last = np.repeat(counts - 1, counts)
+        closed_point = np.repeat(closed, counts)
+        keep = np.where(closed_point, vertex < last, (vertex == 0) | (vertex == last))
+
+        coords = paths.coords.astype(np.float64)
+        # A closed path is left where it was entered; an open one at its other end
+        first, last_index = np.repeat(paths.offsets[:-1], counts), np.repeat(paths.offsets[1:] - 1, counts)
+        exit_index = np.where(closed_point, np.arange(len(coords)), np.where(vertex == 0, last_index, first))
+        return coords[keep], coords[exit_index[keep]], owner[keep], vertex[keep]
+
+    @staticmethod
+    def _greedy(entries: np.ndarray, exits: np.ndarray, owner: np.ndarray, n: int, origin: np.ndarray):
+        """
+        Nearest neighbor: repeatedly enter the unvisited path whose candidate is closest to the pen.
+
+        The KD-tree can't delete points, so visited ones are skipped and the
+        tree is rebuilt over the remaining points whenever half of it is stale.
+
+        Returns:
+            (order, chosen): path indices in drawing order, and the candidate
+            each path (by index) is entered at
+        """
+        visited = np.zeros(n, dtype=bool)
+        order = np.empty(n, dtype=np.int64)
+        chosen = np.empty(n, dtype=np.int64)
+        candidates_per_path = np.bincount(owner, minlength=n)
+
+        alive = np.arange(len(entries))
+        tree = cKDTree(entries)
+        stale = 0
+        position = origin
+
+        for step in range(n):
+            if stale > len(alive) // 2:
+                alive = alive[~visited[owner[alive]]]
+                tree = cKDTree(entries[alive])
+                stale = 0
+
+            k = 8
+            while True:
+                k = min(k, len(alive))
+                _, hits = tree.query(position, k=k)
+                hits = np.atleast_1d(hits)
+                candidates = alive[hits[hits < len(alive)]]
+                fresh = candidates[~visited[owner[candidates]]]
+                if len(fresh) or k == len(alive):
+                    break
+                k *= 4
+
+            candidate = fresh[0]
+            path = owner[candidate]
+            visited[path] = True
+            stale += candidates_per_path[path]
+            order[step] = path
+            chosen[path] = candidate
+            position = exits[candidate]
+
+        return order, chosen
+
+    # -------------------------------
+    # Improvement
+    # -------------------------------
+    def _improve(self, endpoints: np.ndarray, origin: np.ndarray, order: np.ndarray, flipped: np.ndarray,
+                 deadline: float):
+        """
+        2-opt and Or-opt moves until no move helps or the time budget is spent.
+
+        Every move adds a pen-up hop from the exit of order[a - 1] (the origin
+        for a == 0) to one of its nearest endpoints, so only those KD-tree
+        neighbors are tried instead of all O(n²) pairs.
+        """
+        n = len(order)
+        k = min(self.neighbors + 1, len(endpoints))
+        tree = cKDTree(endpoints)
+        neighbor_lists = tree.query(endpoints, k=k)[1].tolist()
+        origin_neighbors = np.atleast_1d(tree.query(origin, k=k)[1]).tolist()
+
+        points = [tuple(point) for point in endpoints.tolist()]
+        origin = tuple(origin.tolist())
+        # Python lists: the moves touch single elements far more than whole runs
+        order = order.tolist()
+        flipped = flipped.tolist()
+        position = [0] * n
+        for index, path in enumerate(order):
+            position[path] = index
+
+        def entry(path: int) -> tuple:
+            return points[2 * path + flipped[path]]
+
+        def exit_(path: int) -> tuple:
+            return points[2 * path + 1 - flipped[path]]
+
+        def exit_before(index: int) -> tuple:
+            return exit_(order[index - 1]) if index > 0 else origin
+
+        def entry_at(index: int):
+            return entry(order[index]) if index < n else None
+
+        def try_reverse(first: int, last: int) -> bool:
+            """2-opt: draw order[first..last] backwards, each path reversed."""
+            before, after = exit_before(first), entry_at(last + 1)
+            head, tail = entry(order[first]), exit_(order[last])
+            old = math.dist(before, head) + (math.dist(tail, after) if after else 0.0)
+            new = math.dist(before, tail) + (math.dist(head, after) if after else 0.0)
+            if new >= old - 1e-9:
+                return False
+            order[first:last + 1] = order[first:last + 1][::-1]
+            for index in range(first, last + 1):
+                path = order[index]
+                position[path] = index
+                flipped[path] = not flipped[path]
+            return True
+
+        def try_move(q: int, into: int, endpoint: int) -> bool:
+            """Or-opt: move path q in front of order[into], entering at endpoint."""
+            b = position[q]
+            before_q, after_q = exit_before(b), entry_at(b + 1)
+            removal_gain = math.dist(before_q, entry(q))
+            if after_q:
+                removal_gain += math.dist(exit_(q), after_q) - math.dist(before_q, after_q)
+
+            before, target = exit_before(into), entry_at(into)
+            insertion_cost = math.dist(before, points[endpoint])
+            if target:
+                insertion_cost += math.dist(points[endpoint ^ 1], target) - math.dist(before, target)
+            if insertion_cost >= removal_gain - 1e-9:
+                return False
+
+            order.pop(b)
+            order.insert(into - 1 if b < into else into, q)
+            flipped[q] = endpoint % 2 == 1
+            for index in range(min(b, into), min(max(b, into) + 1, n)):
+                position[order[index]] = index
+            return True
+
+        two_opt_moves = or_opt_moves = 0
+        improved = True
+        while improved and time.perf_counter() < deadline:
+            improved = False
+            for a in range(n):
+                if a % 256 == 0 and time.perf_counter() > deadline:
+                    break
+                if a == 0:
+                    candidates, previous = origin_neighbors, -1
+                else:
+                    previous = order[a - 1]
+                    candidates = neighbor_lists[2 * previous + 1 - flipped[previous]]
+
+                for endpoint in candidates:
+                    q = endpoint // 2
+                    if q == previous or endpoint >= 2 * n:
+                        continue
+                    b = position[q]
+
+                    if endpoint == 2 * q + 1 - flipped[q]:
+                        # Entering q at its exit means reversing the run between
+                        first, last = (a, b) if b >= a else (b + 1, a - 1)
+                        if try_reverse(first, last):
+                            two_opt_moves += 1
+                            improved = True
+                            break
+                    if b != a and try_move(q, a, endpoint):
+                        or_opt_moves += 1
+                        improved = True
+                        break
+
+        return np.array(order, dtype=np.int64), np.array(flipped, dtype=bool), two_opt_moves, or_opt_moves
+
+    @staticmethod
+    def _reseat(paths: PathCollection, closed: np.ndarray, seams: np.ndarray, endpoints: np.ndarray,
+                origin: np.ndarray, order: np.ndarray, flipped: np.ndarray) -> bool:
+        """
+        Move the seam of every closed path to the vertex that minimizes the
+        hops from the previous path's exit and to the next path's entry.
+
+        Updates seams and endpoints in place. Returns whether any seam moved.
+        """
+        coords = paths.coords.astype(np.float64)
+        moved = False
+        previous_exit = origin
+        for index, path in enumerate(order):
+            if closed[path]:
+                ring = coords[paths.offsets[path]:paths.offsets[path + 1] - 1]
+                cost = np.linalg.norm(ring - previous_exit, axis=1)
+                if index + 1 < len(order):
+                    following = order[index + 1]
+                    cost += np.linalg.norm(ring - endpoints[2 * following + flipped[following]], axis=1)
+                best = int(np.argmin(cost))
+                if best != seams[path] and cost[best] < cost[seams[path]] - 1e-9:
+                    seams[path] = best
+                    endpoints[2 * path] = endpoints[2 * path + 1] = ring[best]
+                    moved = True
+            previous_exit = endpoints[2 * path + 1 - flipped[path]]
+        return moved
+
+    def _greedy_tour(self, paths: PathCollection, origin: np.ndarray):
+        """
+        Greedy tour over every path, with the endpoints it enters and leaves each one at.
+
+        Returns:
+            (order, flipped, seams, endpoints, closed, greedy_travel); endpoints
+            holds every path's entry and exit as drawn unflipped, both at the
+            seam for a closed path
+        """
+        n = len(paths)
+        seams = np.zeros(n, dtype=np.int64)
+        closed = self._closed(paths)
+        entries, exits, owner, vertex = self._candidates(paths, closed)
+        order, chosen = self._greedy(entries, exits, owner, n, origin)
+
+        flipped = ~closed & (vertex[chosen] != 0)
+        seams[closed] = vertex[chosen][closed]
+        endpoints = np.empty((2 * n, 2), dtype=np.float64)
+        endpoints[0::2] = np.where(flipped[:, None], exits[chosen], entries[chosen])
+        endpoints[1::2] = np.where(flipped[:, None], entries[chosen], exits[chosen])
+        greedy_travel = travel_distance(entries[chosen][order], exits[chosen][order], origin)
+        return order, flipped, seams, endpoints, closed, greedy_travel
+
+    def _refine(self, paths: PathCollection, closed: np.ndarray, seams: np.ndarray, endpoints: np.ndarray,
+                origin: np.ndarray, order: np.ndarray, flipped: np.ndarray, deadline: float):
+        """Alternate reordering and re-seating until neither helps or the deadline passes."""
+        two_opt_moves = or_opt_moves = 0
+        if len(order) < 3:
+            return order, flipped, two_opt_moves, or_opt_moves
+        while True:
+            order, flipped, two_opt, or_opt = self._improve(endpoints, origin, order, flipped, deadline)
+            two_opt_moves += two_opt
+            or_opt_moves += or_opt
+            if time.perf_counter() > deadline or not closed.any():
+                break
+            if not self._reseat(paths, closed, seams, endpoints, origin, order, flipped):
+                break
+        return order, flipped, two_opt_moves, or_opt_moves
+
+    # -------------------------------
+    # Public Methods
+    # -------------------------------
+    def order(self, paths: PathCollection, origin=(0.0, 0.0)):
+        """
+        Find a drawing order, direction and (for closed paths) seam for every path.
+
+        Returns:
+            (order, flipped, seams, greedy_travel, two_opt_moves, or_opt_moves):
+            path indices in drawing order; per path whether it is drawn end →
+            start and the vertex a closed path starts at; and the travel of the
+            greedy tour before improvement
+        """
+        started = time.perf_counter()
+        if len(paths) == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=bool), np.zeros(0, dtype=np.int64), 0.0, 0, 0
+
+        origin = np.asarray(origin, dtype=np.float64)
+        order, flipped, seams, endpoints, closed, greedy_travel = self._greedy_tour(paths, origin)
+        if self.time_budget_in_seconds <= 0:
+            return order, flipped, seams, greedy_travel, 0, 0
+
+        deadline = started + self.time_budget_in_seconds
+        order, flipped, two_opt_moves, or_opt_moves = self._refine(
+            paths, closed, seams, endpoints, origin, order, flipped, deadline)
+        return order, flipped, seams, greedy_travel, two_opt_moves, or_opt_moves
+
+    def optimize(self, paths: PathCollection, origin=(0.0, 0.0)):
+        """
+        Reorder, reverse and re-seat paths to minimize pen-up travel.
+
+        Returns:
+            (ordered PathCollection, OrderingReport)
+        """
+        started = time.perf_counter()
+        order, flipped, seams, greedy_travel, two_opt_moves, or_opt_moves = self.order(paths, origin)
+        ordered = paths.reordered(order, flipped[order], seams[order])
+        seconds = time.perf_counter() - started
+
+        report = OrderingReport(
+            paths=len(paths),
+            travel_linesort=linesort_travel(paths, origin),
+            travel_greedy=greedy_travel,
+            travel_after=travel_distance(ordered.starts.astype(np.float64), ordered.ends.astype(np.float64), origin),
+            two_opt_moves=two_opt_moves,
+            or_opt_moves=or_opt_moves,
+            seconds=seconds,
+        )
+        return ordered, report
+
+    def optimize_chunks(self, paths: PathCollection, origin=(0.0, 0.0),
+                        first_chunk_paths: int = FIRST_CHUNK_PATHS, on_report=None) -> Iterator[PathCollection]:
+        """
+        Like optimize(), but yield the ordered paths in chunks as soon as each is refined.
+
+        The greedy tour is built over every path first (one KD-tree pass).
+        It is then cut into windows of first_chunk_paths, doubling in size,
+        and 2-opt, Or-opt and re-seating run within each window, starting
+        from where the previous one ended. Each window gets its share of the
+        time budget. A consumer can therefore draw the first paths while
+        later windows are still being refined. Moves across windows are not
+        tried, which costs a little travel over optimize().
+
+        Args:
+            paths: Paths to order
+            origin: Pen position before the first path
+            first_chunk_paths: Paths in the first window
+            on_report: Called with the OrderingReport once the last chunk is out
+        """
+        started = time.perf_counter()
+        n = len(paths)
+        origin = np.asarray(origin, dtype=np.float64)
+        if n == 0:
+            if on_report is not None:
+                on_report(OrderingReport(0, 0.0, 0.0, 0.0, 0, 0, time.perf_counter() - started))
+            return
+
+        order, flipped, seams, endpoints, closed, greedy_travel = self._greedy_tour(paths, origin)
+        endpoints = endpoints.reshape(n, 2, 2)
+        position = origin
+        travel_after, two_opt_moves, or_opt_moves = 0.0, 0, 0
+
+        start, size = 0, first_chunk_paths
+        while start < n:
+            window = order[start:start + size]
+            # Local indices: path j of the window is paths[window[j]]
+            chunk = paths.reordered(window)
+            local_flipped, local_seams = flipped[window], seams[window].copy()
+            local_endpoints = endpoints[window].reshape(-1, 2).copy()
+            local_order = np.arange(len(window))
+            if self.time_budget_in_seconds > 0:
+                deadline = time.perf_counter() + self.time_budget_in_seconds * len(window) / n
+                local_order, local_flipped, two_opt, or_opt = self._refine(
+                    chunk, closed[window], local_seams, local_endpoints, position,
+                    local_order, local_flipped, deadline)
+                two_opt_moves += two_opt
+                or_opt_moves += or_opt
+
+            chunk = chunk.reordered(local_order, local_flipped[local_order], local_seams[local_order])
+            travel_after += travel_distance(chunk.starts.astype(np.float64), chunk.ends.astype(np.float64), position)
+            position = chunk.ends[-1].astype(np.float64)
+            yield chunk
+            start, size = start + len(window), 2 * size
+
+        if on_report is not None:
+            seconds = time.perf_counter() - started
+            on_report(OrderingReport(
+                paths=n,
+                travel_linesort=linesort_travel(paths, origin),
+                travel_greedy=greedy_travel,
+                travel_after=travel_after,
+                two_opt_moves=two_opt_moves,
+                or_opt_moves=or_opt_moves,
+                seconds=seconds,
+            ))
+
+
+# -------------------------------
+# Standalone CLI Interface
+# -------------------------------
+if __name__ == "__main__":
+    from pathlib import Path
+
+    from GCodeConverter import GCodeConverter
+
+    parser = argparse.ArgumentParser(description="Compare pen-up travel of path orderings for an image.")
+    parser.add_argument("image_paths", type=Path, nargs="+", help="Image(s) to trace")
+    parser.add_argument("--time-budget", type=float, default=1.0, help="Seconds for 2-opt/Or-opt (default: 1.0)")
+    args = parser.parse_args()
+
+    converter = GCodeConverter(Path("assets"), Path("gcode"), 230, 170, path_order_time_budget_in_seconds=0)
+    optimizer = PathOptimizer(args.time_budget)
+    mm = vp.convert_length("mm")
+
+    for image_path in args.image_paths:
+        document = converter.vectorize(image_path, order_paths=False)
+        paths = PathCollection.from_complex(document.layers[1]).scaled(1 / mm, 1 / mm)
+        origin = np.array(converter.pen_origin(document)) / mm
+
+        _, report = optimizer.optimize(paths, origin)
+        unordered = travel_distance(paths.starts.astype(np.float64), paths.ends.astype(np.float64), origin)
+        print(f"{image_path}: {report}")
+        print(f"   traced order {unordered:.0f}mm → {report.travel_after:.0f}mm "
+              f"({1 - report.travel_after / unordered:.0%} less pen-up travel)")
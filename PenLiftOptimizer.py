@@ -0,0 +1,190 @@
+"""
+DrawMate Pen-Lift Optimizer
+---------------------------
+Emission pass over ordered paths that cuts the pen lifts and tiny segments
+that stall GRBL's planner. With $122 = 1 mm/s², every pen lift and drop is
+seconds of Z motion, and every short segment is a line over serial and a
+planner block the machine can't even resolve.
+
+    1. Pen-down bridging  consecutive paths whose gap is below a tolerance
+                          are joined, so the pen stays down across the gap
+    2. Step pruning       points that land in the same motor step cell as
+                          their neighbor are dropped ($100/$101 resolution)
+    3. Collinear merging  interior points within a tiny distance of the line
+                          through their neighbors are dropped
+
+All three are vectorized over the PathCollection.
+
+Usage:
+    optimizer = PenLiftOptimizer.from_settings(GrblSettings.from_export(FIRMWARE_SETTINGS_PATH))
+    paths, report = optimizer.optimize(ordered_paths_mm)
+    print(report)
+
+Usage (ordered paths arriving in chunks, e.g. from PathOptimizer.optimize_chunks):
+    for chunk in optimizer.optimize_chunks(ordered_chunks_mm, on_report=print):
+        draw(chunk)
+
+Author: DrawMate Project
+"""
+
+from dataclasses import dataclass
+from typing import Iterable, Iterator
+
+import numpy as np
+
+from GrblSettings import GrblSettings
+from PathCollection import PathCollection
+
+
+@dataclass(frozen=True)
+class PenLiftReport:
+    """Paths (one pen lift and drop each) and G1 lines before and after the pass."""
+
+    paths_before: int
+    paths_after: int
+    g1_lines_before: int
+    g1_lines_after: int
+
+    def __str__(self) -> str:
+        # Path counts, not Z moves counted in G-code: the templates add their own
+        # (e.g. document_start's pen up), and the compactor drops repeated ones
+        return (f"🖊️ Paths {self.paths_before} → {self.paths_after} (a pen lift each), "
+                f"G1 lines {self.g1_lines_before} → {self.g1_lines_after}")
+
+
+def _g1_lines(paths: PathCollection) -> int:
+    return int(np.maximum(paths.point_counts - 1, 0).sum())
+
+
+class PenLiftOptimizer:
+    """Bridges small pen-up gaps and removes sub-step and collinear points."""
+
+    def __init__(self,
+                 gap_tolerance: float = 0.5,
+                 resolution: tuple = (1 / 4.702, 1 / 5.201),
+                 collinear_tolerance: float = 0.02):
+        """
+        Args:
+            gap_tolerance: Largest gap between paths drawn over with the pen down
+            resolution: (x, y) distance of one motor step
+            collinear_tolerance: Largest deviation of a merged interior point
+
+        All lengths are in the units of the paths passed to optimize().
+        """
+        self.gap_tolerance = gap_tolerance
+        self.resolution = np.asarray(resolution, dtype=np.float64)
+        self.collinear_tolerance = collinear_tolerance
+
+    @classmethod
+    def from_settings(cls, settings: GrblSettings, gap_tolerance: float = 0.5,
+                      collinear_tolerance: float = 0.02) -> "PenLiftOptimizer":
+        """Optimizer for millimeter paths with the XY step size of the given firmware settings."""
+        return cls(gap_tolerance, settings.resolution_in_mm[:2], collinear_tolerance)
+
+    # -------------------------------
+    # Passes
+    # -------------------------------
+    def bridge_gaps(self, paths: PathCollection) -> PathCollection:
+        """Join each path to the previous one when the pen-up gap between them is below gap_tolerance."""
+        if len(paths) < 2:
+            return paths
+        gaps = np.linalg.norm(paths.starts[1:] - paths.ends[:-1], axis=1)
+        # Points are already stored in drawing order: joining paths just drops offsets
+        keep = np.concatenate(([True], gaps >= self.gap_tolerance, [True]))
+        return PathCollection(paths.coords, paths.offsets[keep])
+
+    def prune_steps(self, paths: PathCollection, resolution: np.ndarray = None) -> PathCollection:
+        """
+        Keep one point per run of consecutive points in the same step cell.
+
+        A path keeps its first and last point, so it never shrinks to a
+        single point and still ends where it did.
+        """
+        if paths.point_count == 0:
+            return paths
+        resolution = self.resolution if resolution is None else resolution
+        steps = np.rint(paths.coords / resolution).astype(np.int64)
+        path_start = np.zeros(paths.point_count, dtype=bool)
+        path_start[paths.offsets[:-1]] = True
+        path_end = np.zeros(paths.point_count, dtype=bool)
+        path_end[paths.offsets[1:] - 1] = True
+
+        new_cell = np.ones(paths.point_count, dtype=bool)
+        new_cell[1:] = np.any(steps[1:] != steps[:-1], axis=1)
+        run_start = new_cell | path_start
+
+        # A path's last run is represented by its last point instead of its first
+        run_id = np.cumsum(run_start)
+        in_last_run = run_id == np.repeat(run_id[paths.offsets[1:] - 1], paths.point_counts)
+        keep = (run_start & ~(in_last_run & ~path_start)) | path_end
+
+        counts = np.add.reduceat(keep, paths.offsets[:-1]) if len(paths) else np.zeros(0, dtype=np.int64)
+        return PathCollection(paths.coords[keep], np.concatenate(([0], np.cumsum(counts))))
+
+    def merge_collinear(self, paths: PathCollection) -> PathCollection:
+        """Drop interior points that lie within collinear_tolerance of a straight run."""
+        return paths.simplified(self.collinear_tolerance)
+
+    # -------------------------------
+    # Public Methods
+    # -------------------------------
+    def optimize(self, paths: PathCollection, scale: float = 1.0):
+        """
+        Run all passes on paths that are already in drawing order.
+
+        Args:
+            paths: Ordered paths
+            scale: Path units per tolerance unit, e.g. vpype pixels per millimeter
+                when the tolerances are in millimeters
+
+        Returns:
+            (optimized PathCollection, PenLiftReport)
+        """
+        optimizer = self if scale == 1.0 else PenLiftOptimizer(
+            self.gap_tolerance * scale, self.resolution * scale, self.collinear_tolerance * scale)
+
+        optimized = optimizer.bridge_gaps(paths)
+        optimized = optimizer.prune_steps(optimized)
+        optimized = optimizer.merge_collinear(optimized)
+
+        report = PenLiftReport(
+            paths_before=len(paths),
+            paths_after=len(optimized),
+            g1_lines_before=_g1_lines(paths),
+            g1_lines_after=_g1_lines(optimized),
+        )
+        return optimized, report
+
+    def optimize_chunks(self, chunks: Iterable[PathCollection], scale: float = 1.0,
+                        on_report=None) -> Iterator[PathCollection]:
+        """
+        Run all passes on ordered paths that arrive in chunks, yielding each chunk once it is done.
+
+        The last path of every chunk is held back until the next chunk
+        arrives, so a small gap across a chunk boundary is bridged as well.
+
+        Args:
+            chunks: Ordered paths, chunk by chunk
+            scale: See optimize()
+            on_report: Called with the PenLiftReport of all chunks once the last one is out
+        """
+        carry = PathCollection.empty()
+        paths_before = paths_after = g1_lines_before = g1_lines_after = 0
+        for chunk in chunks:
+            paths_before += len(chunk)
+            g1_lines_before += _g1_lines(chunk)
+            optimized, _ = self.optimize(PathCollection.concatenate((carry, chunk)), scale)
+
+            held = np.arange(len(optimized)) == len(optimized) - 1
+            done, carry = optimized.filtered(~held), optimized.filtered(held)
+            paths_after += len(done)
+            g1_lines_after += _g1_lines(done)
+            if len(done):
+                yield done
+
+        paths_after += len(carry)
+        g1_lines_after += _g1_lines(carry)
+        if len(carry):
+            yield carry
+        if on_report is not None:
+            on_report(PenLiftReport(paths_before, paths_after, g1_lines_before, g1_lines_after))
@@ -0,0 +1,324 @@
+"""
+DrawMate Plot Time Estimator
+----------------------------
+Estimates how long a G-code file will take to plot by modelling GRBL 1.1's
+acceleration planner with the machine's own settings export.
+
+The planner is evaluated with NumPy over every block at once:
+    1. Parse the file into per-line word arrays and forward-fill modal state;
+       G2/G3 arcs are split into chords within $12 arc tolerance like mc_arc()
+    2. Per block: length, unit vector, axis-limited nominal speed and acceleration
+    3. Junction speed limits from $11 junction deviation
+    4. GRBL's backward/forward planner passes. Both are min-plus recurrences
+       on squared speeds (v² <= v_next² + 2·a·L), so each one becomes a prefix
+       sum plus a cumulative minimum instead of a Python loop
+    5. Trapezoid time per block
+
+Like GRBL, a block is only allowed the speed it can still brake from within
+the next 15 planner blocks.
+
+Usage (standalone):
+    python PlotTimeEstimator.py gcode/cat.gcode
+
+Usage (imported):
+    from PlotTimeEstimator import PlotTimeEstimator
+    estimate = PlotTimeEstimator.from_export(FIRMWARE_SETTINGS_PATH).estimate("gcode/cat.gcode")
+    print(estimate.total_time, estimate.pen_lifts)
+
+Author: DrawMate Project
+"""
+
+import argparse
+import re
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from GrblSettings import GrblSettings
+
+GRBL_PLANNER_BLOCKS = 15
+MILLIMETERS_PER_INCH = 25.4
+
+COMMENT_PATTERN = re.compile(r"\(.*?\)|;.*")
+WORD_PATTERNS = {
+    letter: re.compile(letter + r"\s*([-+]?(?:\d+\.?\d*|\.\d+))")
+    for letter in "GXYZFIJ"
+}
+
+
+@dataclass(frozen=True)
+class PlotEstimate:
+    """Estimated plot time in seconds, split by kind of motion."""
+
+    total_time: float
+    draw_time: float      # G1 moves (pen down)
+    travel_time: float    # G0 moves in XY (pen up)
+    pen_time: float       # Z-only moves (pen up/down)
+    pen_lifts: int
+    blocks: int
+    draw_distance: float  # mm
+    travel_distance: float  # mm
+
+    def __str__(self) -> str:
+        def minutes(seconds: float) -> str:
+            return f"{int(seconds // 60)}m{seconds % 60:04.1f}s"
+
+        return (f"⏱️ Estimated plot time: {minutes(self.total_time)} "
+                f"(draw {minutes(self.draw_time)}, travel {minutes(self.travel_time)}, "
+                f"pen {minutes(self.pen_time)}), {self.pen_lifts} pen lifts, {self.blocks} blocks")
+
+
+def _forward_fill(values: np.ndarray, initial: float) -> np.ndarray:
+    """Replace NaNs with the last non-NaN value before them (modal G-code words)."""
+    values = np.concatenate(([initial], values))
+    index = np.where(np.isnan(values), 0, np.arange(len(values)))
+    np.maximum.accumulate(index, out=index)
+    return values[index][1:]
+
+
+def _last_of(codes: list, group: tuple) -> float:
+    """The last of a line's G codes that belongs to a modal group (NaN if none does)."""
+    return next((code for code in reversed(codes) if code in group), np.nan)
+
+
+class PlotTimeEstimator:
+    """Vectorized model of GRBL's planner for whole-file time estimates."""
+
+    def __init__(self, settings: GrblSettings = GrblSettings()):
+        self.settings = settings
+        self._max_rate = np.array(settings.max_rate_in_mm_per_second)
+        self._acceleration = np.array(settings.acceleration_in_mm_per_second2)
+
+    @classmethod
+    def from_export(cls, settings_path: Path) -> "PlotTimeEstimator":
+        return cls(GrblSettings.from_export(settings_path))
+
+    # -------------------------------
+    # Internal Helpers
+    # -------------------------------
+    @staticmethod
+    def _parse(lines: list) -> dict:
+        """
+        Extract the motion mode and the X, Y, Z, F, I and J word of every line into float arrays.
+
+        A line can carry several G words (e.g. 'G90 G1 X100'); G is its motion
+        code (0-3). Inch values (G20) are converted to millimeters and relative
+        moves (G91) to absolute targets, so every array is absolute millimeters
+        (NaN when the word is absent).
+        """
+        lines = [COMMENT_PATTERN.sub("", line).upper() for line in lines]
+        lines = [line for line in lines if line.strip() and not line.lstrip().startswith("$")]
+
+        g_codes = [[float(code) for code in WORD_PATTERNS["G"].findall(line)] for line in lines]
+        words = {"G": np.array([_last_of(codes, (0, 1, 2, 3)) for codes in g_codes], dtype=np.float64)}
+        for letter, pattern in WORD_PATTERNS.items():
+            if letter != "G":
+                words[letter] = np.array(
+                    [float(m.group(1)) if (m := pattern.search(line)) else np.nan for line in lines],
+                    dtype=np.float64,
+                )
+
+        # Modal state set on a line applies to that line's own words
+        relative = _forward_fill(np.array([_last_of(codes, (90, 91)) for codes in g_codes]), 90) == 91
+        inches = _forward_fill(np.array([_last_of(codes, (20, 21)) for codes in g_codes]), 21) == 20
+        for letter in "XYZFIJ":
+            words[letter] = np.where(inches, words[letter] * MILLIMETERS_PER_INCH, words[letter])
+
+        # Relative targets: the last absolute target plus the increments since
+        for axis in "XYZ":
+            value = words[axis]
+            increment = np.cumsum(np.where(relative & ~np.isnan(value), value, 0.0))
+            base = _forward_fill(np.where(relative, np.nan, value - increment), 0.0)
+            words[axis] = np.where(np.isnan(value), np.nan, base + increment)
+        return words
+
+    def _split_arcs(self, position: np.ndarray, motion: np.ndarray, center_offset: np.ndarray):
+        """
+        Replace every G2/G3 move by the chords GRBL's mc_arc() plans for it.
+
+        Args:
+            position: (n + 1, 3) positions, the start followed by every line's target
+            motion: (n,) modal motion code of every line
+            center_offset: (n, 2) I and J of every line (NaN when absent)
+
+        Returns:
+            (position, index): positions with the chord ends inserted, and the
+            line every resulting move belongs to
+        """
+        start, target = position[:-1], position[1:]
+        offset = np.nan_to_num(center_offset)
+        arc = np.isin(motion, (2, 3)) & np.any(offset != 0, axis=1)
+        if not np.any(arc):
+            return position, np.arange(len(motion))
+
+        center = start[:, :2] + offset
+        radius = np.hypot(offset[:, 0], offset[:, 1])
+        start_vector = -offset
+        end_vector = target[:, :2] - center
+        sweep = np.arctan2(start_vector[:, 0] * end_vector[:, 1] - start_vector[:, 1] * end_vector[:, 0],
+                           np.einsum("ij,ij->i", start_vector, end_vector))
+        clockwise = motion == 2
+        sweep = np.where(clockwise & (sweep >= -1e-7), sweep - 2 * np.pi, sweep)
+        sweep = np.where(~clockwise & (sweep <= 1e-7), sweep + 2 * np.pi, sweep)
+
+        tolerance = self.settings.arc_tolerance_in_mm
+        with np.errstate(invalid="ignore", divide="ignore"):
+            segments = np.floor(np.abs(0.5 * sweep * radius) / np.sqrt(tolerance * (2 * radius - tolerance)))
+        segments = np.where(arc & (segments > 1), segments, 1).astype(np.int64)
+
+        index = np.repeat(np.arange(len(motion)), segments)
+        first = np.concatenate(([0], np.cumsum(segments)[:-1]))
+        fraction = (np.arange(len(index)) - first[index] + 1) / segments[index]
+
+        points = start[index] + (target[index] - start[index]) * fraction[:, None]
+        on_arc = arc[index] & (fraction < 1.0)
+        angle = (np.arctan2(start_vector[index, 1], start_vector[index, 0]) + sweep[index] * fraction)[on_arc]
+        points[on_arc, 0] = center[index[on_arc], 0] + radius[index[on_arc]] * np.cos(angle)
+        points[on_arc, 1] = center[index[on_arc], 1] + radius[index[on_arc]] * np.sin(angle)
+        return np.vstack((position[:1], points)), index
+
+    def _block_kinematics(self, delta: np.ndarray, rapid: np.ndarray, feed: np.ndarray):
+        """Length, unit vectors, nominal speed and acceleration of every block (mm, mm/s, mm/s²)."""
+        length = np.linalg.norm(delta, axis=1)
+        unit = delta / length[:, None]
+
+        # Largest speed/acceleration along each direction that no single axis exceeds
+        with np.errstate(divide="ignore"):
+            abs_unit = np.abs(unit)
+            max_speed = np.min(np.where(abs_unit > 0, self._max_rate / abs_unit, np.inf), axis=1)
+            acceleration = np.min(np.where(abs_unit > 0, self._acceleration / abs_unit, np.inf), axis=1)
+
+        nominal = np.where(rapid | np.isnan(feed) | (feed <= 0), max_speed, np.minimum(feed, max_speed))
+        return length, unit, nominal, acceleration
+
+    def _junction_speed_squared(self, unit, nominal, acceleration) -> np.ndarray:
+        """Squared entry speed limit of every block from $11 junction deviation (0 for the first)."""
+        cos_theta = -np.einsum("ij,ij->i", unit[:-1], unit[1:])
+        sin_theta_d2 = np.sqrt(np.clip(0.5 * (1.0 - cos_theta), 0.0, 1.0))
+        junction_acceleration = np.minimum(acceleration[:-1], acceleration[1:])
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            limit = junction_acceleration * self.settings.junction_deviation_in_mm * sin_theta_d2 / (1.0 - sin_theta_d2)
+        limit = np.where(cos_theta > 0.999999, 0.0, limit)              # Full reversal
+        limit = np.where(cos_theta < -0.999999, np.inf, limit)          # Straight through
+        limit = np.minimum(limit, np.minimum(nominal[:-1], nominal[1:]) ** 2)
+        return np.concatenate(([0.0], limit))
+
+    @staticmethod
+    def _plan_entry_speeds_squared(junction_limit, nominal, acceleration, length) -> np.ndarray:
+        """
+        GRBL's backward and forward planner passes over every block at once.
+
+        Backward: s[i] = min(limit[i], s[i+1] + 2·a[i]·L[i]), s[n] = 0
+        Forward:  s[i+1] = min(s[i+1], s[i] + 2·a[i]·L[i])
+
+        With prefix sums D of 2·a·L both become a cumulative minimum of
+        (s ± D) shifted back by D.
+
+        Returns:
+            Squared speed at each of the n + 1 block boundaries (start at rest, end at rest)
+        """
+        reach = 2.0 * acceleration * length
+        prefix = np.concatenate(([0.0], np.cumsum(reach)))  # prefix[i] = sum(reach[:i])
+        n = len(length)
+
+        limit = np.minimum(junction_limit, nominal ** 2)
+        # Only the next 15 blocks are in the buffer to brake in, and the job ends at rest
+        horizon = np.minimum(np.arange(n) + GRBL_PLANNER_BLOCKS, n)
+        limit = np.minimum(limit, prefix[horizon] - prefix[:-1])
+
+        # Backward pass: s[i] = min_{k>=i}(limit[k] + prefix[k]) - prefix[i], with s[n] = 0
+        candidates = np.concatenate((limit, [0.0])) + prefix
+        backward = np.minimum.accumulate(candidates[::-1])[::-1] - prefix
+
+        # Forward pass: s[i] = min_{k<=i}(s[k] - prefix[k]) + prefix[i]
+        forward = np.minimum.accumulate(backward - prefix) + prefix
+        return np.maximum(forward, 0.0)
+
+    @staticmethod
+    def _trapezoid_times(length, entry, exit_, nominal, acceleration) -> np.ndarray:
+        peak = np.sqrt((2 * acceleration * length + entry ** 2 + exit_ ** 2) / 2)
+        cruise_speed = np.minimum(peak, nominal)
+        accelerate = (cruise_speed ** 2 - entry ** 2) / (2 * acceleration)
+        decelerate = (cruise_speed ** 2 - exit_ ** 2) / (2 * acceleration)
+        cruise = np.maximum(length - accelerate - decelerate, 0.0) / cruise_speed
+        return (cruise_speed - entry) / acceleration + (cruise_speed - exit_) / acceleration + cruise
+
+    # -------------------------------
+    # Public Methods
+    # -------------------------------
+    def estimate_lines(self, lines: list) -> PlotEstimate:
+        """Estimate the plot time of G-code lines. See estimate()."""
+        words = self._parse(lines)
+
+        motion = _forward_fill(words["G"], 0.0)
+        feed = _forward_fill(words["F"], np.nan) / 60.0
+        position = np.column_stack([_forward_fill(words[axis], 0.0) for axis in "XYZ"])
+        position = np.vstack(([0.0, 0.0, 0.0], position))
+        position, index = self._split_arcs(position, motion, np.column_stack((words["I"], words["J"])))
+        motion, feed = motion[index], feed[index]
+
+        delta = np.diff(position, axis=0)
+        moving = np.any(delta != 0, axis=1)
+        delta, motion, feed = delta[moving], motion[moving], feed[moving]
+        if not len(delta):
+            return PlotEstimate(0.0, 0.0, 0.0, 0.0, 0, 0, 0.0, 0.0)
+
+        length, unit, nominal, acceleration = self._block_kinematics(delta, motion == 0, feed)
+        junction_limit = self._junction_speed_squared(unit, nominal, acceleration)
+        speed = np.sqrt(self._plan_entry_speeds_squared(junction_limit, nominal, acceleration, length))
+        entry, exit_ = speed[:-1], speed[1:]
+        times = self._trapezoid_times(length, entry, exit_, nominal, acceleration)
+
+        pen = (delta[:, 0] == 0) & (delta[:, 1] == 0)
+        draw = ~pen & (motion != 0)
+        travel = ~pen & (motion == 0)
+
+        return PlotEstimate(
+            total_time=float(times.sum()),
+            draw_time=float(times[draw].sum()),
+            travel_time=float(times[travel].sum()),
+            pen_time=float(times[pen].sum()),
+            pen_lifts=int(np.count_nonzero(pen & (delta[:, 2] > 0))),
+            blocks=len(length),
+            draw_distance=float(length[draw].sum()),
+            travel_distance=float(length[travel].sum()),
+        )
+
+    def estimate(self, gcode_path: Path) -> PlotEstimate:
+        """
+        Estimate the plot time of a G-code file.
+
+        Args:
+            gcode_path: Path to a G-code file (e.g. from GCodeConverter.svg_to_gcode)
+
+        Returns:
+            PlotEstimate with total, draw, travel and pen times
+
+        Raises:
+            FileNotFoundError: If the G-code file doesn't exist
+        """
+        gcode_path = Path(gcode_path)
+        if not gcode_path.exists():
+            raise FileNotFoundError(f"G-code file {gcode_path} does not exist.")
+
+        with open(gcode_path, "r") as gfile:
+            return self.estimate_lines(gfile.read().splitlines())
+
+
+# -------------------------------
+# Standalone CLI Interface
+# -------------------------------
+if __name__ == "__main__":
+    from config.config import FIRMWARE_SETTINGS_PATH
+
+    parser = argparse.ArgumentParser(description="Estimate how long a G-code file takes to plot.")
+    parser.add_argument("gcode_paths", type=Path, nargs="+", help="G-code file(s) to estimate")
+    parser.add_argument("--settings", type=Path, default=FIRMWARE_SETTINGS_PATH,
+                        help="Firmware settings export to model the machine with")
+    args = parser.parse_args()
+
+    estimator = PlotTimeEstimator.from_export(args.settings)
+    for gcode_path in args.gcode_paths:
+        print(f"{gcode_path}: {estimator.estimate(gcode_path)}")
@@ -0,0 +1,258 @@
+"""
+DrawMate Prompt Channel
+-----------------------
+Hands recognized speech from vosk_stt_mic.py to a running drawing pipeline
+(main.py --listen) over a local socket, instead of main.py reading the whole
+stt_log.txt as its prompt:
+
+    - the recognizer pushes every finalized utterance as one JSON line to
+      VOICE_CHANNEL_HOST:VOICE_CHANNEL_PORT (PromptSender); nothing is polled
+      and no file is re-read
+    - the pipeline side (PromptChannel) keeps only the most recent
+      utterances, at most VOICE_PROMPT_MAX_UTTERANCES and
+      VOICE_PROMPT_MAX_CHARACTERS, so the prompt (and its token cost) stays
+      bounded however long the session runs
+    - an utterance starting with "draw" triggers a job with the prompt built
+      from that window (and whatever followed "draw"); "clear" empties it
+
+Usage (pipeline side):
+    async with PromptChannel() as channel:
+        async for command in channel.commands():
+            await draw(command.prompt)
+
+Usage (recognizer side):
+    sender = PromptSender()
+    sender.send("a cat wearing a top hat")
+    sender.send("draw")
+
+Usage (standalone, type utterances to a running pipeline):
+    python PromptChannel.py "a cat wearing a top hat" draw
+
+Author: DrawMate Project
+"""
+
+import argparse
+import asyncio
+import json
+import re
+import select
+import socket
+from collections import deque
+from dataclasses import dataclass
+from typing import AsyncIterator, Optional
+
+from config.config import (
+    VOICE_CHANNEL_HOST, VOICE_CHANNEL_PORT, VOICE_PROMPT_MAX_CHARACTERS, VOICE_PROMPT_MAX_UTTERANCES
+)
+
+DRAW_COMMAND = "draw"
+CLEAR_COMMAND = "clear"
+
+# Longest accepted message line; an utterance is a sentence or two
+MAX_MESSAGE_BYTES = 64 * 1024
+
+
+@dataclass(frozen=True)
+class VoiceCommand:
+    """A spoken command, with the prompt built from the utterances before it."""
+
+    name: str
+    prompt: str
+
+
+class UtteranceWindow:
+    """The most recent utterances, bounded in count and in total characters."""
+
+    def __init__(self,
+                 max_utterances: int = VOICE_PROMPT_MAX_UTTERANCES,
+                 max_characters: int = VOICE_PROMPT_MAX_CHARACTERS):
+        self.max_characters = max_characters
+        self._utterances = deque(maxlen=max_utterances)
+
+    def __len__(self) -> int:
+        return len(self._utterances)
+
+    def add(self, text: str):
+        self._utterances.append(text)
+        # Oldest first out, but always keep the newest even if it alone is too long
+        while len(self._utterances) > 1 and len(self._joined()) > self.max_characters:
+            self._utterances.popleft()
+
+    def clear(self):
+        self._utterances.clear()
+
+    def _joined(self) -> str:
+        return "\n".join(self._utterances)
+
+    @property
+    def prompt(self) -> str:
+        """
+        The utterances, oldest first, one per line.
+
+        An utterance that alone is longer than max_characters keeps its end,
+        cut at a word boundary (mid-word only if a single word is that long).
+        """
+        prompt = self._joined()
+        if len(prompt) <= self.max_characters:
+            return prompt
+        tail = prompt[-self.max_characters:]
+        if not prompt[-self.max_characters - 1].isspace():
+            # The cut went through a word: start at the next whole one
+            boundary = re.search(r"\s+", tail)
+            if boundary is not None and boundary.end() < len(tail):
+                tail = tail[boundary.end():]
+        return tail
+
+
+class PromptChannel:
+    """Pipeline end of the channel: a local server turning utterances into VoiceCommands."""
+
+    def __init__(self,
+                 host: str = VOICE_CHANNEL_HOST,
+                 port: int = VOICE_CHANNEL_PORT,
+                 window: Optional[UtteranceWindow] = None):
+        """
+        Args:
+            host: Interface to listen on (keep it local: anyone connecting can start a job)
+            port: TCP port to listen on
+            window: Window of recent utterances the prompt is built from
+        """
+        self.host = host
+        self.port = port
+        self.window = window if window is not None else UtteranceWindow()
+        self._commands = asyncio.Queue()
+        self._server = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    # -------------------------------
+    # Internal Helpers
+    # -------------------------------
+    async def _handle_sender(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while line := await reader.readline():
+                try:
+                    text = json.loads(line)["text"]
+                except (ValueError, KeyError, TypeError):
+                    print(f"[!] Ignoring malformed voice message: {line[:80]!r}")
+                    continue
+                self.receive(str(text))
+        except (ConnectionError, ValueError) as e:  # ValueError: line over MAX_MESSAGE_BYTES
+            print(f"[!] Voice sender dropped: {e}")
+        finally:
+            writer.close()
+
+    # -------------------------------
+    # Public Methods
+    # -------------------------------
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle_sender, self.host, self.port,
+                                                  limit=MAX_MESSAGE_BYTES)
+        print(f"👂 Listening for voice prompts on {self.host}:{self.port}")
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    def receive(self, text: str):
+        """Take one finalized utterance: a command, or part of the next prompt."""
+        text = " ".join(text.split())
+        if not text:
+            return
+        command, _, rest = text.partition(" ")
+        command = command.lower()
+
+        if command == CLEAR_COMMAND and not rest:
+            self.window.clear()
+            print("🧹 Voice prompt cleared.")
+            return
+        if command != DRAW_COMMAND:
+            self.window.add(text)
+            print(f"🗣️ {text}")
+            return
+
+        if rest:
+            self.window.add(rest)
+        if not len(self.window):
+            print("🗣️ Nothing to draw yet: describe the drawing first.")
+            return
+        self._commands.put_nowait(VoiceCommand(DRAW_COMMAND, self.window.prompt))
+        self.window.clear()
+
+    async def commands(self) -> AsyncIterator[VoiceCommand]:
+        """Yield commands as they are spoken, waiting (not polling) in between."""
+        while True:
+            yield await self._commands.get()
+
+
+class PromptSender:
+    """Recognizer end of the channel: pushes utterances, never blocks on a missing pipeline."""
+
+    def __init__(self,
+                 host: str = VOICE_CHANNEL_HOST,
+                 port: int = VOICE_CHANNEL_PORT,
+                 timeout: float = 1.0):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self._socket = None
+        self._warned = False
+
+    def close(self):
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+
+    def _hung_up(self) -> bool:
+        # The pipeline never writes back, so a readable socket means it closed its end
+        readable, _, _ = select.select([self._socket], [], [], 0)
+        return bool(readable)
+
+    def send(self, text: str) -> bool:
+        """
+        Push one utterance to the pipeline, connecting (again) if needed.
+
+        Returns:
+            Whether it was sent; False while no pipeline is listening
+        """
+        message = (json.dumps({"text": text}) + "\n").encode()
+        for _ in range(2):  # A stale connection gets one reconnect
+            try:
+                if self._socket is not None and self._hung_up():
+                    self.close()
+                if self._socket is None:
+                    self._socket = socket.create_connection((self.host, self.port), timeout=self.timeout)
+                self._socket.sendall(message)
+                self._warned = False
+                return True
+            except OSError:
+                self.close()
+
+        if not self._warned:
+            print(f"[!] No pipeline listening on {self.host}:{self.port}; utterances are only logged.")
+            self._warned = True
+        return False
+
+
+# -------------------------------
+# Standalone CLI Interface
+# -------------------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Send utterances to a listening DrawMate pipeline.")
+    parser.add_argument("utterances", nargs="+", help='Utterances, e.g. "a cat wearing a top hat" draw')
+    parser.add_argument("--port", type=int, default=VOICE_CHANNEL_PORT,
+                        help=f"Channel port (default: {VOICE_CHANNEL_PORT})")
+    args = parser.parse_args()
+
+    sender = PromptSender(port=args.port)
+    for utterance in args.utterances:
+        if not sender.send(utterance):
+            break
+    sender.close()
@@ -0,0 +1,217 @@
+"""
+DrawMate Vectorizer
+-------------------
+In-process raster → outline tracing, replacing the ImageMagick `convert` and
+`potrace` processes of GCodeConverter.raster_to_svg.
+
+Preprocessing (preprocess_bitmap):
+    1. Downscale with area averaging so a pixel is no finer than the plotter
+       can draw: extra resolution only turns into thousands of sub-millimeter
+       paths that slow every later stage
+    2. Threshold: a fixed level, Otsu's global level, or adaptive (local mean)
+    3. Remove speckles: ink blobs and holes below a minimum area
+
+Tracers:
+    potrace  Python potrace bindings (pypotrace, or the pure-Python potracer
+             package), Bézier outlines flattened to polylines
+    opencv   cv2.findContours outlines, the same filled-region boundaries
+             without curve fitting, and much faster than pure-Python potrace
+    auto     The compiled potrace bindings when installed, otherwise opencv
+
+Author: DrawMate Project
+"""
+
+import cv2
+import numpy as np
+
+from PathCollection import PathCollection
+
+try:
+    import potrace
+except ImportError:
+    potrace = None
+
+# potracer (pure Python) mirrors pypotrace's API but inverts bitmaps and is slow
+_POTRACE_IS_PURE_PYTHON = potrace is not None and hasattr(potrace, "POTRACE_TURNPOLICY_MINORITY")
+
+TRACERS = ("auto", "potrace", "opencv")
+THRESHOLD_METHODS = ("otsu", "adaptive")
+BEZIER_STEPS = 8
+
+# Adaptive thresholding: neighborhood as a fraction of the shorter side, and how much
+# darker than its neighborhood a pixel must be to count as ink
+ADAPTIVE_BLOCK_FRACTION = 1 / 16
+ADAPTIVE_OFFSET = 10
+
+
+def load_grayscale(image) -> np.ndarray:
+    """
+    Load an image path, encoded image bytes or BGR/gray array as a uint8 grayscale array.
+
+    Raises:
+        FileNotFoundError: If the image file doesn't exist or can't be decoded
+        ValueError: If image bytes can't be decoded
+    """
+    if isinstance(image, np.ndarray):
+        return image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+
+    if isinstance(image, (bytes, bytearray, memoryview)):
+        gray = cv2.imdecode(np.frombuffer(image, dtype=np.uint8), cv2.IMREAD_GRAYSCALE)
+        if gray is None:
+            raise ValueError("Could not decode image bytes.")
+        return gray
+
+    gray = cv2.imread(str(image), cv2.IMREAD_GRAYSCALE)
+    if gray is None:
+        raise FileNotFoundError(f"Image file {image} does not exist.")
+    return gray
+
+
+def downscale(gray: np.ndarray, max_width: int, max_height: int) -> np.ndarray:
+    """Shrink an image to fit max_width x max_height (keeping its aspect ratio); smaller images are returned as is."""
+    height, width = gray.shape[:2]
+    scale = min(max_width / width, max_height / height)
+    if scale >= 1.0:
+        return gray
+    size = (max(1, round(width * scale)), max(1, round(height * scale)))
+    return cv2.resize(gray, size, interpolation=cv2.INTER_AREA)
+
+
+def threshold_bitmap(gray: np.ndarray, threshold=0.5) -> np.ndarray:
+    """
+    Ink mask (True = black) of a uint8 grayscale image.
+
+    Args:
+        gray: Grayscale image
+        threshold: A level in 0-1 like `convert -threshold 50%` (anything not
+            above it is ink), 'otsu' for the level that best separates the
+            histogram, or 'adaptive' to compare each pixel with its neighborhood
+            (uneven lighting, e.g. photos of drawings)
+
+    Raises:
+        ValueError: If threshold is an unknown method name
+    """
+    if not isinstance(threshold, str):
+        return gray <= threshold * 255
+    if threshold == "otsu":
+        level, _ = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        return gray <= level
+    if threshold == "adaptive":
+        block_size = max(3, int(min(gray.shape) * ADAPTIVE_BLOCK_FRACTION) | 1)
+        paper = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_MEAN_C, cv2.THRESH_BINARY,
+                                      block_size, ADAPTIVE_OFFSET)
+        return paper == 0
+    raise ValueError(f"Unknown threshold '{threshold}'. Expected a level in 0-1 or one of {THRESHOLD_METHODS}.")
+
+
+def remove_speckles(ink: np.ndarray, max_area: int) -> np.ndarray:
+    """Drop ink blobs and fill holes of at most max_area pixels."""
+    if max_area <= 0:
+        return ink
+
+    def small_components(mask: np.ndarray, connectivity: int) -> np.ndarray:
+        _, labels, stats, _ = cv2.connectedComponentsWithStats(mask.astype(np.uint8), connectivity=connectivity)
+        small = stats[:, cv2.CC_STAT_AREA] <= max_area
+        small[0] = False  # Background label
+        return small[labels]
+
+    # 8-connected ink with 4-connected holes, so the two passes don't disagree about diagonals
+    ink = ink & ~small_components(ink, 8)
+    return ink | small_components(~ink, 4)
+
+
+def preprocess_bitmap(gray: np.ndarray, threshold=0.5, max_size: tuple = None, speckle_area: int = 0) -> np.ndarray:
+    """
+    Downscale, threshold and despeckle a grayscale image into an ink mask.
+
+    Args:
+        gray: uint8 grayscale image
+        threshold: See threshold_bitmap()
+        max_size: (width, height) in pixels to shrink the image into, or None
+        speckle_area: Remove blobs and holes up to this many pixels (after downscaling)
+    """
+    if max_size is not None:
+        gray = downscale(gray, *max_size)
+    return remove_speckles(threshold_bitmap(gray, threshold), speckle_area)
+
+
+def encode_pbm(ink: np.ndarray) -> bytes:
+    """Packed binary PBM (P4, 1 = black, one bit per pixel) of an ink mask, e.g. for potrace's stdin."""
+    height, width = ink.shape
+    return f"P4\n{width} {height}\n".encode() + np.packbits(ink, axis=1).tobytes()
+
+
+def _xy(point) -> tuple:
+    return (point.x, point.y) if hasattr(point, "x") else (point[0], point[1])
+
+
+def _flatten_curve(curve) -> np.ndarray:
+    """Flatten one closed potrace curve (corner and Bézier segments) into a polyline."""
+    t = np.linspace(0.0, 1.0, BEZIER_STEPS + 1)[1:, None]
+    points = [np.array([_xy(curve.start_point)])]
+    current = np.array(_xy(curve.start_point))
+
+    for segment in curve.segments:
+        end = np.array(_xy(segment.end_point))
+        if segment.is_corner:
+            corner = np.array(_xy(segment.c))
+            points.append(np.array([corner, end]))
+        else:
+            c1, c2 = np.array(_xy(segment.c1)), np.array(_xy(segment.c2))
+            points.append(
+                (1 - t) ** 3 * current + 3 * (1 - t) ** 2 * t * c1 + 3 * (1 - t) * t ** 2 * c2 + t ** 3 * end
+            )
+        current = end
+
+    return np.concatenate(points)
+
+
+def _trace_potrace(ink: np.ndarray, turdsize: int) -> PathCollection:
+    # pypotrace traces non-zero pixels, potracer traces dark ones
+    bitmap = potrace.Bitmap(~ink if _POTRACE_IS_PURE_PYTHON else ink.astype(np.uint32))
+    return PathCollection.from_lists([_flatten_curve(curve) for curve in bitmap.trace(turdsize=turdsize)])
+
+
+def _trace_opencv(ink: np.ndarray, turdsize: int) -> PathCollection:
+    contours, _ = cv2.findContours(ink.astype(np.uint8), cv2.RETR_LIST, cv2.CHAIN_APPROX_SIMPLE)
+    outlines = [
+        # Close the outline like potrace's closed curves
+        np.concatenate((contour.reshape(-1, 2), contour[:1].reshape(-1, 2)))
+        for contour in contours
+        if cv2.contourArea(contour) > turdsize
+    ]
+    return PathCollection.from_lists(outlines)
+
+
+def resolve_tracer(tracer: str = "auto") -> str:
+    """
+    The backend a tracer setting runs on this installation: 'pypotrace', 'potracer' or 'opencv'.
+
+    Raises:
+        ValueError: If the tracer is unknown, or 'potrace' is requested but not installed
+    """
+    if tracer not in TRACERS:
+        raise ValueError(f"Unknown tracer '{tracer}'. Expected one of {TRACERS}.")
+
+    if tracer == "potrace" or (tracer == "auto" and potrace is not None and not _POTRACE_IS_PURE_PYTHON):
+        if potrace is None:
+            raise ValueError("The potrace tracer needs the pypotrace or potracer package.")
+        return "potracer" if _POTRACE_IS_PURE_PYTHON else "pypotrace"
+    return "opencv"
+
+
+def trace_bitmap(ink: np.ndarray, tracer: str = "auto", turdsize: int = 2) -> PathCollection:
+    """
+    Trace the outlines of the ink regions in pixel coordinates (y down).
+
+    Args:
+        ink: Boolean ink mask
+        tracer: One of TRACERS
+        turdsize: Suppress speckles up to this many pixels (potrace's -t)
+
+    Raises:
+        ValueError: If the tracer is unknown, or 'potrace' is requested but not installed
+    """
+    if resolve_tracer(tracer) == "opencv":
+        return _trace_opencv(ink, turdsize)
+    return _trace_potrace(ink, turdsize)
@@ -1,12 +1,59 @@
 import cv2
+import sys
 import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+# Single background thread so snapshots are written in capture order
+_snapshot_writer = None
+
+
+def _write_snapshot(frame, output_file):
+    if not cv2.imwrite(output_file, frame):
+        raise IOError(f"Could not write snapshot: {output_file}")
+    print(f"✅ Saved image: {output_file}")
+    return output_file
+
+
+def _report_snapshot_failure(future: Future):
+    error = future.exception()
+    if error is not None:
+        print(f"❌ ERROR: Snapshot not saved ({error}).")
+
+
+def save_snapshot_async(frame, output_file) -> Future:
+    """
+    Write a frame to disk on a background thread.
+
+    Returns a Future that resolves to output_file once the file is written.
+    A failed write is printed even if nobody waits on the Future.
+    """
+    global _snapshot_writer
+    if _snapshot_writer is None:
+        _snapshot_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="snapshot-writer")
+    # Copy so the caller can keep drawing on its frame while we encode
+    future = _snapshot_writer.submit(_write_snapshot, frame.copy(), str(output_file))
+    future.add_done_callback(_report_snapshot_failure)
+    return future
+
 
 def capture_image(
     device_index=0,
     width=1280,
     height=720,
-    output_file="snapshot.jpg"
+    output_file=None
 ):
+    """
+    Capture a single frame from the camera.
+
+    Returns the BGR frame as a NumPy array, ready to pass straight to
+    LineExtractor.extract, or None if no frame could be read. Check the
+    result with `is None`: unlike the True/False this used to return, a
+    frame has no truth value.
+
+    If output_file is given, a snapshot is also written to disk in the
+    background without delaying the return; a failed write is printed.
+    Call save_snapshot_async() instead to wait for the file.
+    """
     cap = cv2.VideoCapture(device_index, cv2.CAP_V4L2)
 
     # Force MJPG (works best in WSL2)
@@ -25,18 +72,23 @@ def capture_image(
     print("FOURCC actually used:", cap.get(cv2.CAP_PROP_FOURCC))
 
     ret, frame = cap.read()
+    cap.release()
 
     if not ret:
         print("❌ ERROR: Failed to capture frame.")
-        cap.release()
-        return False
+        return None
 
-    cv2.imwrite(output_file, frame)
-    cap.release()
+    if output_file is not None:
+        save_snapshot_async(frame, output_file)
 
-    print(f"✅ Saved image: {output_file}")
-    return True
+    return frame
 
 
 if __name__ == "__main__":
-    capture_image()
+    frame = capture_image()
+    if frame is None:
+        sys.exit(1)
+    try:
+        save_snapshot_async(frame, "snapshot.jpg").result()
+    except (IOError, cv2.error):
+        sys.exit(1)  # Already printed by the done-callback
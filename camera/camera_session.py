@@ -0,0 +1,252 @@
+import cv2
+import numpy as np
+import threading
+import time
+from collections import deque
+from pathlib import Path
+
+
+class SyntheticSource:
+    """
+    Stand-in for cv2.VideoCapture that produces frames at a fixed rate.
+
+    Serves copies of a given frame (e.g. a rendered ArUco sheet), or a moving
+    test pattern when no frame is given, so CameraSession can be exercised
+    without a webcam.
+    """
+
+    def __init__(self, width=1280, height=720, fps=30.0, frame=None):
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.frame = frame
+        self._index = 0
+        self._next_at = time.monotonic()
+
+    def isOpened(self):
+        return True
+
+    def read(self):
+        # Pace like a real camera
+        delay = self._next_at - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        self._next_at = max(self._next_at, time.monotonic() - 1.0 / self.fps) + 1.0 / self.fps
+
+        if self.frame is not None:
+            frame = self.frame.copy()
+        else:
+            frame = np.full((self.height, self.width, 3), 255, dtype=np.uint8)
+            x = self._index * 8 % self.width
+            cv2.line(frame, (x, 0), (self.width - x, self.height - 1), (0, 0, 0), 3)
+        self._index += 1
+        return True, frame
+
+    def get(self, prop):
+        return {
+            cv2.CAP_PROP_FRAME_WIDTH: self.width,
+            cv2.CAP_PROP_FRAME_HEIGHT: self.height,
+            cv2.CAP_PROP_FPS: self.fps,
+        }.get(prop, 0.0)
+
+    def set(self, prop, value):
+        return False
+
+    def release(self):
+        pass
+
+
+class CameraSession:
+    """
+    Keeps the camera open and grabs frames on a background thread.
+
+    latest() returns the newest frame immediately instead of paying the
+    device startup and warmup on every capture.
+
+    Usage:
+        with CameraSession(0) as camera:
+            frame = camera.latest()
+            print(camera.fps, camera.resolution)
+
+    source may be a V4L2 device index, a video file path (looped and paced
+    at the file's frame rate), or any object with read()/release() such as
+    SyntheticSource.
+    """
+
+    def __init__(self,
+                 source=0,
+                 width=1280,
+                 height=720,
+                 buffer_size=8,
+                 first_frame_timeout=5.0):
+        self.source = source
+        self.width = width
+        self.height = height
+        self.first_frame_timeout = first_frame_timeout
+
+        self._cap = None
+        self._is_file = False
+        self._file_frame_interval = 0.0
+        self._frames = deque(maxlen=buffer_size)   # (timestamp, frame_number, frame)
+        self._frame_number = 0
+        self._condition = threading.Condition()
+        self._running = False
+        self._thread = None
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    # -------------------------------
+    # Internal Helpers
+    # -------------------------------
+    def _open_capture(self):
+        if isinstance(self.source, int):
+            cap = cv2.VideoCapture(self.source, cv2.CAP_V4L2)
+
+            # Force MJPG (works best in WSL2)
+            cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*"MJPG"))
+            cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+            cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+            return cap
+
+        if isinstance(self.source, (str, Path)):
+            cap = cv2.VideoCapture(str(self.source))
+            self._is_file = True
+            fps = cap.get(cv2.CAP_PROP_FPS)
+            self._file_frame_interval = 1.0 / fps if fps and fps > 0 else 1.0 / 30
+            return cap
+
+        return self.source
+
+    def _grab_loop(self):
+        next_at = time.monotonic()
+        rewound = False
+        while self._running:
+            ok, frame = self._cap.read()
+
+            if not ok:
+                if not self._is_file:
+                    time.sleep(0.01)
+                elif rewound:
+                    # Nothing readable even from the start (empty or corrupt file): stop
+                    # instead of spinning, and wake the waiters
+                    with self._condition:
+                        self._running = False
+                        self._condition.notify_all()
+                else:
+                    # Loop the file like an endless camera feed
+                    self._cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                    rewound = True
+                continue
+            rewound = False
+
+            if self._is_file:
+                delay = next_at - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                next_at = max(next_at, time.monotonic() - self._file_frame_interval) + self._file_frame_interval
+
+            with self._condition:
+                self._frame_number += 1
+                self._frames.append((time.monotonic(), self._frame_number, frame))
+                self._condition.notify_all()
+
+    # -------------------------------
+    # Public Methods
+    # -------------------------------
+    def open(self):
+        """Open the device and start grabbing. Returns once the first frame arrives."""
+        if self._running:
+            return self
+
+        if self._cap is not None:
+            self.close()  # The grab loop gave up on the source
+        self._cap = self._open_capture()
+        if hasattr(self._cap, "isOpened") and not self._cap.isOpened():
+            raise RuntimeError(f"Could not open camera source {self.source}.")
+
+        self._running = True
+        self._thread = threading.Thread(target=self._grab_loop, name="camera-grab", daemon=True)
+        self._thread.start()
+
+        # Replaces the fixed warmup sleep: wait only until frames actually flow
+        if self.wait_for_frame(0, timeout=self.first_frame_timeout) is None:
+            self.close()
+            raise RuntimeError(f"No frame from camera source {self.source} within {self.first_frame_timeout}s.")
+        return self
+
+    def close(self):
+        # Wake wait_for_frame() callers, even those waiting without a timeout
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._cap is not None:
+            self._cap.release()
+            self._cap = None
+        with self._condition:
+            self._frames.clear()
+
+    def latest(self):
+        """Newest frame (BGR NumPy array), or None before the first frame."""
+        with self._condition:
+            return self._frames[-1][2] if self._frames else None
+
+    def latest_with_number(self):
+        """(frame_number, frame) of the newest frame, or (0, None)."""
+        with self._condition:
+            if not self._frames:
+                return 0, None
+            _, number, frame = self._frames[-1]
+            return number, frame
+
+    def wait_for_frame(self, after_number, timeout=None):
+        """
+        Block until a frame newer than after_number arrives.
+
+        Returns (frame_number, frame), or None on timeout.
+        """
+        with self._condition:
+            ready = self._condition.wait_for(
+                lambda: self._frames and self._frames[-1][1] > after_number or not self._running,
+                timeout=timeout,
+            )
+            if not ready or not self._frames or self._frames[-1][1] <= after_number:
+                return None
+            _, number, frame = self._frames[-1]
+            return number, frame
+
+    def recent(self):
+        """The frames in the ring buffer, oldest first."""
+        with self._condition:
+            return [frame for _, _, frame in self._frames]
+
+    @property
+    def fps(self):
+        """Measured frame rate over the ring buffer."""
+        with self._condition:
+            if len(self._frames) < 2:
+                return 0.0
+            span = self._frames[-1][0] - self._frames[0][0]
+            return (len(self._frames) - 1) / span if span > 0 else 0.0
+
+    @property
+    def resolution(self):
+        """(width, height) of the frames actually delivered."""
+        frame = self.latest()
+        if frame is None:
+            return None
+        return frame.shape[1], frame.shape[0]
+
+
+if __name__ == "__main__":
+    with CameraSession(0) as camera:
+        time.sleep(2.0)
+        print("Resolution:", camera.resolution)
+        print(f"Measured FPS: {camera.fps:.1f}")
@@ -13,6 +13,7 @@ PROJECT_ROOT = Path(__file__).resolve().parent.parent
 ASSET_DIR = PROJECT_ROOT / "assets"
 GCODE_DIR = PROJECT_ROOT / "gcode"
 CONFIG_DIR = PROJECT_ROOT / "config"
+CACHE_DIR = PROJECT_ROOT / "cache"
 
 # Canvas Dimensions (US Letter paper with 1-inch margins)
 CANVAS_WIDTH_IN_MILLIMETERS = 230
@@ -21,8 +22,44 @@ CANVAS_HEIGHT_IN_MILLIMETERS = 170
 # AI Configuration
 AI_MODEL = "gemini-2.5-flash-image"
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+AI_UPLOAD_MAX_SIZE_IN_PIXELS = 1024  # Long side of control images sent to Gemini
+AI_CANDIDATES = 3                    # Concurrent requests per image; the first plottable answer wins
+AI_REQUEST_TIMEOUT_IN_SECONDS = 90   # Deadline of one request attempt
+AI_MAX_ATTEMPTS = 3                  # Attempts per candidate (timeouts, 429 and 5xx are retried)
+AI_MAX_PATHS = 400                   # Candidates tracing to more paths are ranked instead of accepted
+AI_PROMPT_PATH = CONFIG_DIR / "LineArtContinuationPrompt.md"  # Voice prompts arrive over the channel below
+
+# Gemini response cache (generated image per control image + prompt + model)
+AI_CACHE_DIR = CACHE_DIR / "gemini"
+AI_CACHE_MAX_SIZE_IN_BYTES = 256 * 1024 * 1024
+
+# Voice prompts: vosk_stt_mic.py pushes utterances to main.py --listen over a local socket
+VOICE_CHANNEL_HOST = "127.0.0.1"
+VOICE_CHANNEL_PORT = 8765
+VOICE_PROMPT_MAX_UTTERANCES = 8      # Prompt = the most recent utterances before "draw"
+VOICE_PROMPT_MAX_CHARACTERS = 1000
+STT_LOG_PATH = CONFIG_DIR / "stt_log.txt"
+STT_LOG_MAX_SIZE_IN_BYTES = 1024 * 1024  # Rotated to stt_log.txt.1 ... .STT_LOG_BACKUP_COUNT beyond this
+STT_LOG_BACKUP_COUNT = 3
 
 # Serial Communication
 SERIAL_PORT = "/dev/ttyACM0"
 BAUD_RATE = 115200
 SERIAL_TIMEOUT_IN_SECONDS = 2
+STREAM_MODE = "char-count"  # or "send-wait" as a safe fallback
+
+# Firmware settings export used to model the machine (emulator, time estimates)
+FIRMWARE_SETTINGS_PATH = CONFIG_DIR / "final-firmware_2025-12-10.settings"
+
+# Pen stays down across gaps between consecutive paths shorter than this
+PEN_DOWN_GAP_IN_MILLIMETERS = 0.5
+
+# Runs of G1 segments become G2/G3 arcs within this many mm ($12 included); None keeps plain G1 polylines.
+# Opt in with e.g. 0.2 (linesimplify's tolerance) once the arcs have been checked on the machine
+ARC_FIT_TOLERANCE_IN_MILLIMETERS = None
+
+# Strip comments and redundant words from generated G-code and round it to the step resolution
+COMPACT_GCODE = True
+
+# Conversion artifact cache (G-code, SVG and metadata per image + settings)
+CACHE_MAX_SIZE_IN_BYTES = 512 * 1024 * 1024
@@ -1,83 +1,322 @@
+"""
+DrawMate Pipeline
+-----------------
+Image in, drawing out: Gemini line-art continuation, conversion to G-code and
+streaming to the plotter, with the independent stages overlapped:
+
+    connect ─ home ($H) ──────────────────────────┐
+    read image ─ AI line art ─ convert (prefetch) ─┴─ plot
+
+Connecting, resetting and homing the plotter don't depend on the image, so
+they run while Gemini is working. Conversion starts as soon as the image to
+draw is known and keeps producing lines ahead of the plotter. The image, the
+generated line art and the G-code pass between stages in memory; the G-code
+file is still written (and cached) for replay. A per-stage timing breakdown
+is printed at the end.
+
+With --listen it stays running with the plotter homed, and draws whenever
+"draw" is spoken: vosk_stt_mic.py pushes utterances over a local socket
+(PromptChannel) and the prompt is built from the last few of them.
+
+Usage:
+    python main.py assets/bird.jpg
+    python main.py assets/bird.jpg --no-ai --port /dev/ttyUSB0
+    python main.py assets/bird.jpg --prompt config/LineArtContinuationPrompt.md
+    python main.py assets/bird.jpg --listen      # then run vosk_stt_mic.py and talk
+
+Author: DrawMate Project
+"""
+
+import argparse
+import asyncio
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional
+
+import serial
+
 from config.config import (
-    ASSET_DIR, BAUD_RATE, CANVAS_WIDTH_IN_MILLIMETERS,
-    CANVAS_HEIGHT_IN_MILLIMETERS, CONFIG_DIR, GCODE_DIR,
-    SERIAL_PORT, SERIAL_TIMEOUT_IN_SECONDS
+    AI_CACHE_DIR, AI_CACHE_MAX_SIZE_IN_BYTES, AI_PROMPT_PATH, ARC_FIT_TOLERANCE_IN_MILLIMETERS, ASSET_DIR,
+    BAUD_RATE, CACHE_DIR, CACHE_MAX_SIZE_IN_BYTES, CANVAS_WIDTH_IN_MILLIMETERS, CANVAS_HEIGHT_IN_MILLIMETERS,
+    COMPACT_GCODE, FIRMWARE_SETTINGS_PATH, GCODE_DIR, PEN_DOWN_GAP_IN_MILLIMETERS, SERIAL_PORT,
+    SERIAL_TIMEOUT_IN_SECONDS, STREAM_MODE, VOICE_CHANNEL_PORT
 )
 
+from ArtifactCache import ArtifactCache
 from GCodeConverter import GCodeConverter
-from DrawMateStreamer import DrawMateStreamer
-from pathlib import Path
-import sys
+from DrawMateStreamer import DrawMateStreamer, GrblAlarmError, GrblHandshakeError, PrefetchedLines
+from GrblSettings import GrblSettings
+from PlotTimeEstimator import PlotTimeEstimator
+from PromptChannel import PromptChannel
 
-AI_ENABLED = True
-ai_prompt_file = "stt_log.txt"
-#ai_prompt_file = "LineArtContinuationPrompt.md"
 
+class StageTimings:
+    """Start and end of every pipeline stage, relative to the pipeline start."""
 
-# Only import AI components if enabled
-if AI_ENABLED:
-    from LineArtGenerator import LineArtGenerator
-    from google.genai import errors
-
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages = {}
 
-def main():
-    # Handle input image
-    if len(sys.argv) > 1:
-        INPUT_IMAGE = Path(sys.argv[1])
-        if not INPUT_IMAGE.exists():
-            print(f"[!] Image file not found: {INPUT_IMAGE}")
-            return
-        print(f"🖼️ Using input image: {INPUT_IMAGE}")
-    else:
-        INPUT_IMAGE = ASSET_DIR / "bird.jpg"
-        print(f"🖼️ No image argument provided. Using default: {INPUT_IMAGE}")
+    def start(self, name: str):
+        self.stages[name] = (time.perf_counter() - self.started, None)
 
-    # --- Conversion pipeline ---
-    gcode_converter = GCodeConverter(
-        ASSET_DIR,
-        GCODE_DIR,
-        CANVAS_WIDTH_IN_MILLIMETERS,
-        CANVAS_HEIGHT_IN_MILLIMETERS
-    )
+    def stop(self, name: str):
+        self.stages[name] = (self.stages[name][0], time.perf_counter() - self.started)
 
-    # Immediately send the user image to LineArtGenerator and draw AI image
-    # --- AI Line Art Generation ---
-    if AI_ENABLED:
-        ai_output_path = None
+    @contextmanager
+    def stage(self, name: str):
+        self.start(name)
         try:
-            line_art_generator = LineArtGenerator()
-            ai_output_path = line_art_generator.generate(
-                INPUT_IMAGE,
-                CONFIG_DIR / ai_prompt_file
-            )
-
-            if ai_output_path:
-                print(f"Line art generated: {ai_output_path}")
+            yield
+        finally:
+            self.stop(name)
+
+    def timed_lines(self, name: str, lines):
+        """Yield lines, timing the stage from the first request to the first line (the work up front)."""
+        self.start(name)
+        for line in lines:
+            if self.stages[name][1] is None:
+                self.stop(name)
+            yield line
+
+    def __str__(self) -> str:
+        total = time.perf_counter() - self.started
+        rows = [f"⏱️ Stage timings ({total:.1f}s in total):"]
+        for name, (start, end) in sorted(self.stages.items(), key=lambda item: item[1][0]):
+            if end is None:
+                rows.append(f"   {name:<10} {start:7.1f}s →     ...  (unfinished)")
             else:
-                print("No image generated by AI.")
-        except errors.APIError as e:
+                rows.append(f"   {name:<10} {start:7.1f}s → {end:7.1f}s  ({end - start:.1f}s)")
+        return "\n".join(rows)
+
+
+# -------------------------------
+# Stages
+# -------------------------------
+def connect_and_home(streamer: DrawMateStreamer, timings: StageTimings) -> bool:
+    """Open the serial connection and home the plotter. Returns whether it is ready to plot."""
+    try:
+        with timings.stage("connect"):
+            streamer.open()
+        with timings.stage("home"):
+            streamer.home()
+        return True
+    except GrblAlarmError as e:
+        print(f"🚨 {e}")
+    except GrblHandshakeError as e:
+        print(f"[!] GRBL handshake failed: {e}")
+    except serial.SerialException as e:
+        print(f"[!] Serial connection error: {e}")
+    return False
+
+
+async def generate_line_art(generator, image_bytes: bytes, prompt: str,
+                            timings: StageTimings) -> Optional[bytes]:
+    """Line art continuing the input image, None (with the reason printed) if there is none."""
+    with timings.stage("ai"):
+        try:
+            line_art = await generator.continue_image(image_bytes, prompt)
+        except TimeoutError:
+            print("API Error: every candidate timed out.")
+            return None
+        except Exception as e:
+            # google.genai.errors.APIError (or the emulator's stand-in) carries an HTTP status code
+            if getattr(e, "code", None) is None:
+                raise
             print(f"API Error: {e.code}: {e.message}")
-        except FileNotFoundError as e:
-            print(e)
+            return None
+
+    if line_art is None:
+        print("No image generated by AI.")
     else:
-        print("🤖 AI features disabled. Skipping line-art generation.")
-        return
+        print(f"✅ Line art generated ({len(line_art)} bytes).")
+    return line_art
+
+
+async def prepare(image_path: Path, prompt: Optional[str], generator, converter: GCodeConverter,
+                  streamer: DrawMateStreamer, timings: StageTimings):
+    """
+    Run the stages that can overlap: connecting and homing alongside AI and conversion.
+
+    Returns:
+        (prefetched G-code lines, their GCodeStream, whether the plotter is ready)
+    """
+    # Submitted to a worker thread right away, not at the first await
+    homing = asyncio.get_running_loop().run_in_executor(None, connect_and_home, streamer, timings)
 
+    with timings.stage("read"):
+        image_bytes = image_path.read_bytes()
+    name = image_path.stem
 
-    print("🖼️  Step 1: Converting raster to SVG...")
-    svg_file_path = gcode_converter.raster_to_svg(ai_output_path if ai_output_path else INPUT_IMAGE)
+    if generator is None:
+        print("🤖 AI features disabled. Drawing the input image.")
+    elif prompt is not None:
+        line_art = await generate_line_art(generator, image_bytes, prompt, timings)
+        if line_art is not None:
+            image_bytes, name = line_art, f"{name}_continuation"
+        else:
+            print(f"↩️ Drawing the input image instead: {image_path}")
 
-    print("⚙️  Step 2: Converting SVG to G-code...")
-    gcode_path = gcode_converter.svg_to_gcode(svg_file_path)
+    # Conversion starts now, on the prefetch thread, whether or not homing is done
+    gcode_stream = converter.gcode_stream(image_bytes, name=name)
+    lines = PrefetchedLines(timings.timed_lines("convert", gcode_stream))
+    ready = await homing
+    return lines, gcode_stream, ready
 
-    print(f"✅ G-code file created: {gcode_path}")
 
-    # --- Stream to DrawMate ---
-    print("📡 Step 3: Streaming G-code to DrawMate...")
-    streamer = DrawMateStreamer(SERIAL_PORT, BAUD_RATE, SERIAL_TIMEOUT_IN_SECONDS)
-    streamer.stream_gcode(gcode_path)
+def run_job(args, prompt: Optional[str], converter: GCodeConverter, streamer: DrawMateStreamer) -> bool:
+    """
+    One drawing: prepare (overlapped), then plot on this thread so Ctrl+C still interrupts it.
+
+    Returns:
+        Whether the drawing was plotted completely
+
+    Raises:
+        KeyboardInterrupt: If the plot is interrupted (the plotter has been stopped)
+    """
+    timings = StageTimings()
+    # Built per job: the async genai client belongs to the event loop it first runs on
+    generator = None if args.no_ai else make_line_art_generator(args, converter)
+    lines, gcode_stream, ready = asyncio.run(prepare(args.image, prompt, generator, converter, streamer, timings))
+
+    plotted = False
+    if ready:
+        with timings.stage("plot"):
+            plotted = streamer.stream_gcode(lines)
+    else:
+        print("⚠️ Plotter not ready. Saving the G-code for replay instead.")
+        with timings.stage("save"):
+            for _ in lines:
+                pass
+
+    if gcode_stream.result is not None:
+        print(f"✅ G-code file saved: {gcode_stream.result.gcode_path}")
+        # Estimated once by the converter (and cached with the G-code)
+        seconds = gcode_stream.result.metadata["estimated_plot_time_in_seconds"]
+        print(f"⏱️ Estimated plot time: {int(seconds // 60)}m{seconds % 60:04.1f}s")
+    print(timings)
+    if plotted:
+        print("🎉 Done! The DrawMate should now be plotting.")
+    elif ready:
+        print("❌ Plot failed. See the messages above.")
+    return plotted
+
+
+def serve_prompt_channel(jobs: queue.Queue, port: int):
+    """Run the voice PromptChannel on this (background) thread, handing spoken commands to jobs."""
+    async def serve():
+        async with PromptChannel(port=port) as channel:
+            async for command in channel.commands():
+                jobs.put(command)
+
+    stopped = RuntimeError("The voice prompt channel stopped.")
+    try:
+        asyncio.run(serve())
+    except Exception as e:
+        stopped = e
+    finally:
+        # listen() blocks on jobs, so it has to hear about the channel ending, however it ends
+        jobs.put(stopped)
+
+
+def listen(args, converter: GCodeConverter, streamer: DrawMateStreamer):
+    """
+    Draw whenever "draw" is spoken to vosk_stt_mic.py, one job at a time, homing only once.
+
+    Ctrl+C during a job stops the plotter and goes back to listening; Ctrl+C
+    while listening exits.
+    """
+    jobs = queue.Queue()
+    threading.Thread(target=serve_prompt_channel, args=(jobs, args.voice_port),
+                     name="prompt-channel", daemon=True).start()
+
+    # Connect and home while nobody has asked for a drawing yet
+    connect_and_home(streamer, StageTimings())
+    print('🎤 Describe a drawing, then say "draw". (Ctrl+C to exit)')
+    while True:
+        command = jobs.get()  # Blocks until a command is spoken; nothing is polled
+        if isinstance(command, Exception):
+            raise command
+        print(f"🎤 Drawing from the voice prompt:\n{command.prompt}")
+        try:
+            run_job(args, command.prompt, converter, streamer)
+        except KeyboardInterrupt:
+            # The aborted stream closed the connection; the next job reconnects and homes again
+            print('\n🛑 Drawing aborted. Say "draw" for the next one. (Ctrl+C again to exit)')
+
+
+# -------------------------------
+# Entry Point
+# -------------------------------
+def make_line_art_generator(args, converter: GCodeConverter):
+    from LineArtGenerator import LineArtGenerator
+
+    client = None
+    if args.offline:
+        from GeminiEmulator import GeminiEmulator
+        client = GeminiEmulator(latency_in_seconds=2.0, latency_jitter_in_seconds=4.0)
+    return LineArtGenerator(client=client,
+                            cache=ArtifactCache(AI_CACHE_DIR, AI_CACHE_MAX_SIZE_IN_BYTES),
+                            converter=converter)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Continue an image with AI and draw it on the DrawMate.")
+    parser.add_argument("image", type=Path, nargs="?", default=ASSET_DIR / "bird.jpg",
+                        help="Input image (default: assets/bird.jpg)")
+    parser.add_argument("--no-ai", action="store_true", help="Draw the input image without line-art generation")
+    parser.add_argument("--prompt", type=Path, default=AI_PROMPT_PATH,
+                        help=f"Prompt file (default: config/{AI_PROMPT_PATH.name})")
+    parser.add_argument("--port", default=SERIAL_PORT, help=f"Serial port of the plotter (default: {SERIAL_PORT})")
+    parser.add_argument("--offline", action="store_true", help="Answer AI requests with the local GeminiEmulator")
+    parser.add_argument("--listen", action="store_true",
+                        help="Stay running and draw with the spoken prompt whenever vosk_stt_mic.py hears \"draw\"")
+    parser.add_argument("--voice-port", type=int, default=VOICE_CHANNEL_PORT,
+                        help=f"Local port of the voice prompt channel (default: {VOICE_CHANNEL_PORT})")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if not args.image.exists():
+        print(f"[!] Image file not found: {args.image}")
+        return
+    print(f"🖼️ Using input image: {args.image}")
+
+    grbl_settings = GrblSettings.from_export(FIRMWARE_SETTINGS_PATH)
+    gcode_converter = GCodeConverter(
+        ASSET_DIR,
+        GCODE_DIR,
+        CANVAS_WIDTH_IN_MILLIMETERS,
+        CANVAS_HEIGHT_IN_MILLIMETERS,
+        pen_down_gap_in_millimeters=PEN_DOWN_GAP_IN_MILLIMETERS,
+        arc_tolerance_in_millimeters=ARC_FIT_TOLERANCE_IN_MILLIMETERS,
+        compact_gcode=COMPACT_GCODE,
+        grbl_settings=grbl_settings,
+        cache=ArtifactCache(CACHE_DIR, CACHE_MAX_SIZE_IN_BYTES),
+        plot_time_estimator=PlotTimeEstimator(grbl_settings)
+    )
+    streamer = DrawMateStreamer(args.port, BAUD_RATE, SERIAL_TIMEOUT_IN_SECONDS, STREAM_MODE)
+
+    try:
+        if args.listen:
+            listen(args, gcode_converter, streamer)
+            return
 
-    print("🎉 Done! The DrawMate should now be plotting.")
+        prompt = None
+        if not args.no_ai:
+            try:
+                prompt = args.prompt.read_text()
+            except FileNotFoundError:
+                print(f"[!] Prompt file {args.prompt} does not exist. Drawing the input image.")
+        run_job(args, prompt, gcode_converter, streamer)
+    except KeyboardInterrupt:
+        print("\n🛑 Exiting.")
+    finally:
+        streamer.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,24 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# The modules live flat in the repository root
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from GrblEmulator import GrblEmulator  # noqa: E402
+from GrblSettings import GrblSettings  # noqa: E402
+from config.config import FIRMWARE_SETTINGS_PATH  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def settings() -> GrblSettings:
+    return GrblSettings.from_export(FIRMWARE_SETTINGS_PATH)
+
+
+@pytest.fixture
+def emulator(settings):
+    # Emulated motion runs 100x faster than real time
+    with GrblEmulator(settings, time_scale=0.01) as emulator:
+        yield emulator
@@ -0,0 +1,104 @@
+import math
+import re
+
+import numpy as np
+import pytest
+
+from ArcFitter import ArcFitter
+
+WORD_PATTERN = re.compile(r"([A-Z])([-+]?[\d.]+)")
+
+
+def circle_points(radius: float, start: float, sweep: float, count: int, center=(50.0, 50.0)) -> np.ndarray:
+    angles = start + sweep * np.arange(count + 1) / count
+    return np.column_stack((center[0] + radius * np.cos(angles), center[1] + radius * np.sin(angles)))
+
+
+def program(points: np.ndarray) -> list:
+    return (["G21", "G90", f"G0 X{points[0][0]:.4f} Y{points[0][1]:.4f}", "G1 Z0 F1000"]
+            + [f"G1 X{x:.4f} Y{y:.4f}" for x, y in points[1:]] + ["G0 Z5"])
+
+
+def trace(lines: list) -> np.ndarray:
+    """Points along the XY path of lines, arcs sampled densely."""
+    position, motion, points = np.zeros(2), 0, []
+    for line in lines:
+        words = dict(WORD_PATTERN.findall(line.upper()))
+        if float(words.get("G", -1)) in (0, 1, 2, 3):
+            motion = int(float(words["G"]))
+        if "X" not in words and "Y" not in words:
+            continue
+        target = np.array([float(words.get("X", position[0])), float(words.get("Y", position[1]))])
+        if motion in (2, 3):
+            center = position + [float(words["I"]), float(words["J"])]
+            start = math.atan2(*(position - center)[::-1])
+            sweep = math.atan2(*(target - center)[::-1]) - start
+            sweep = sweep % (2 * math.pi) if motion == 3 else -((-sweep) % (2 * math.pi))
+            radius = np.hypot(*(position - center))
+            points += [center + radius * np.array([math.cos(a), math.sin(a)])
+                       for a in start + sweep * np.linspace(0, 1, 5000)]
+        else:
+            points += list(np.linspace(position, target, 50))
+        position = target
+    return np.array(points)
+
+
+def distance_to_path(points: np.ndarray, path: np.ndarray) -> np.ndarray:
+    return np.min(np.linalg.norm(points[:, None, :] - path[None, :, :], axis=2), axis=1)
+
+
+@pytest.mark.parametrize("sweep", [math.pi / 2, -3 * math.pi / 2])
+def test_round_trip_stays_within_tolerance(sweep):
+    fitter = ArcFitter(tolerance=0.05)
+    points = circle_points(20.0, 0.3, sweep, 60)
+    reports = []
+    fitted = list(fitter.fit_lines(program(points), on_report=reports.append))
+
+    arcs = [line for line in fitted if re.match(r"G[23] ", line)]
+    assert arcs and all(line.startswith("G3 " if sweep > 0 else "G2 ") for line in arcs)
+    assert reports[0].arcs == len(arcs)
+    assert reports[0].lines_after < reports[0].lines_before
+
+    path = trace(fitted)
+    assert np.max(distance_to_path(points, path)) <= fitter.tolerance
+    np.testing.assert_allclose(path[-1], points[-1], atol=1e-4)
+
+
+def test_straight_and_jagged_runs_pass_through():
+    fitter = ArcFitter(tolerance=0.05)
+    zigzag = np.array([(i, i % 2 * 5.0) for i in range(10)], dtype=float)
+    lines = program(zigzag)
+    assert list(fitter.fit_lines(lines)) == lines
+
+
+def test_modal_line_after_an_arc_restates_g1():
+    fitter = ArcFitter(tolerance=0.05)
+    points = circle_points(20.0, 0.0, math.pi / 2, 30)
+    lines = program(points)[:-1] + ["X0 Y0", "G0 Z5"]
+    fitted = list(fitter.fit_lines(lines))
+    assert fitted[-2] == "G1 X0 Y0"
+
+
+def test_relative_mode_is_not_fitted():
+    fitter = ArcFitter(tolerance=0.05)
+    points = circle_points(20.0, 0.0, math.pi / 2, 30)
+    lines = ["G91"] + program(points)[2:]
+    assert list(fitter.fit_lines(lines)) == lines
+
+
+def test_from_settings_leaves_room_for_arc_segmentation(settings):
+    with pytest.raises(ValueError):
+        ArcFitter.from_settings(settings, settings.arc_tolerance_in_mm)
+    fitter = ArcFitter.from_settings(settings, 0.05)
+    assert fitter.tolerance == pytest.approx(0.05 - settings.arc_tolerance_in_mm)
+
+
+def test_long_arc_takes_logarithmically_many_fits(monkeypatch):
+    fitter = ArcFitter(tolerance=0.05)
+    calls = []
+    fit_circle = fitter._fit_circle
+    monkeypatch.setattr(fitter, "_fit_circle", lambda points: calls.append(len(points)) or fit_circle(points))
+
+    moves = fitter.fit_points(circle_points(50.0, 0.0, 5.0, 2000))
+    assert len(moves) == 1 and moves[0][0] == 2000
+    assert len(calls) <= 2 * math.log2(2000)
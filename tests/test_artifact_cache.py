@@ -0,0 +1,81 @@
+import os
+import threading
+
+import pytest
+
+from ArtifactCache import ArtifactCache
+
+
+def stage(cache: ArtifactCache, gcode: str = "G0 X0\n", size: int = 0):
+    staging = cache.new_staging_directory()
+    (staging / ArtifactCache.GCODE_NAME).write_text(gcode + "; " * size)
+    return staging
+
+
+def test_key_depends_on_bytes_and_parameters():
+    key = ArtifactCache.key(b"image", {"threshold": 0.5, "tracer": "potrace"})
+    assert key == ArtifactCache.key(b"image", {"tracer": "potrace", "threshold": 0.5})
+    assert key != ArtifactCache.key(b"image", {"threshold": 0.6, "tracer": "potrace"})
+    assert key != ArtifactCache.key(b"other", {"threshold": 0.5, "tracer": "potrace"})
+
+
+def test_put_then_get(tmp_path):
+    cache = ArtifactCache(tmp_path)
+    assert cache.get("missing") is None
+
+    artifact = cache.put("k", stage(cache, "G1 X1\n"), {"path_count": 3})
+    assert artifact.gcode_path.read_text() == "G1 X1\n"
+    assert artifact.svg_path is None
+    assert cache.get("k").metadata == {"path_count": 3}
+    assert len(cache) == 1
+    assert not any((tmp_path / "staging").iterdir())
+
+
+def test_put_without_gcode_fails(tmp_path):
+    cache = ArtifactCache(tmp_path)
+    with pytest.raises(FileNotFoundError):
+        cache.put("k", cache.new_staging_directory(), {})
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = ArtifactCache(tmp_path, max_size_in_bytes=2500)
+    for number, key in enumerate("abc"):
+        cache.put(key, stage(cache, size=400), {})
+        # Distinct last-use times without sleeping
+        os.utime(tmp_path / "entries" / key / ArtifactCache.METADATA_NAME, (number, number))
+
+    cache.get("a")  # a is now the most recently used
+    cache.put("d", stage(cache, size=400), {})
+
+    assert cache.get("b") is None
+    assert all(cache.get(key) is not None for key in "acd")
+    assert cache.size_in_bytes <= cache.max_size_in_bytes
+
+
+def test_keeps_the_new_entry_even_when_it_alone_is_too_big(tmp_path):
+    cache = ArtifactCache(tmp_path, max_size_in_bytes=100)
+    cache.put("old", stage(cache), {})
+    cache.put("big", stage(cache, size=1000), {})
+    assert cache.get("old") is None
+    assert cache.get("big") is not None
+
+
+def test_concurrent_puts_of_one_key_keep_a_single_entry(tmp_path):
+    cache = ArtifactCache(tmp_path)
+    stagings = [stage(cache, f"G0 X{number}\n") for number in range(8)]
+    results, barrier = [], threading.Barrier(len(stagings))
+
+    def put(staging):
+        barrier.wait()
+        results.append(cache.put("k", staging, {}))
+
+    threads = [threading.Thread(target=put, args=(staging,)) for staging in stagings]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(results) == len(stagings)
+    assert len({artifact.gcode_path.read_text() for artifact in results}) == 1
+    assert len(cache) == 1
+    assert not any((tmp_path / "staging").iterdir())
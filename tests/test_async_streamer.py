@@ -0,0 +1,22 @@
+import asyncio
+
+from AsyncDrawMateStreamer import AsyncDrawMateStreamer
+from DrawMateStreamer import DrawMateStreamer
+
+
+def test_streams_a_file_and_skips_a_repeated_homing(emulator, tmp_path):
+    gcode_path = tmp_path / "square.gcode"
+    gcode_path.write_text("; square\n$H\nG21\nG90\nG0 X10 Y10\nG1 X40 Y10 F3000\nG1 X40 Y40\n\n")
+
+    async def stream_twice():
+        streamer = DrawMateStreamer(emulator.port)
+        async with AsyncDrawMateStreamer(streamer, status_interval=0.05) as async_streamer:
+            first = await async_streamer.stream_gcode(gcode_path)
+            second = await async_streamer.stream_gcode(gcode_path)
+            return first, second, streamer.homed
+
+    first, second, homed = asyncio.run(stream_twice())
+    assert first == [] and second == []
+    assert homed
+    # The second job's $H was dropped: 6 + 5 lines and the handshake's $X
+    assert emulator.stats.lines_ok == 12
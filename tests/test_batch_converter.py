@@ -0,0 +1,40 @@
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+
+import BatchConverter
+from BatchConverter import convert_batch
+from config.config import ASSET_DIR, FIRMWARE_SETTINGS_PATH
+
+
+class BrokenPool:
+    """Stands in for a process pool whose workers died."""
+
+    def __init__(self, **kwargs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def submit(self, fn, *args):
+        future = Future()
+        future.set_exception(BrokenProcessPool("A worker process terminated abruptly."))
+        return future
+
+
+def test_a_dead_worker_is_recorded_as_a_failed_result(tmp_path, monkeypatch):
+    monkeypatch.setattr(BatchConverter, "ProcessPoolExecutor", BrokenPool)
+    options = dict(asset_directory=ASSET_DIR, gcode_directory=tmp_path / "gcode", cache_directory=tmp_path / "cache",
+                   cache_max_size_in_bytes=10 ** 8, settings_path=FIRMWARE_SETTINGS_PATH,
+                   canvas_width_in_millimeters=200, canvas_height_in_millimeters=150)
+    images = [ASSET_DIR / "snowflake.png", ASSET_DIR / "bird.jpg"]
+    reported = []
+
+    results = convert_batch(images, options, workers=2, on_result=reported.append)
+
+    assert [result.image_path for result in results] == images
+    assert len(reported) == 2
+    assert all(not result.ok and result.error.startswith("BrokenProcessPool") for result in results)
+    BatchConverter.print_summary(results, 0.0)
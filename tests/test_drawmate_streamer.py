@@ -0,0 +1,94 @@
+import threading
+
+import pytest
+
+from DrawMateStreamer import STREAM_MODES, DrawMateStreamer, GrblAckTimeoutError
+
+SQUARE = [
+    "G21", "G90", "F3000", "G0 Z10", "G0 X10 Y10", "G1 Z0",
+    "G1 X40 Y10", "G1 X40 Y40", "G1 X10 Y40", "G1 X10 Y10", "G0 Z10",
+]
+
+
+@pytest.mark.parametrize("mode", STREAM_MODES)
+def test_streams_every_line(emulator, mode):
+    with DrawMateStreamer(emulator.port, mode=mode) as streamer:
+        streamer.homed = True
+        assert streamer.stream_gcode(SQUARE * 5)
+        assert emulator.wait_until_idle(timeout=10)
+
+    assert emulator.stats.lines_received == len(SQUARE) * 5 + 1  # and the $X of the handshake
+    assert emulator.stats.lines_error == 0
+    assert emulator.stats.rx_overflow_bytes == 0
+
+
+def test_streams_a_file(emulator, tmp_path):
+    gcode_path = tmp_path / "square.gcode"
+    gcode_path.write_text("; a square\n\n" + "\n".join(SQUARE) + "\n")
+    with DrawMateStreamer(emulator.port) as streamer:
+        streamer.homed = True
+        assert streamer.stream_gcode(gcode_path)
+    assert emulator.stats.lines_ok == len(SQUARE) + 1
+
+
+def test_rejected_line_fails_the_stream(emulator, capsys):
+    lines = SQUARE[:5] + ["G5 X1"] + SQUARE[5:]
+    with DrawMateStreamer(emulator.port) as streamer:
+        streamer.homed = True
+        assert not streamer.stream_gcode(lines)
+        # A rejected line doesn't end the connection
+        assert streamer.is_open
+
+    assert "error:20 (line 6: G5 X1)" in capsys.readouterr().out
+    assert emulator.stats.lines_error == 1
+    assert emulator.stats.lines_ok == len(SQUARE) + 1
+
+
+def test_alarm_aborts_the_stream(emulator, capsys):
+    # Long slow moves, so the stream is still running when the limit switch trips
+    lines = ["G21", "G90", "F600"] + [f"G1 X{10 + i % 2 * 100} Y{10 + i}" for i in range(60)]
+    with DrawMateStreamer(emulator.port) as streamer:
+        streamer.homed = True
+        alarm = threading.Timer(0.05, emulator.trigger_alarm)
+        alarm.start()
+        try:
+            assert not streamer.stream_gcode(lines)
+        finally:
+            alarm.cancel()
+        # The alarm clears the homed state and closes the connection
+        assert not streamer.homed
+        assert not streamer.is_open
+
+    assert "ALARM:1" in capsys.readouterr().out
+    assert emulator.stats.lines_received < len(lines)
+
+
+def test_homed_machine_skips_the_jobs_homing(emulator, capsys):
+    with DrawMateStreamer(emulator.port) as streamer:
+        assert not streamer.homed
+        assert streamer.stream_gcode(["$H"] + SQUARE)
+        assert streamer.homed
+        assert streamer.stream_gcode(["$H"] + SQUARE)
+
+    assert capsys.readouterr().out.count("Skipping $H") == 1
+    assert emulator.stats.lines_ok == 2 * len(SQUARE) + 2
+
+
+class SilentPort:
+    def readline(self):
+        return b""
+
+    def write(self, payload):
+        pass
+
+
+def test_silent_grbl_times_out():
+    streamer = DrawMateStreamer("unused", ack_timeout=0.05)
+    with pytest.raises(GrblAckTimeoutError, match="line 1: G0 X1"):
+        streamer._stream_character_counting(SilentPort(), ["G0 X1"])
+
+
+def test_send_wait_gives_up_after_ack_timeout(capsys):
+    streamer = DrawMateStreamer("unused", ack_timeout=0.05)
+    streamer._send_line(SilentPort(), "G0 X1")
+    assert "No response received in 0.05s" in capsys.readouterr().out
@@ -0,0 +1,63 @@
+import math
+import re
+
+import pytest
+
+from GCodeCompactor import GCodeCompactor, decimals_for_resolution, format_number
+
+
+def compact(lines: list, **kwargs) -> list:
+    return list(GCodeCompactor(**kwargs).compact_lines(lines))
+
+
+def test_format_number():
+    assert format_number(0.5, 3) == ".5"
+    assert format_number(-0.25, 3) == "-.25"
+    assert format_number(12.0, 3) == "12"
+    assert format_number(-0.0001, 3) == "0"
+
+
+def test_decimals_keep_rounding_within_the_step_error():
+    resolution = 1 / 5.201
+    decimals = decimals_for_resolution(resolution, 0.05)
+    assert 0.5 * 10 ** -decimals <= 0.05 * resolution
+
+
+def test_strips_comments_and_redundant_words():
+    lines = [
+        "G21 ; millimeters", "G90", "G0 Z10 (pen up)", "G0 X10.000 Y10.000", "G1 Z0 F1000",
+        "G1 X20 Y10 F1000", "G1 X20 Y20", "G0 Z10", "G0 Z10", "", "; done",
+    ]
+    assert compact(lines) == ["G21", "G90", "G0Z10", "X10Y10", "G1Z0F1000", "X20", "Y20", "G0Z10"]
+
+
+def test_rounds_to_the_step_resolution():
+    resolution = (1 / 4.702, 1 / 5.201, 1 / 3.180)
+    out = compact(["G21 G90", "G1 X12.3456789 Y1.23456789 F500"], resolution=resolution)
+    words = {letter: float(value) for letter, value in re.findall(r"([A-Z])([-\d.]+)", out[-1])}
+    assert abs(words["X"] - 12.3456789) <= 0.05 * resolution[0]
+    assert abs(words["Y"] - 1.23456789) <= 0.05 * resolution[1]
+
+
+def test_arc_center_stays_on_the_rounded_chords_bisector():
+    out = compact(["G21 G90 G17", "G0 X10.0004 Y0.0004", "G3 X-10.0004 Y0.0004 I-10.0004 J-0.0004"])
+    arc = out[-1]
+    assert arc.startswith("G3X-10")
+    words = {letter: float(value) for letter, value in re.findall(r"([A-Z])([-\d.]+)", arc)}
+    i, j = words["I"], words["J"]
+    start, end = (10.0, 0.0), (-10.0, 0.0)
+    center = (start[0] + i, start[1] + j)
+    assert math.dist(center, start) == pytest.approx(math.dist(center, end), abs=0.001)
+
+
+def test_forgets_state_after_system_and_non_modal_commands():
+    lines = ["G21 G90", "G0 X5", "$H", "G0 X5", "G92 X0", "G0 X5"]
+    assert compact(lines) == ["G21G90", "G0X5", "$H", "X5", "G92X0", "G0X5"]
+
+
+def test_reports_savings():
+    reports = []
+    lines = ["G21 ; units", "G1 X1.0000 F1000", "G1 X2.0000 F1000"]
+    list(GCodeCompactor().compact_lines(lines, on_report=reports.append))
+    assert reports[0].lines_before == 3
+    assert reports[0].bytes_saved > 0
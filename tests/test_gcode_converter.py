@@ -0,0 +1,46 @@
+import re
+
+import pytest
+
+from ArtifactCache import ArtifactCache
+from GCodeConverter import GCodeConverter
+from Vectorizer import resolve_tracer
+from config.config import ASSET_DIR
+
+IMAGE = ASSET_DIR / "snowflake.png"
+
+
+@pytest.fixture
+def converter(tmp_path, settings):
+    return GCodeConverter(ASSET_DIR, tmp_path / "gcode", 200, 150, grbl_settings=settings,
+                          cache=ArtifactCache(tmp_path / "cache"))
+
+
+def test_cache_key_uses_the_resolved_tracer(converter):
+    assert converter.conversion_parameters["tracer"] == resolve_tracer("auto")
+    assert resolve_tracer("opencv") == "opencv"
+    with pytest.raises(ValueError):
+        resolve_tracer("inkscape")
+
+
+def test_converts_once_and_serves_the_cache_after(converter):
+    first = converter.convert(IMAGE)
+    assert not first.cached
+    assert first.metadata["estimated_plot_time_in_seconds"] > 0
+    assert first.gcode_path.read_text().count("\n") == first.metadata["gcode_lines"]
+
+    second = converter.convert(IMAGE)
+    assert second.cached
+    assert second.metadata == first.metadata
+
+
+def test_pen_lifts_are_counted_in_the_emitted_gcode(converter):
+    result = converter.convert(IMAGE)
+    z, lifts = 0.0, 0
+    for line in result.gcode_path.read_text().splitlines():
+        match = re.search(r"Z([-\d.]+)", line.split(";")[0])
+        if match:
+            lifts += float(match.group(1)) > z
+            z = float(match.group(1))
+    assert result.metadata["pen_lifts"] == lifts
+    assert lifts >= result.metadata["path_count"]
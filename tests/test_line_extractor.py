@@ -0,0 +1,56 @@
+import cv2
+import numpy as np
+import pytest
+
+from LineExtractor import ARUCO_DICT, MARKER_SIZE_IN_MILLIMETERS, LineExtractor
+
+PIXELS_PER_MILLIMETER = 4
+
+
+def photographed_sheet(line_from_mm, line_to_mm) -> np.ndarray:
+    """A camera frame of the marker sheet with one drawn line, seen at an angle."""
+    marker = int(round(MARKER_SIZE_IN_MILLIMETERS * PIXELS_PER_MILLIMETER))
+    width, height = 220 * PIXELS_PER_MILLIMETER, 170 * PIXELS_PER_MILLIMETER
+    margin = marker
+    sheet = np.full((height + 2 * margin, width + 2 * margin), 255, np.uint8)
+    for marker_id, (x, y) in enumerate([(0, 0), (width, 0), (0, height), (width, height)]):
+        image = cv2.aruco.generateImageMarker(ARUCO_DICT, marker_id, marker)
+        top, left = margin + y - marker // 2, margin + x - marker // 2
+        sheet[top:top + marker, left:left + marker] = image
+    start, end = (np.float32([line_from_mm, line_to_mm]) * PIXELS_PER_MILLIMETER + margin).astype(int)
+    cv2.line(sheet, tuple(start), tuple(end), 0, 3)
+
+    h, w = sheet.shape
+    camera = cv2.getPerspectiveTransform(
+        np.float32([(0, 0), (w, 0), (0, h), (w, h)]),
+        np.float32([(60, 40), (w + 20, 80), (30, h + 60), (w + 90, h + 10)]),
+    )
+    return cv2.warpPerspective(sheet, camera, (w + 150, h + 120), borderValue=255)
+
+
+def test_fits_the_printed_marker_geometry(capsys):
+    extractor = LineExtractor()
+    warped, paths_px, paths_mm = extractor.extract(photographed_sheet((40, 50), (180, 120)))
+
+    assert warped.shape[:2] == (extractor.H, extractor.W)
+    assert extractor.last_reprojection_error < 2.0
+    assert "RMS reprojection error" in capsys.readouterr().out
+
+    # Away from the quarter of every marker that lies inside the workspace
+    points = paths_mm.coords
+    points = points[(np.abs(points - (110, 85)) < (90, 65)).all(axis=1)]
+    ends = points[[points[:, 0].argmin(), points[:, 0].argmax()]]
+    np.testing.assert_allclose(ends, [(40, 50), (180, 120)], atol=3.0)
+
+
+def test_wrong_marker_size_shows_in_the_error():
+    frame = photographed_sheet((40, 50), (180, 120))
+    right, wrong = LineExtractor(), LineExtractor(marker_size_mm=2 * MARKER_SIZE_IN_MILLIMETERS)
+    right.extract(frame)
+    wrong.extract(frame)
+    assert wrong.last_reprojection_error > 5 * right.last_reprojection_error
+
+
+def test_missing_markers_are_reported():
+    with pytest.raises(ValueError):
+        LineExtractor().extract(np.full((400, 600, 3), 255, np.uint8))
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from PathCollection import PathCollection
+
+TRIANGLE = [(0, 0), (4, 0), (4, 3)]
+SEGMENT = [(10, 10), (10, 12)]
+SQUARE = [(0, 0), (1, 0), (1, 1), (0, 1), (0, 0)]
+
+
+def test_round_trips_lists_and_complex():
+    paths = PathCollection.from_lists([TRIANGLE, SEGMENT])
+    assert len(paths) == 2
+    assert paths.point_count == 5
+    assert paths.to_lists() == [[tuple(map(float, p)) for p in path] for path in (TRIANGLE, SEGMENT)]
+    assert PathCollection.from_complex(paths.to_complex()).to_lists() == paths.to_lists()
+
+
+def test_rejects_inconsistent_offsets():
+    with pytest.raises(ValueError):
+        PathCollection(np.zeros((3, 2)), [0, 2])
+
+
+def test_lengths_and_endpoints():
+    paths = PathCollection.from_lists([TRIANGLE, SEGMENT])
+    np.testing.assert_allclose(paths.path_lengths, [7.0, 2.0])
+    np.testing.assert_array_equal(paths.starts, [(0, 0), (10, 10)])
+    np.testing.assert_array_equal(paths.ends, [(4, 3), (10, 12)])
+
+
+def test_reordered_reverses_and_rotates():
+    paths = PathCollection.from_lists([TRIANGLE, SQUARE])
+    reordered = paths.reordered([1, 0], reverse=[False, True], rotate=[2, 0])
+    assert reordered.to_lists() == [
+        [(1, 1), (0, 1), (0, 0), (1, 0), (1, 1)],
+        [(4, 3), (4, 0), (0, 0)],
+    ]
+
+
+def test_filtered_and_concatenated():
+    paths = PathCollection.from_lists([TRIANGLE, SEGMENT, SQUARE])
+    kept = paths.filtered([True, False, True])
+    assert kept.to_lists() == PathCollection.from_lists([TRIANGLE, SQUARE]).to_lists()
+
+    joined = PathCollection.concatenate([kept, PathCollection.empty(), PathCollection.from_lists([SEGMENT])])
+    assert joined.to_lists() == PathCollection.from_lists([TRIANGLE, SQUARE, SEGMENT]).to_lists()
+    assert len(PathCollection.concatenate([])) == 0
+
+
+def test_transforms():
+    paths = PathCollection.from_lists([SEGMENT])
+    assert paths.scaled(2, 3).translated(1, 1).to_lists() == [[(21, 31), (21, 37)]]
+    swap = np.array([[0, 1, 0], [1, 0, 0]])
+    assert paths.transformed(swap).to_lists() == [[(10, 10), (12, 10)]]
+
+
+def test_simplified_drops_collinear_points():
+    paths = PathCollection.from_lists([[(0, 0), (1, 0.01), (2, 0), (2, 5)]])
+    assert paths.simplified(0.1).to_lists() == [[(0, 0), (2, 0), (2, 5)]]
@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+
+from PathCollection import PathCollection
+from PathOptimizer import PathOptimizer, linesort_travel
+
+
+def test_linesort_travel_follows_the_greedy_walk_from_the_first_path():
+    # First path ends at x=1; the nearest endpoint is the far path's reversed end
+    paths = PathCollection.from_lists([[(0, 0), (1, 0)], [(10, 0), (2, 0)], [(20, 0), (30, 0)]])
+    # Origin → (0,0): 0, (1,0) → (2,0): 1, (10,0) → (20,0): 10
+    assert linesort_travel(paths, (0, 0)) == pytest.approx(11.0)
+
+
+def test_linesort_keeps_a_better_original_order():
+    paths = PathCollection.from_lists([[(0, 0), (1, 0)], [(1, 0), (2, 0)]])
+    assert linesort_travel(paths, (0, 0)) == pytest.approx(0.0)
+
+
+def test_ordering_beats_linesort():
+    rng = np.random.default_rng(1)
+    starts = rng.uniform(0, 200, (300, 2))
+    paths = PathCollection.from_lists([[start, start + rng.uniform(-5, 5, 2)] for start in starts])
+    ordered, report = PathOptimizer(time_budget_in_seconds=0.5).optimize(paths)
+
+    assert report.travel_linesort == pytest.approx(linesort_travel(paths))
+    assert report.travel_after < report.travel_greedy <= 1.05 * report.travel_linesort
+    assert 0 < report.reduction < 1
+    assert sorted(map(tuple, ordered.coords.tolist())) == sorted(map(tuple, paths.coords.tolist()))
@@ -0,0 +1,44 @@
+import pytest
+
+from GrblSettings import GrblSettings
+from PlotTimeEstimator import PlotTimeEstimator
+
+# Accelerations high enough that every move runs at its feed rate throughout
+INSTANT = GrblSettings(acceleration_in_mm_per_second2=(1e9, 1e9, 1e9))
+
+
+def test_constant_speed_times_and_distances():
+    estimate = PlotTimeEstimator(INSTANT).estimate_lines([
+        "G21 G90", "G0 Z5", "G0 X30 Y40", "G1 Z0 F300", "G1 X60 Y40 F600", "G0 Z5",
+    ])
+    assert estimate.draw_distance == pytest.approx(30.0)
+    assert estimate.travel_distance == pytest.approx(50.0)
+    assert estimate.draw_time == pytest.approx(3.0, rel=1e-3)        # 30 mm at 10 mm/s
+    # Like GRBL, a diagonal rapid only has to keep each axis within its own $110/$111 rate
+    assert estimate.travel_time == pytest.approx(50 / (5000 / 60 / 0.8), rel=1e-3)
+    assert estimate.pen_lifts == 2
+    assert estimate.blocks == 5
+
+
+def test_acceleration_adds_time():
+    lines = ["G21 G90", "G1 X100 F3000"]
+    slow = GrblSettings(acceleration_in_mm_per_second2=(10.0, 10.0, 10.0))
+    cruise = PlotTimeEstimator(INSTANT).estimate_lines(lines).total_time
+    assert PlotTimeEstimator(slow).estimate_lines(lines).total_time > cruise * 1.5
+
+
+def test_relative_and_inch_moves_match_absolute_millimeters():
+    estimator = PlotTimeEstimator(INSTANT)
+    absolute = estimator.estimate_lines(["G21 G90", "G1 X25.4 Y0 F600", "G1 X25.4 Y50.8"])
+    relative = estimator.estimate_lines(["G20 G91", "G1 X1 F23.622", "G1 Y2"])
+    assert relative.draw_distance == pytest.approx(absolute.draw_distance)
+    assert relative.total_time == pytest.approx(absolute.total_time, rel=1e-3)
+
+
+def test_arc_is_timed_along_the_circle():
+    estimate = PlotTimeEstimator(INSTANT).estimate_lines(["G21 G90", "G0 X10 Y0", "G3 X-10 Y0 I-10 J0 F600"])
+    assert estimate.draw_distance == pytest.approx(10 * 3.14159, rel=1e-3)
+
+
+def test_empty_program():
+    assert PlotTimeEstimator().estimate_lines(["G21", "; nothing"]).total_time == 0.0
@@ -0,0 +1,41 @@
+from PromptChannel import PromptChannel, UtteranceWindow, VoiceCommand
+
+
+def test_window_keeps_the_most_recent_utterances():
+    window = UtteranceWindow(max_utterances=2, max_characters=100)
+    for text in ("a cat", "a hat", "a bat"):
+        window.add(text)
+    assert window.prompt == "a hat\na bat"
+
+
+def test_draw_sends_the_window_and_clears_it():
+    channel = PromptChannel(window=UtteranceWindow(max_utterances=5, max_characters=100))
+    channel.receive("a  cat")
+    channel.receive("Draw wearing a top hat")
+    assert channel._commands.get_nowait() == VoiceCommand("draw", "a cat\nwearing a top hat")
+    assert len(channel.window) == 0
+
+
+def test_clear_and_empty_draw():
+    channel = PromptChannel()
+    channel.receive("a cat")
+    channel.receive("clear")
+    channel.receive("draw")
+    assert channel._commands.empty()
+    assert len(channel.window) == 0
+
+
+def test_window_drops_old_utterances_beyond_the_character_limit():
+    window = UtteranceWindow(max_utterances=10, max_characters=12)
+    window.add("a tall tree")
+    window.add("a red barn")
+    assert window.prompt == "a red barn"
+
+
+def test_window_cuts_a_long_utterance_at_a_word_boundary():
+    window = UtteranceWindow(max_utterances=10, max_characters=20)
+    window.add("draw a fluffy cat wearing a top hat")
+    assert window.prompt == "wearing a top hat"
+    window.add("supercalifragilisticexpialidocious")
+    # A single word that long can only be cut inside
+    assert window.prompt == "listicexpialidocious"
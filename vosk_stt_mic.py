@@ -3,10 +3,14 @@ import sounddevice as sd
 import queue
 import sys
 import json
+import logging
 import os
-from datetime import datetime
+from logging.handlers import RotatingFileHandler
 from vosk import Model, KaldiRecognizer
 
+from config.config import STT_LOG_BACKUP_COUNT, STT_LOG_MAX_SIZE_IN_BYTES, STT_LOG_PATH
+from PromptChannel import PromptSender
+
 # ----------------------
 # Global configuration
 # ----------------------
@@ -14,10 +18,10 @@ from vosk import Model, KaldiRecognizer
 # 1) Path to the English Vosk model
 MODEL_PATH = "/home/matthewandjun/stt_models/vosk-model-small-en-us-0.15"
 
-# 2) Logging directory & files
-LOG_DIR = "/home/matthewandjun/Desktop/DrawMate/config"
-LOG_FILE = os.path.join(LOG_DIR, "stt_log.txt")
-LATEST_FILE = os.path.join(LOG_DIR, "latest_prompt.txt")
+# 2) Log of every utterance, rotated past STT_LOG_MAX_SIZE_IN_BYTES (config/stt_log.txt, .1, .2, ...)
+#    Utterances reach the drawing pipeline over PromptChannel, not through this file
+LOG_DIR = STT_LOG_PATH.parent
+LOG_FILE = STT_LOG_PATH
 
 # 3) Audio configuration
 SAMPLE_RATE = 16000
@@ -43,6 +47,18 @@ def audio_callback(indata, frames, time, status):
     q.put(bytes(indata))
 
 
+def open_log() -> logging.Logger:
+    """Utterance log that never grows past STT_LOG_MAX_SIZE_IN_BYTES (plus its backups)."""
+    handler = RotatingFileHandler(LOG_FILE, maxBytes=STT_LOG_MAX_SIZE_IN_BYTES,
+                                  backupCount=STT_LOG_BACKUP_COUNT, encoding="utf-8")
+    handler.setFormatter(logging.Formatter("%(asctime)s  %(message)s"))
+    log = logging.getLogger("drawmate.stt")
+    log.setLevel(logging.INFO)
+    log.propagate = False
+    log.addHandler(handler)
+    return log
+
+
 def select_input_device() -> int | None:
     """
     Pick the first device that has at least 1 input channel.
@@ -83,6 +99,10 @@ def main() -> None:
     if mic_device is None:
         return
 
+    log = open_log()
+    # Pushes every utterance to a pipeline running `python main.py --listen`; say "draw" to plot
+    sender = PromptSender()
+
     print("✅ Ready! Speak English into the microphone. (Ctrl+C to exit)")
 
     # Open audio stream – InputStream is friendlier than RawInputStream
@@ -108,22 +128,10 @@ def main() -> None:
                             print("▶ recognized:", text)
 
                             # ----------------------------------------
-                            # Save to full log
-                            # ----------------------------------------
-                            try:
-                                with open(LOG_FILE, "a", encoding="utf-8") as f:
-                                    f.write(f"{datetime.now().isoformat()}  {text}\n")
-                            except Exception as e:
-                                print(f"Cannot write log file: {e}", file=sys.stderr)
-
-                            # ----------------------------------------
-                            # Save latest recognized line
+                            # Log it (rotating) and push it to the pipeline
                             # ----------------------------------------
-                            try:
-                                with open(LATEST_FILE, "w", encoding="utf-8") as f:
-                                    f.write(text + "\n")
-                            except Exception as e:
-                                print(f"Cannot write latest prompt file: {e}", file=sys.stderr)
+                            log.info(text)
+                            sender.send(text)
                     else:
                         # You can inspect partial results if you’d like:
                         # partial = json.loads(recognizer.PartialResult()).get("partial", "")
@@ -137,6 +145,10 @@ def main() -> None:
                 final = json.loads(final_json).get("text", "")
                 if final:
                     print("Final:", final)
+                    log.info(final)
+                    sender.send(final)
+            finally:
+                sender.close()
 
     except sd.PortAudioError as e:
         print(f"❌ PortAudio error while opening input stream: {e}", file=sys.stderr)